@@ -5,14 +5,12 @@ This modular Flask application scrapes vehicle tax information from
 the Mexican government's Paga Fácil website.
 """
 import os
-import logging
 from app import create_app
+from app.config import Config
+from logging_config import configure_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging(Config.LOG_MODE, Config.LOG_LEVEL, Config.LOG_OCR_SAMPLE_RATE)
 
 # Get configuration environment
 config_name = os.getenv('FLASK_ENV', 'development')
@@ -1,10 +1,22 @@
 """
 Flask application factory and configuration.
 """
+import time
+_import_started = time.perf_counter()
+
 import os
+import logging
 from flask import Flask
-from .routes import vehicular_routes, health_routes
+from logging_config import configure_logging
+from .routes import vehicular_routes, health_routes, jobs_routes, admin_routes, metrics_routes
 from .error_handlers import register_error_handlers
+from .request_tracing import register_request_tracing
+from .warmup import start_warm_up
+
+logger = logging.getLogger(__name__)
+
+# Time spent importing the application modules, reported on /status
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
 
 
 def create_app(config=None):
@@ -26,11 +38,27 @@ def create_app(config=None):
         from .config import Config
         app.config.from_object(Config)
     
+    # No-op when the entry point already configured logging
+    configure_logging(app.config.get('LOG_MODE', 'verbose'), app.config.get('LOG_LEVEL', 'INFO'),
+                      app.config.get('LOG_OCR_SAMPLE_RATE', 0.05))
+    
     # Register blueprints
     app.register_blueprint(vehicular_routes)
     app.register_blueprint(health_routes)
+    app.register_blueprint(jobs_routes)
+    app.register_blueprint(admin_routes)
+    app.register_blueprint(metrics_routes)
     
     # Register error handlers
     register_error_handlers(app)
     
+    # Trace API requests through the service, scraper and captcha solver
+    register_request_tracing(app)
+    
+    logger.info("Application modules imported in %.3fs", IMPORT_SECONDS)
+    
+    # Load the OCR libraries off the request path so the first captcha does not wait;
+    # /health answers 503 until this process is warm
+    start_warm_up(app.config)
+    
     return app
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+ASGI application serving the lookup API on an asyncio event loop.
+
+Exposes the same ``/api/vehicular/tenencia/<plate>``, ``/health``,
+``/status`` and ``/metrics`` contract as the Flask application, but lookups run on
+AsyncScraperService, so one process holds hundreds of slow upstream
+lookups as coroutines instead of one thread each.
+
+Usage:
+    uvicorn asgi:app
+"""
+from urllib.parse import parse_qs
+from werkzeug.http import parse_cache_control_header
+from .services import AsyncScraperService, ApiKeyQuotas, ServiceOverloaded
+from .routes.health import health_payload, status_payload, create_upstream_prober
+from .routes.api_keys import admit_api_key, charge_scrape
+from .routes.vehicular import OVERLOADED_MESSAGE, validate_lookup_params, lookup_response_status
+from .utils.responses import error_payload
+from .warmup import start_warm_up
+import json
+import logging
+import metrics
+import tracing
+from logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_PREFIX = '/api/vehicular/tenencia/'
+
+
+def create_asgi_app(config=None):
+    """
+    Application factory for the ASGI app.
+
+    Args:
+        config: Optional configuration dictionary
+
+    Returns:
+        ASGI application callable
+    """
+    if config is None:
+        from .config import Config
+        config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    configure_logging(config.get('LOG_MODE', 'verbose'), config.get('LOG_LEVEL', 'INFO'),
+                      config.get('LOG_OCR_SAMPLE_RATE', 0.05))
+    start_warm_up(config)
+    tracing.configure(config.get('TRACE_FILE'), max_bytes=config['TRACE_FILE_MAX_BYTES'],
+                      backups=config['TRACE_FILE_BACKUPS'])
+    return ScraperASGIApp(config)
+
+
+def _without_body(send):
+    """Wrap ``send`` to drop the body of a HEAD response, keeping its headers."""
+    async def send_headers_only(message):
+        if message['type'] == 'http.response.body':
+            message = dict(message, body=b'')
+        await send(message)
+    return send_headers_only
+
+
+class ScraperASGIApp:
+    """
+    Minimal ASGI application for the lookup and health routes.
+
+    The scraper service is created on the first lookup, inside the event
+    loop, like the Flask app does on its first request; the upstream
+    prober starts on the first health or status request.
+    """
+
+    def __init__(self, config):
+        """
+        Initialize the application.
+
+        Args:
+            config: Configuration mapping with the ``Config`` keys
+        """
+        self.config = config
+        self.service = None
+        self.prober = None
+        self.quotas = ApiKeyQuotas.from_config(
+            config['API_KEYS'],
+            rate_per_minute=config['API_KEY_RATE_PER_MINUTE'],
+            burst=config['API_KEY_BURST'],
+            max_concurrent=config['API_KEY_MAX_CONCURRENT']
+        )
+
+    def init_scraper_service(self):
+        """
+        Initialize the async scraper service with the app config.
+
+        Only called from the event loop thread, so no lock is needed.
+        """
+        if self.service is None:
+            config = self.config
+            self.service = AsyncScraperService(
+                proxy_host=config['PROXY_HOST'],
+                proxy_port=config['PROXY_PORT'],
+                proxy_username=config['PROXY_USERNAME'],
+                proxy_password=config['PROXY_PASSWORD'],
+                max_concurrency=config['ASGI_MAX_CONCURRENCY'],
+                ocr_workers=config['ASGI_OCR_WORKERS'],
+                base_url=config['BASE_URL'],
+                form_url=config['FORM_URL'],
+                request_timeout=config['REQUEST_TIMEOUT'],
+                max_retry_attempts=config['MAX_RETRY_ATTEMPTS'],
+                captcha_max_attempts=config['CAPTCHA_MAX_ATTEMPTS'],
+                cache_ttl=config['RESULT_CACHE_TTL'],
+                cache_soft_ttl=config['RESULT_CACHE_SOFT_TTL'],
+                cache_max_entries=config['RESULT_CACHE_MAX_ENTRIES'],
+                cache_max_bytes=config['RESULT_CACHE_MAX_BYTES'],
+                cache_db_path=config['RESULT_CACHE_DB_PATH'],
+                cache_prune_interval=config['RESULT_CACHE_PRUNE_INTERVAL'],
+                negative_cache_ttl=config['NEGATIVE_CACHE_TTL'],
+                negative_cache_capacity=config['NEGATIVE_CACHE_CAPACITY'],
+                admission_max_queue=config['ADMISSION_MAX_QUEUE'],
+                upstream_rate_limit=config['UPSTREAM_RATE_LIMIT'],
+                upstream_rate_burst=config['UPSTREAM_RATE_BURST'],
+                upstream_rate_state_path=config['UPSTREAM_RATE_STATE_PATH'],
+                upstream_rate_adaptive=config['UPSTREAM_RATE_ADAPTIVE'],
+                upstream_rate_min=config['UPSTREAM_RATE_MIN'],
+                upstream_latency_target=config['UPSTREAM_LATENCY_TARGET'],
+                captcha_telemetry_db_path=config['CAPTCHA_TELEMETRY_DB_PATH'],
+                captcha_telemetry_retention=config['CAPTCHA_TELEMETRY_RETENTION'],
+                stats_interval=config['STATUS_STATS_INTERVAL']
+            )
+        return self.service
+
+    def init_upstream_prober(self):
+        """Create and start the upstream prober on first use."""
+        if self.prober is None:
+            self.prober = create_upstream_prober(self.config)
+            if self.prober is not None:
+                self.prober.start()
+        return self.prober
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if scope['method'] == 'HEAD':
+            send = _without_body(send)
+
+        path = scope['path']
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+        plate = path[len(LOOKUP_PREFIX):] if path.startswith(LOOKUP_PREFIX) else None
+        if path in ('/health', '/status', '/metrics') or (plate and '/' not in plate):
+            if scope['method'] not in ('GET', 'HEAD'):
+                logger.warning("Method not allowed: %s %s", scope['method'], path)
+                await self._send_json(send, 405, error_payload("Method not allowed"))
+            elif path == '/health':
+                await self._health(send)
+            elif path == '/status':
+                await self._status(send)
+            elif path == '/metrics':
+                body, content_type = metrics.render()
+                await self._send(send, 200, body, content_type=content_type)
+            else:
+                await self._traced_tenencia(scope, headers, send, plate)
+            return
+
+        logger.warning("Not found: %s", path)
+        await self._send_json(send, 404, error_payload("Endpoint not found"))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.service is not None:
+                    self.service.close()
+                if self.prober is not None:
+                    self.prober.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _health(self, send):
+        try:
+            self.init_upstream_prober()
+            health_status = health_payload(self.config)
+            await self._send_json(send, 200 if health_status["ready"] else 503, health_status)
+        except Exception as e:
+            logger.error("Health check failed: %s", e, exc_info=True)
+            await self._send_json(send, 500, {
+                "status": "error",
+                "service": "pagafacil-scraper",
+                "error": str(e)
+            })
+
+    async def _status(self, send):
+        try:
+            status = status_payload(self.config, self.service, self.init_upstream_prober())
+            await self._send_json(send, 200, status)
+        except Exception as e:
+            logger.error("Status check failed: %s", e, exc_info=True)
+            await self._send_json(send, 500, {
+                "status": "error",
+                "service": "pagafacil-scraper",
+                "error": str(e),
+                "components": {
+                    "scraper": "error",
+                    "captcha_solver": "unknown"
+                }
+            })
+
+    async def _traced_tenencia(self, scope, headers, send, plate):
+        """Run a lookup request in a new trace and return its id in ``X-Trace-Id``."""
+        target = scope['path']
+        if scope.get('query_string'):
+            target = f"{target}?{scope['query_string'].decode('latin-1')}"
+
+        with tracing.start_trace(f"{scope['method']} {LOOKUP_PREFIX}<string:plate>",
+                                 **{'http.method': scope['method'], 'http.target': target}) as root:
+            async def send_traced(message):
+                if message['type'] == 'http.response.start':
+                    root.set_attribute('http.status_code', message['status'])
+                    if message['status'] >= 500:
+                        root.record_error(f"HTTP {message['status']}")
+                    message = dict(message, headers=[*message['headers'], (b'x-trace-id', root.trace_id.encode('latin-1'))])
+                await send(message)
+
+            await self._tenencia(scope, headers, send_traced, plate)
+
+    async def _tenencia(self, scope, headers, send, plate):
+        """Same checks, status codes and headers as the Flask lookup route."""
+        name = None
+        if self.quotas is not None:
+            name, refusal = admit_api_key(self.quotas, headers.get('x-api-key'))
+            if refusal is not None:
+                status_code, payload, extra_headers = refusal
+                await self._send_json(send, status_code, payload, extra_headers)
+                return
+
+        try:
+            await self._lookup(scope, headers, send, plate, name)
+        finally:
+            if name is not None:
+                self.quotas.release(name)
+
+    async def _lookup(self, scope, headers, send, plate, name):
+        try:
+            query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            vin = query.get('niv', [None])[0]
+            message = validate_lookup_params(plate, vin, strict_vin=self.config['VIN_STRICT_VALIDATION'])
+            if message is not None:
+                await self._send_json(send, 400, error_payload(message))
+                return
+
+            service = self.init_scraper_service()
+            use_cache = not parse_cache_control_header(headers.get('cache-control')).no_cache
+
+            result = await service.get_vehicle_info_async(plate, vin, use_cache=use_cache)
+            charge_scrape(self.quotas, name, result)
+
+        except ServiceOverloaded as e:
+            logger.warning("Refusing lookup for %s: %s", plate, e)
+            await self._send_json(send, 429, error_payload(OVERLOADED_MESSAGE),
+                                  [('Retry-After', str(e.retry_after))])
+            return
+
+        except Exception as e:
+            logger.error("Error in tenencia lookup: %s", e, exc_info=True)
+            await self._send_json(send, 500, error_payload(f"Internal server error: {str(e)}"))
+            return
+
+        status_code, extra_headers = lookup_response_status(
+            result, headers.get('if-none-match'), headers.get('if-modified-since')
+        )
+        if status_code == 304:
+            await self._send(send, 304, b'', extra_headers, content_type=None)
+        else:
+            await self._send_json(send, status_code, result, extra_headers)
+
+    async def _send_json(self, send, status, payload, extra_headers=()):
+        """Send a JSON response serialized like Flask's ``jsonify``."""
+        if self.config.get('DEBUG'):
+            body = json.dumps(payload, sort_keys=True, indent=2)
+        else:
+            body = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        await self._send(send, status, f"{body}\n".encode('utf-8'), extra_headers)
+
+    @staticmethod
+    async def _send(send, status, body, extra_headers=(), content_type='application/json'):
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in extra_headers]
+        if content_type is not None:
+            headers.append((b'content-type', content_type.encode('latin-1')))
+            headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -2,6 +2,7 @@
 Application configuration module.
 """
 import os
+import tempfile
 
 
 class Config:
@@ -21,6 +22,9 @@ class Config:
     BASE_URL = os.getenv('BASE_URL', 'https://www.pagafacil.gob.mx/pagafacilv2/epago/cv/')
     FORM_URL = os.getenv('FORM_URL', 'control_vehicular_25.php')
     
+    # Reject North American VINs with a wrong check digit before going upstream
+    VIN_STRICT_VALIDATION = os.getenv('VIN_STRICT_VALIDATION', 'false').lower() == 'true'
+    
     # Request configuration
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
     MAX_RETRY_ATTEMPTS = int(os.getenv('MAX_RETRY_ATTEMPTS', '3'))
@@ -28,6 +32,93 @@ class Config:
     # Captcha configuration
     CAPTCHA_MAX_ATTEMPTS = int(os.getenv('CAPTCHA_MAX_ATTEMPTS', '2'))
     TWOCAPTCHA_API_KEY = os.getenv('TWOCAPTCHA_API_KEY')
+    # Import OpenCV/Tesseract in a background thread at startup instead of on the first captcha
+    OCR_WARMUP = os.getenv('OCR_WARMUP', 'true').lower() == 'true'
+    # Set when gunicorn preloads the app: warm up once in the master, before forking
+    GUNICORN_PRELOAD = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+    
+    # Concurrency configuration
+    SCRAPER_POOL_SIZE = int(os.getenv('SCRAPER_POOL_SIZE', '4'))
+    SCHEDULER_WEIGHT_INTERACTIVE = int(os.getenv('SCHEDULER_WEIGHT_INTERACTIVE', '8'))
+    SCHEDULER_WEIGHT_BULK = int(os.getenv('SCHEDULER_WEIGHT_BULK', '1'))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '8'))
+    # ASGI app: concurrent upstream lookups per process, and threads for captcha OCR
+    ASGI_MAX_CONCURRENCY = int(os.getenv('ASGI_MAX_CONCURRENCY', '200'))
+    ASGI_OCR_WORKERS = int(os.getenv('ASGI_OCR_WORKERS', str(os.cpu_count() or 1)))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))
+    BATCH_MAX_VEHICLES = int(os.getenv('BATCH_MAX_VEHICLES', '500'))
+    
+    # API keys: comma-separated name:key[:rate_per_minute[:max_concurrent]] entries
+    API_KEYS = os.getenv('API_KEYS', '')
+    API_KEY_RATE_PER_MINUTE = float(os.getenv('API_KEY_RATE_PER_MINUTE', '60'))
+    API_KEY_BURST = int(os.getenv('API_KEY_BURST', '10'))
+    API_KEY_MAX_CONCURRENT = int(os.getenv('API_KEY_MAX_CONCURRENT', '4'))
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    
+    # Upstream rate limiting, shared by all processes on the host
+    UPSTREAM_RATE_LIMIT = float(os.getenv('UPSTREAM_RATE_LIMIT', '2'))
+    UPSTREAM_RATE_BURST = int(os.getenv('UPSTREAM_RATE_BURST', '6'))
+    UPSTREAM_RATE_STATE_PATH = os.getenv(
+        'UPSTREAM_RATE_STATE_PATH', os.path.join(tempfile.gettempdir(), 'pagafacil-ratelimit.state')
+    )
+    UPSTREAM_RATE_ADAPTIVE = os.getenv('UPSTREAM_RATE_ADAPTIVE', 'false').lower() == 'true'
+    UPSTREAM_RATE_MIN = float(os.getenv('UPSTREAM_RATE_MIN', '0.2'))
+    UPSTREAM_LATENCY_TARGET = float(os.getenv('UPSTREAM_LATENCY_TARGET', '3'))
+    
+    # Background probe of the form page and captcha for /status (0 disables)
+    UPSTREAM_PROBE_INTERVAL = int(os.getenv('UPSTREAM_PROBE_INTERVAL', '60'))
+    UPSTREAM_PROBE_HISTORY = int(os.getenv('UPSTREAM_PROBE_HISTORY', '20'))
+    # Seconds between background refreshes of the cache and rate limiter figures on /status (0: every request)
+    STATUS_STATS_INTERVAL = int(os.getenv('STATUS_STATS_INTERVAL', '15'))
+    # One worker per host probes and shares its snapshot through this file (empty: every worker probes)
+    UPSTREAM_PROBE_STATE_PATH = os.getenv(
+        'UPSTREAM_PROBE_STATE_PATH', os.path.join(tempfile.gettempdir(), 'pagafacil-probe.json')
+    )
+    
+    # Captcha solve telemetry, shared by all workers on the host (empty path disables)
+    CAPTCHA_TELEMETRY_DB_PATH = os.getenv(
+        'CAPTCHA_TELEMETRY_DB_PATH', os.path.join(tempfile.gettempdir(), 'pagafacil-captcha.sqlite3')
+    )
+    CAPTCHA_TELEMETRY_RETENTION = int(os.getenv('CAPTCHA_TELEMETRY_RETENTION', str(7 * 86400)))
+    
+    # Request traces as OpenTelemetry JSON lines, rotated by size; off unless a path is set
+    TRACE_FILE = os.getenv('TRACE_FILE', '')
+    TRACE_FILE_MAX_BYTES = int(os.getenv('TRACE_FILE_MAX_BYTES', str(10 * 1024 * 1024)))
+    TRACE_FILE_BACKUPS = int(os.getenv('TRACE_FILE_BACKUPS', '3'))
+    
+    # On-demand cProfile of single lookups: admins send X-Profile: 1, and
+    # PROFILE_SAMPLE_RATE of all other lookups are profiled too; off unless a directory is set
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+    
+    # Logging: 'verbose' logs every lookup step; 'production' logs one summary line per
+    # lookup and a sample of OCR calls, writing from a background thread
+    LOG_MODE = os.getenv('LOG_MODE', 'verbose')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_OCR_SAMPLE_RATE = float(os.getenv('LOG_OCR_SAMPLE_RATE', '0.05'))
+    
+    # Job queue configuration
+    JOB_DB_PATH = os.getenv('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'pagafacil-jobs.sqlite3'))
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+    JOB_MAX_VEHICLES = int(os.getenv('JOB_MAX_VEHICLES', '5000'))
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', '86400'))
+    JOB_WORKER_PROCESSES = int(os.getenv('JOB_WORKER_PROCESSES', '2'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+    JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '30'))
+    
+    # Result cache configuration
+    RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '900'))
+    RESULT_CACHE_SOFT_TTL = int(os.getenv('RESULT_CACHE_SOFT_TTL', '300'))
+    RESULT_CACHE_REFRESH_WORKERS = int(os.getenv('RESULT_CACHE_REFRESH_WORKERS', '2'))
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1000'))
+    RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    RESULT_CACHE_DB_PATH = os.getenv(
+        'RESULT_CACHE_DB_PATH', os.path.join(tempfile.gettempdir(), 'pagafacil-results.sqlite3')
+    )
+    RESULT_CACHE_PRUNE_INTERVAL = int(os.getenv('RESULT_CACHE_PRUNE_INTERVAL', '300'))
+    NEGATIVE_CACHE_TTL = int(os.getenv('NEGATIVE_CACHE_TTL', '300'))
+    NEGATIVE_CACHE_CAPACITY = int(os.getenv('NEGATIVE_CACHE_CAPACITY', '100000'))
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,56 @@
+"""
+Request tracing hooks for the Flask application.
+"""
+from flask import g, request
+import tracing
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = 'X-Trace-Id'
+
+
+def register_request_tracing(app):
+    """
+    Trace every API request and return its trace id in ``X-Trace-Id``.
+    
+    Health, status and metrics endpoints are polled constantly and are
+    not traced.
+    
+    Args:
+        app: Flask application instance
+    """
+    tracing.configure(
+        app.config.get('TRACE_FILE'),
+        max_bytes=app.config.get('TRACE_FILE_MAX_BYTES', 10 * 1024 * 1024),
+        backups=app.config.get('TRACE_FILE_BACKUPS', 3)
+    )
+    
+    @app.before_request
+    def begin_request_trace():
+        if not request.path.startswith('/api/'):
+            return None
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        g.trace = tracing.begin_trace(
+            f"{request.method} {rule}",
+            **{'http.method': request.method, 'http.target': request.full_path.rstrip('?')}
+        )
+        return None
+    
+    @app.after_request
+    def add_trace_header(response):
+        trace = g.get('trace')
+        if trace is not None:
+            root, _ = trace
+            root.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                root.record_error(f"HTTP {response.status_code}")
+            response.headers[TRACE_HEADER] = root.trace_id
+        return response
+    
+    @app.teardown_request
+    def finish_request_trace(error):
+        trace = g.pop('trace', None)
+        if trace is not None:
+            root, token = trace
+            tracing.finish_trace(root, token, error)
@@ -3,5 +3,8 @@ Route modules for the Flask application.
 """
 from .vehicular import vehicular_routes
 from .health import health_routes
+from .jobs import jobs_routes
+from .admin import admin_routes
+from .metrics import metrics_routes
 
-__all__ = ['vehicular_routes', 'health_routes']
\ No newline at end of file
+__all__ = ['vehicular_routes', 'health_routes', 'jobs_routes', 'admin_routes', 'metrics_routes']
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Administrative routes for operators.
+"""
+from flask import Blueprint, Response, request, jsonify, current_app, send_file
+from .api_keys import init_api_quotas
+from ..services import CaptchaTelemetry, RequestProfiler
+from ..utils.responses import error_payload
+import hmac
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+admin_routes = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+_init_lock = threading.Lock()
+
+
+def init_captcha_telemetry():
+    """
+    Open the captcha telemetry store with current app config.
+    
+    Returns:
+        CaptchaTelemetry instance, or None if telemetry is disabled
+    """
+    extensions = current_app.extensions
+    if 'captcha_telemetry' not in extensions:
+        with _init_lock:
+            if 'captcha_telemetry' not in extensions:
+                db_path = current_app.config['CAPTCHA_TELEMETRY_DB_PATH']
+                extensions['captcha_telemetry'] = CaptchaTelemetry(
+                    db_path,
+                    retention=current_app.config['CAPTCHA_TELEMETRY_RETENTION']
+                ) if db_path else None
+    return extensions['captcha_telemetry']
+
+
+def init_request_profiler():
+    """
+    Open the lookup profiler with current app config.
+    
+    Returns:
+        RequestProfiler instance, or None if profiling is disabled
+    """
+    extensions = current_app.extensions
+    if 'request_profiler' not in extensions:
+        with _init_lock:
+            if 'request_profiler' not in extensions:
+                directory = current_app.config.get('PROFILE_DIR')
+                extensions['request_profiler'] = RequestProfiler(
+                    directory,
+                    sample_rate=current_app.config.get('PROFILE_SAMPLE_RATE', 0.0),
+                    keep=current_app.config.get('PROFILE_KEEP', 50)
+                ) if directory else None
+    return extensions['request_profiler']
+
+
+def is_admin_request():
+    """Whether the request carries ``Authorization: Bearer <ADMIN_TOKEN>``."""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {token}".encode('utf-8'))
+
+
+@admin_routes.before_request
+def check_admin_token():
+    """Require ``Authorization: Bearer <ADMIN_TOKEN>`` on every admin route."""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        # Admin endpoints are disabled until a token is configured
+        return jsonify(error_payload("Endpoint not found")), 404
+
+    if not is_admin_request():
+        return jsonify(error_payload("Invalid admin token")), 403
+    return None
+
+
+@admin_routes.route('/usage')
+def get_usage():
+    """
+    Get per-API-key quotas and usage counters for this worker process.
+    
+    Returns:
+        JSON response with requests, refusals and consumed scrape-seconds per key
+    """
+    quotas = init_api_quotas()
+    return jsonify({
+        "codigo": "ok",
+        "api_keys_enabled": quotas is not None,
+        "keys": quotas.usage() if quotas is not None else {}
+    }), 200
+
+
+@admin_routes.route('/captcha')
+def get_captcha_telemetry():
+    """
+    Summarize captcha solves of all workers over a time window.
+    
+    Query Parameters:
+        window: Seconds back from now to cover (default: 3600, at most the
+            telemetry retention)
+    
+    Returns:
+        JSON response with solve rate, solve time, Tesseract calls per
+        solve, the server-side accept rate and the accept rate per
+        preprocessing variant and OCR config that produced the answer
+    """
+    retention = current_app.config['CAPTCHA_TELEMETRY_RETENTION']
+    try:
+        window = int(request.args.get('window', '3600'))
+    except ValueError:
+        window = 0
+    if not 0 < window <= retention:
+        return jsonify(error_payload(f"window must be a number of seconds between 1 and {retention}")), 400
+    
+    telemetry = init_captcha_telemetry()
+    return jsonify({
+        "codigo": "ok",
+        "captcha_telemetry_enabled": telemetry is not None,
+        "captcha": telemetry.summary(window) if telemetry is not None else None
+    }), 200
+
+
+@admin_routes.route('/profiles')
+def list_profiles():
+    """
+    List the saved lookup profiles, newest first.
+    
+    Returns:
+        JSON response with the name, trace id, creation time and size of
+        each profile
+    """
+    profiler = init_request_profiler()
+    return jsonify({
+        "codigo": "ok",
+        "profiling_enabled": profiler is not None,
+        "sample_rate": profiler.sample_rate if profiler is not None else 0.0,
+        "profiles": profiler.list() if profiler is not None else []
+    }), 200
+
+
+@admin_routes.route('/profiles/<string:name>')
+def get_profile(name):
+    """
+    Download a saved lookup profile.
+    
+    Args:
+        name (str): Profile name from ``/api/admin/profiles``
+    
+    Query Parameters:
+        format: ``pstats`` (default) for the binary dump, to open with
+            ``python -m pstats`` or snakeviz; ``text`` for a report of the
+            top functions
+        sort: Sort key of the text report: ``cumulative`` (default),
+            ``tottime`` or ``calls``
+    
+    Returns:
+        The profile, or 404 if there is no such profile
+    """
+    profiler = init_request_profiler()
+    path = profiler.path(name) if profiler is not None else None
+    if path is None:
+        return jsonify(error_payload("Profile not found")), 404
+    
+    if request.args.get('format', 'pstats') != 'text':
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+    
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'calls'):
+        return jsonify(error_payload("sort must be one of cumulative, tottime, calls")), 400
+    return Response(profiler.render_text(name, sort=sort), mimetype='text/plain')
@@ -0,0 +1,131 @@
+"""
+API key authentication and quota enforcement for lookup routes.
+"""
+from flask import request, jsonify, current_app, g
+from ..services import ApiKeyQuotas, QuotaExceeded
+from ..utils.responses import error_payload
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Results that consumed a scraper session on the caller's behalf
+_SCRAPED = ('miss', 'bypass')
+
+_init_lock = threading.Lock()
+
+
+def init_api_quotas():
+    """
+    Initialize the API key registry with current app config.
+
+    Returns:
+        ApiKeyQuotas instance, or None if no API keys are configured
+    """
+    extensions = current_app.extensions
+    if 'api_quotas' not in extensions:
+        # Two registries built by racing threads would split the counters
+        with _init_lock:
+            if 'api_quotas' not in extensions:
+                extensions['api_quotas'] = ApiKeyQuotas.from_config(
+                    current_app.config['API_KEYS'],
+                    rate_per_minute=current_app.config['API_KEY_RATE_PER_MINUTE'],
+                    burst=current_app.config['API_KEY_BURST'],
+                    max_concurrent=current_app.config['API_KEY_MAX_CONCURRENT']
+                )
+    return extensions['api_quotas']
+
+
+def require_api_key(blueprint):
+    """
+    Require an ``X-API-Key`` header on every route of a blueprint.
+
+    Requests are counted against the key's rate and concurrency quotas.
+    The concurrency slot is held until the response has been sent, so a
+    streamed batch counts for as long as it streams. Without configured
+    keys the routes stay open.
+
+    Args:
+        blueprint: Blueprint to protect
+    """
+
+    @blueprint.before_request
+    def check_api_key():
+        quotas = init_api_quotas()
+        if quotas is None:
+            return None
+
+        name, refusal = admit_api_key(quotas, request.headers.get('X-API-Key'))
+        if refusal is not None:
+            status_code, payload, headers = refusal
+            return jsonify(payload), status_code, headers
+
+        g.api_key = name
+        return None
+
+    @blueprint.after_request
+    def release_on_close(response):
+        name = g.pop('api_key', None)
+        if name is not None:
+            quotas = init_api_quotas()
+            response.call_on_close(lambda: quotas.release(name))
+        return response
+
+    @blueprint.teardown_request
+    def release_on_error(exc):
+        # Only reached with a key still set if after_request did not run
+        name = g.pop('api_key', None)
+        if name is not None:
+            init_api_quotas().release(name)
+
+
+def admit_api_key(quotas, api_key):
+    """
+    Authenticate an API key and take one of its request slots.
+
+    The caller releases the slot with ``quotas.release(name)`` once the
+    response has been sent.
+
+    Args:
+        quotas: ApiKeyQuotas instance
+        api_key: Value of the ``X-API-Key`` header, or None
+
+    Returns:
+        Tuple of (key name, None) when admitted, or (None, (status code,
+        error payload, extra headers)) when refused
+    """
+    name = quotas.authenticate(api_key)
+    if name is None:
+        return None, (401, error_payload("A valid X-API-Key header is required"), [])
+
+    try:
+        quotas.acquire(name)
+    except QuotaExceeded as e:
+        logger.warning("Refusing request: %s", e)
+        return None, (429, error_payload(f"API key {e.reason} quota exceeded, please retry later"),
+                      [('Retry-After', str(e.retry_after))])
+    return name, None
+
+
+def current_api_key():
+    """Name of the API key of the current request, or None."""
+    return g.get('api_key')
+
+
+def charge_scrape(quotas, name, result):
+    """
+    Charge the scrape time behind a result to an API key.
+
+    Cache hits and coalesced results cost nothing; only the caller that
+    actually held a scraper session is charged.
+
+    Args:
+        quotas: ApiKeyQuotas instance, or None when keys are not configured
+        name: Key name
+        result: Lookup result with ``_metadata``
+    """
+    if quotas is None or name is None:
+        return
+    metadata = result.get('_metadata') or {}
+    if metadata.get('cache') in _SCRAPED and 'scrape_seconds' in metadata:
+        quotas.record_scrape(name, metadata['scrape_seconds'])
@@ -2,12 +2,171 @@
 Health check and monitoring routes.
 """
 from flask import Blueprint, jsonify, current_app
+from scraper import PagaFacilScraper
+from ..services import UpstreamProber, UpstreamRateLimiter
+from ..warmup import is_ready, readiness
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
 health_routes = Blueprint('health', __name__)
 
+# Started on the first health or status request, in the worker process
+upstream_prober = None
+_upstream_prober_lock = threading.Lock()
+
+
+def create_upstream_prober(config):
+    """
+    Build an upstream prober from the app config.
+    
+    Each probe uses a fresh scraper, so it never takes a session from the
+    lookup pool, and draws from the shared upstream rate limit.
+    
+    Args:
+        config: Application configuration mapping
+        
+    Returns:
+        UpstreamProber instance, or None if probing is disabled
+    """
+    if config['UPSTREAM_PROBE_INTERVAL'] <= 0:
+        return None
+    
+    rate_limiter = None
+    if config['UPSTREAM_RATE_LIMIT'] > 0 and config['UPSTREAM_RATE_STATE_PATH']:
+        rate_limiter = UpstreamRateLimiter(
+            config['UPSTREAM_RATE_STATE_PATH'],
+            rate=config['UPSTREAM_RATE_LIMIT'],
+            burst=config['UPSTREAM_RATE_BURST'],
+            adaptive=config['UPSTREAM_RATE_ADAPTIVE'],
+            min_rate=config['UPSTREAM_RATE_MIN'],
+            latency_target=config['UPSTREAM_LATENCY_TARGET']
+        )
+    
+    def probe():
+        scraper = PagaFacilScraper(
+            proxy_host=config['PROXY_HOST'],
+            proxy_port=config['PROXY_PORT'],
+            proxy_username=config['PROXY_USERNAME'],
+            proxy_password=config['PROXY_PASSWORD'],
+            rate_limiter=rate_limiter,
+            base_url=config['BASE_URL'],
+            form_url=config['FORM_URL']
+        )
+        try:
+            return scraper.probe()
+        finally:
+            scraper.session.close()
+    
+    return UpstreamProber(
+        probe,
+        interval=config['UPSTREAM_PROBE_INTERVAL'],
+        history=config['UPSTREAM_PROBE_HISTORY'],
+        state_path=config.get('UPSTREAM_PROBE_STATE_PATH') or None
+    )
+
+
+def init_upstream_prober():
+    """
+    Create and start the upstream prober with current app config.
+    
+    Returns:
+        UpstreamProber instance, or None if probing is disabled
+    """
+    global upstream_prober
+    if upstream_prober is None:
+        with _upstream_prober_lock:
+            if upstream_prober is None:
+                upstream_prober = create_upstream_prober(current_app.config)
+                if upstream_prober is not None:
+                    upstream_prober.start()
+    return upstream_prober
+
+
+def health_payload(config):
+    """
+    Build the ``/health`` response body.
+    
+    Shared by the Flask and ASGI applications so both report the same.
+    
+    Args:
+        config: Application configuration mapping
+        
+    Returns:
+        Health status dictionary
+    """
+    # Not ready until warm-up has finished, so load balancers hold off
+    # traffic that would pay the cold-start cost
+    ready = is_ready()
+    health_status = {
+        "status": "ok" if ready else "starting",
+        "service": "pagafacil-scraper",
+        "version": "1.0.0",
+        "ready": ready
+    }
+    
+    # Add configuration info in development mode
+    if config.get('DEBUG'):
+        health_status["debug_info"] = {
+            "proxy_host": config['PROXY_HOST'],
+            "base_url": config['BASE_URL'],
+            "timeout": config['REQUEST_TIMEOUT']
+        }
+    
+    return health_status
+
+
+def status_payload(config, service, prober=None):
+    """
+    Build the ``/status`` response body.
+    
+    Component states come from the prober's cached snapshot and cache and
+    rate limiter figures from the service's periodic snapshot, so building
+    the body never contacts upstream or waits for a lock lookups hold.
+    
+    Args:
+        config: Application configuration mapping
+        service: Scraper service, or None if no lookup has initialized it yet
+        prober: Upstream prober, or None if probing is disabled
+        
+    Returns:
+        Detailed status dictionary
+    """
+    probe = prober.snapshot() if prober is not None else None
+    scraper_state = probe['state'] if probe is not None else 'unknown'
+    
+    captcha_state = 'unknown'
+    if probe is not None and probe['last'] is not None:
+        solved = probe['last'].get('captcha_solved')
+        if solved is not None:
+            captcha_state = 'ok' if solved else 'error'
+    
+    status = {
+        "status": "degraded" if scraper_state in ('degraded', 'error') else "ok",
+        "service": "pagafacil-scraper",
+        "version": "1.0.0",
+        "components": {
+            "scraper": scraper_state,
+            "captcha_solver": captcha_state
+        },
+        "configuration": {
+            "proxy_enabled": bool(config.get('PROXY_HOST')),
+            "captcha_service_enabled": bool(config.get('TWOCAPTCHA_API_KEY')),
+            "timeout": config['REQUEST_TIMEOUT'],
+            "max_retries": config['MAX_RETRY_ATTEMPTS']
+        },
+        "upstream_probe": probe
+    }
+    
+    from .. import IMPORT_SECONDS
+    status["startup"] = {"import_seconds": IMPORT_SECONDS, **readiness()}
+    
+    if service is not None:
+        status.update(service.status_stats())
+    
+    return status
+
 
 @health_routes.route('/health')
 def health_check():
@@ -15,28 +174,17 @@ def health_check():
     Health check endpoint for monitoring and load balancers.
     
     Returns:
-        JSON response with service status
+        JSON response with service status; 503 while the worker is
+        still warming up
     """
     try:
-        # Basic health check - could be extended with database checks, etc.
-        health_status = {
-            "status": "ok",
-            "service": "pagafacil-scraper",
-            "version": "1.0.0"
-        }
-        
-        # Add configuration info in development mode
-        if current_app.config.get('DEBUG'):
-            health_status["debug_info"] = {
-                "proxy_host": current_app.config['PROXY_HOST'],
-                "base_url": current_app.config['BASE_URL'],
-                "timeout": current_app.config['REQUEST_TIMEOUT']
-            }
+        init_upstream_prober()
+        health_status = health_payload(current_app.config)
         
-        return jsonify(health_status), 200
+        return jsonify(health_status), 200 if health_status["ready"] else 503
         
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}", exc_info=True)
+        logger.error("Health check failed: %s", e, exc_info=True)
         return jsonify({
             "status": "error",
             "service": "pagafacil-scraper",
@@ -49,32 +197,21 @@ def detailed_status():
     """
     Detailed status endpoint with more comprehensive checks.
     
+    Served from cached state: upstream health comes from the background
+    prober, never from a scrape started by this request.
+    
     Returns:
         JSON response with detailed service status
     """
     try:
-        from ..services import ScraperService
+        from .vehicular import scraper_service
         
-        status = {
-            "status": "ok",
-            "service": "pagafacil-scraper",
-            "version": "1.0.0",
-            "components": {
-                "scraper": "ok",
-                "captcha_solver": "ok"
-            },
-            "configuration": {
-                "proxy_enabled": bool(current_app.config.get('PROXY_HOST')),
-                "captcha_service_enabled": bool(current_app.config.get('TWOCAPTCHA_API_KEY')),
-                "timeout": current_app.config['REQUEST_TIMEOUT'],
-                "max_retries": current_app.config['MAX_RETRY_ATTEMPTS']
-            }
-        }
+        status = status_payload(current_app.config, scraper_service, init_upstream_prober())
         
         return jsonify(status), 200
         
     except Exception as e:
-        logger.error(f"Status check failed: {str(e)}", exc_info=True)
+        logger.error("Status check failed: %s", e, exc_info=True)
         return jsonify({
             "status": "error",
             "service": "pagafacil-scraper",
@@ -0,0 +1,103 @@
+"""
+Asynchronous lookup job routes.
+"""
+from flask import Blueprint, request, jsonify, current_app, url_for
+from ..services import JobQueue
+from ..utils.validators import validate_vehicle_entry
+from ..utils.responses import error_payload
+from .api_keys import require_api_key
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+jobs_routes = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+require_api_key(jobs_routes)
+
+# Initialize job queue (will be configured when app starts)
+job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def init_job_queue():
+    """Initialize the job queue with current app config."""
+    global job_queue
+    if job_queue is not None:
+        return job_queue
+    
+    with _job_queue_lock:
+        if job_queue is None:
+            job_queue = JobQueue(
+                current_app.config['JOB_DB_PATH'],
+                lease_seconds=current_app.config['JOB_LEASE_SECONDS']
+            )
+    return job_queue
+
+
+@jobs_routes.route('', methods=['POST'])
+def submit_job():
+    """
+    Submit vehicles for asynchronous lookup.
+    
+    Request Body:
+        JSON object ``{"vehicles": [{"plate": ..., "niv": ...}, ...]}``
+        (a bare list of vehicles is also accepted)
+        
+    Returns:
+        202 response with the job id and the URL to poll
+    """
+    try:
+        payload = request.get_json(silent=True)
+        vehicles = payload.get('vehicles') if isinstance(payload, dict) else payload
+        
+        if not isinstance(vehicles, list) or not vehicles:
+            return jsonify(error_payload("Request body must contain a non-empty 'vehicles' list")), 400
+        
+        max_vehicles = current_app.config['JOB_MAX_VEHICLES']
+        if len(vehicles) > max_vehicles:
+            return jsonify(error_payload(f"A job can contain at most {max_vehicles} vehicles")), 400
+        
+        # Reject the whole job up front so it never half-fails in the background
+        strict_vin = current_app.config['VIN_STRICT_VALIDATION']
+        validations = [validate_vehicle_entry(item, strict_vin=strict_vin) for item in vehicles]
+        errors = [f"vehicles[{index}]: {v['message']}" for index, v in enumerate(validations) if not v['valid']]
+        if errors:
+            return jsonify(error_payload("Invalid vehicles in request", details=errors)), 400
+        
+        queue = init_job_queue()
+        job_id = queue.submit([(v['plate'], v['vin']) for v in validations])
+        
+        return jsonify({
+            "codigo": "ok",
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(validations),
+            "status_url": url_for('jobs.get_job', job_id=job_id)
+        }), 202
+        
+    except Exception as e:
+        logger.error("Error in submit_job: %s", e, exc_info=True)
+        return jsonify(error_payload(f"Internal server error: {str(e)}")), 500
+
+
+@jobs_routes.route('/<string:job_id>')
+def get_job(job_id):
+    """
+    Get a job's progress and the results finished so far.
+    
+    Args:
+        job_id (str): Job id returned on submission
+        
+    Returns:
+        JSON response with job status, progress and per-vehicle results
+    """
+    try:
+        job = init_job_queue().get(job_id)
+        if job is None:
+            return jsonify(error_payload("Job not found")), 404
+        
+        return jsonify(job), 200
+        
+    except Exception as e:
+        logger.error("Error in get_job: %s", e, exc_info=True)
+        return jsonify(error_payload(f"Internal server error: {str(e)}")), 500
@@ -0,0 +1,22 @@
+"""
+Prometheus metrics route.
+"""
+from flask import Blueprint, Response
+import metrics
+
+metrics_routes = Blueprint('metrics', __name__)
+
+
+@metrics_routes.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Expose lookup stage timings and upstream counters for Prometheus.
+    
+    Under gunicorn with ``PROMETHEUS_MULTIPROC_DIR`` set, the samples of
+    all workers are aggregated, so any worker can answer a scrape.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
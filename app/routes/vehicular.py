@@ -1,37 +1,156 @@
 """
 Vehicle tax information routes.
 """
-from flask import Blueprint, request, jsonify, current_app
-from ..services import ScraperService
-from ..utils.validators import validate_plate, validate_vin
+from flask import Blueprint, Response, request, jsonify, current_app
+from werkzeug.http import http_date, quote_etag
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ..services import ScraperService, ServiceOverloaded, result_etag, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from ..utils.validators import validate_plate, validate_vin, validate_vehicle_entry
+from ..utils.conditional import is_not_modified, last_modified_time
+from ..utils.responses import error_payload
+from .api_keys import require_api_key, init_api_quotas, current_api_key, charge_scrape
+from .admin import init_request_profiler, is_admin_request
+import json
+import threading
 import logging
+import tracing
 
 logger = logging.getLogger(__name__)
 
+# Admins send ``X-Profile: 1`` to have a lookup profiled
+PROFILE_HEADER = 'X-Profile'
+
+OVERLOADED_MESSAGE = "Too many lookups in progress, please retry later"
+
 vehicular_routes = Blueprint('vehicular', __name__, url_prefix='/api/vehicular')
+require_api_key(vehicular_routes)
 
 # Initialize scraper service (will be configured when app starts)
 scraper_service = None
+_scraper_service_lock = threading.Lock()
 
 
 def init_scraper_service():
-    """Initialize the scraper service with current app config."""
+    """
+    Initialize the scraper service with current app config.
+    
+    Safe to call from concurrent request threads or greenlets: the first
+    caller builds the service and the others wait for it.
+    """
     global scraper_service
-    if scraper_service is None:
-        scraper_service = ScraperService(
-            proxy_host=current_app.config['PROXY_HOST'],
-            proxy_port=current_app.config['PROXY_PORT'],
-            proxy_username=current_app.config['PROXY_USERNAME'],
-            proxy_password=current_app.config['PROXY_PASSWORD'],
-            base_url=current_app.config['BASE_URL'],
-            form_url=current_app.config['FORM_URL'],
-            request_timeout=current_app.config['REQUEST_TIMEOUT'],
-            max_retry_attempts=current_app.config['MAX_RETRY_ATTEMPTS'],
-            captcha_max_attempts=current_app.config['CAPTCHA_MAX_ATTEMPTS']
-        )
+    if scraper_service is not None:
+        return scraper_service
+    
+    with _scraper_service_lock:
+        if scraper_service is None:
+            scraper_service = _create_scraper_service()
     return scraper_service
 
 
+def _create_scraper_service():
+    """Build a ScraperService from the current app config."""
+    return ScraperService(
+        proxy_host=current_app.config['PROXY_HOST'],
+        proxy_port=current_app.config['PROXY_PORT'],
+        proxy_username=current_app.config['PROXY_USERNAME'],
+        proxy_password=current_app.config['PROXY_PASSWORD'],
+        base_url=current_app.config['BASE_URL'],
+        form_url=current_app.config['FORM_URL'],
+        request_timeout=current_app.config['REQUEST_TIMEOUT'],
+        max_retry_attempts=current_app.config['MAX_RETRY_ATTEMPTS'],
+        captcha_max_attempts=current_app.config['CAPTCHA_MAX_ATTEMPTS'],
+        cache_ttl=current_app.config['RESULT_CACHE_TTL'],
+        cache_soft_ttl=current_app.config['RESULT_CACHE_SOFT_TTL'],
+        cache_refresh_workers=current_app.config['RESULT_CACHE_REFRESH_WORKERS'],
+        cache_max_entries=current_app.config['RESULT_CACHE_MAX_ENTRIES'],
+        cache_max_bytes=current_app.config['RESULT_CACHE_MAX_BYTES'],
+        cache_db_path=current_app.config['RESULT_CACHE_DB_PATH'],
+        cache_prune_interval=current_app.config['RESULT_CACHE_PRUNE_INTERVAL'],
+        negative_cache_ttl=current_app.config['NEGATIVE_CACHE_TTL'],
+        negative_cache_capacity=current_app.config['NEGATIVE_CACHE_CAPACITY'],
+        pool_size=current_app.config['SCRAPER_POOL_SIZE'],
+        priority_weights={
+            PRIORITY_INTERACTIVE: current_app.config['SCHEDULER_WEIGHT_INTERACTIVE'],
+            PRIORITY_BULK: current_app.config['SCHEDULER_WEIGHT_BULK']
+        },
+        admission_max_queue=current_app.config['ADMISSION_MAX_QUEUE'],
+        upstream_rate_limit=current_app.config['UPSTREAM_RATE_LIMIT'],
+        upstream_rate_burst=current_app.config['UPSTREAM_RATE_BURST'],
+        upstream_rate_state_path=current_app.config['UPSTREAM_RATE_STATE_PATH'],
+        upstream_rate_adaptive=current_app.config['UPSTREAM_RATE_ADAPTIVE'],
+        upstream_rate_min=current_app.config['UPSTREAM_RATE_MIN'],
+        upstream_latency_target=current_app.config['UPSTREAM_LATENCY_TARGET'],
+        captcha_telemetry_db_path=current_app.config['CAPTCHA_TELEMETRY_DB_PATH'],
+        captcha_telemetry_retention=current_app.config['CAPTCHA_TELEMETRY_RETENTION'],
+        stats_interval=current_app.config['STATUS_STATS_INTERVAL']
+    )
+
+
+def validate_lookup_params(plate, vin, strict_vin=False):
+    """
+    Check the plate and VIN of a single lookup request.
+    
+    Shared with the ASGI app, so both answer with the same messages.
+    
+    Args:
+        plate: Plate from the URL
+        vin: ``niv`` query parameter, or None
+        strict_vin: Whether to enforce the VIN check digit
+        
+    Returns:
+        Error message for a 400 response, or None if the request is valid
+    """
+    if not vin:
+        return "Parameter 'niv' (VIN) is required"
+    
+    plate_validation = validate_plate(plate)
+    if not plate_validation['valid']:
+        return f"Invalid plate format: {plate_validation['message']}"
+    
+    vin_validation = validate_vin(vin, strict=strict_vin)
+    if not vin_validation['valid']:
+        return f"Invalid VIN format: {vin_validation['message']}"
+    
+    return None
+
+
+def lookup_response_status(result, if_none_match=None, if_modified_since=None):
+    """
+    Status code and caching headers for a lookup result.
+    
+    Shared with the ASGI app. Found vehicles carry ``ETag`` and
+    ``Last-Modified`` and are answered with 304 when the client's copy
+    is current; cached results carry their ``Age``.
+    
+    Args:
+        result: Lookup result with ``_metadata``
+        if_none_match: Raw ``If-None-Match`` header, if any
+        if_modified_since: Raw ``If-Modified-Since`` header, if any
+        
+    Returns:
+        Tuple of (status code, list of (header, value) pairs); a 304
+        response has no body
+    """
+    status_code = 200 if result['codigo'] == 'ok' else 404
+    metadata = result.get('_metadata') or {}
+    headers = []
+    
+    if status_code == 200:
+        etag = metadata.get('etag') or result_etag(result)
+        last_modified = last_modified_time(metadata.get('scraped_at'))
+        headers.append(('ETag', quote_etag(etag)))
+        if last_modified is not None:
+            headers.append(('Last-Modified', http_date(last_modified)))
+        if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            # Unchanged since the client's copy; skip serializing the body
+            status_code = 304
+    
+    if 'age' in metadata:
+        headers.append(('Age', str(int(metadata['age']))))
+    
+    return status_code, headers
+
+
 @vehicular_routes.route('/tenencia/<string:plate>')
 def get_vehicular_tenencia(plate):
     """
@@ -43,59 +162,138 @@ def get_vehicular_tenencia(plate):
     Query Parameters:
         niv (str): Vehicle Identification Number (VIN)
         
+    Headers:
+        X-API-Key: Caller's API key (when keys are configured)
+        Cache-Control: ``no-cache`` forces a fresh lookup
+        X-Profile: ``1`` saves a cProfile of the lookup (with the admin
+            token in ``Authorization``); its name is returned in
+            ``X-Profile-Id``
+        If-None-Match: ETag of a previous response (weak comparison);
+            answered with 304 when the tax information has not changed
+        If-Modified-Since: Used instead of If-None-Match when that is
+            absent; answered with 304 when not scraped since
+        
     Returns:
-        JSON response with vehicle tax information
+        JSON response with vehicle tax information, or 429 with a
+        ``Retry-After`` header when too many lookups are already queued
     """
     try:
-        # Get VIN from query parameters
         vin = request.args.get('niv')
-        if not vin:
-            return jsonify({
-                "codigo": "error",
-                "info": None,
-                "error": {
-                    "mensaje": "Parameter 'niv' (VIN) is required"
-                }
-            }), 400
-        
-        # Validate input parameters
-        plate_validation = validate_plate(plate)
-        if not plate_validation['valid']:
-            return jsonify({
-                "codigo": "error",
-                "info": None,
-                "error": {
-                    "mensaje": f"Invalid plate format: {plate_validation['message']}"
-                }
-            }), 400
-            
-        vin_validation = validate_vin(vin)
-        if not vin_validation['valid']:
-            return jsonify({
-                "codigo": "error",
-                "info": None,
-                "error": {
-                    "mensaje": f"Invalid VIN format: {vin_validation['message']}"
-                }
-            }), 400
+        message = validate_lookup_params(plate, vin, strict_vin=current_app.config['VIN_STRICT_VALIDATION'])
+        if message is not None:
+            return jsonify(error_payload(message)), 400
         
         # Initialize scraper service if needed
         service = init_scraper_service()
         
-        # Scrape vehicle information
-        result = service.get_vehicle_info(plate, vin)
+        # Callers sending Cache-Control: no-cache always get fresh data
+        use_cache = not request.cache_control.no_cache
+        
+        # Scrape vehicle information, profiled when an admin asks or the lookup is sampled
+        profiler = init_request_profiler()
+        profile_name = None
+        if profiler is not None and profiler.should_profile(
+            request.headers.get(PROFILE_HEADER) == '1' and is_admin_request()
+        ):
+            result, profile_name = profiler.profile_call(
+                tracing.current_trace_id(), service.get_vehicle_info, plate, vin, use_cache=use_cache
+            )
+        else:
+            result = service.get_vehicle_info(plate, vin, use_cache=use_cache)
+        charge_scrape(init_api_quotas(), current_api_key(), result)
+        
+        status_code, headers = lookup_response_status(
+            result, request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')
+        )
+        response = Response(status=304) if status_code == 304 else jsonify(result)
+        response.status_code = status_code
+        response.headers.extend(headers)
+        if profile_name is not None:
+            response.headers['X-Profile-Id'] = profile_name
         
-        # Determine HTTP status code based on result
-        status_code = 200 if result['codigo'] == 'ok' else 404
+        return response
         
-        return jsonify(result), status_code
+    except ServiceOverloaded as e:
+        logger.warning("Refusing lookup for %s: %s", plate, e)
+        return jsonify(error_payload(OVERLOADED_MESSAGE)), 429, [('Retry-After', str(e.retry_after))]
         
     except Exception as e:
-        logger.error(f"Error in get_vehicular_tenencia: {str(e)}", exc_info=True)
-        return jsonify({
-            "codigo": "error",
-            "info": None,
-            "error": {
-                "mensaje": f"Internal server error: {str(e)}"
-            }
-        }), 500
\ No newline at end of file
+        logger.error("Error in get_vehicular_tenencia: %s", e, exc_info=True)
+        return jsonify(error_payload(f"Internal server error: {str(e)}")), 500
+
+
+@vehicular_routes.route('/tenencia/batch', methods=['POST'])
+def post_vehicular_tenencia_batch():
+    """
+    Look up many vehicles in parallel and stream the results.
+    
+    Request Body:
+        JSON object ``{"vehicles": [{"plate": ..., "niv": ...}, ...]}``
+        (a bare list of vehicles is also accepted)
+        
+    Headers:
+        X-API-Key: Caller's API key (when keys are configured)
+        Cache-Control: ``no-cache`` forces fresh lookups
+        
+    Returns:
+        NDJSON stream with one line per vehicle, in completion order:
+        ``{"index": i, "plate": ..., "niv": ..., "status": ..., "result": {...}}``
+    """
+    payload = request.get_json(silent=True)
+    vehicles = payload.get('vehicles') if isinstance(payload, dict) else payload
+    
+    if not isinstance(vehicles, list) or not vehicles:
+        return jsonify(error_payload("Request body must contain a non-empty 'vehicles' list")), 400
+    
+    max_vehicles = current_app.config['BATCH_MAX_VEHICLES']
+    if len(vehicles) > max_vehicles:
+        return jsonify(error_payload(f"A batch can contain at most {max_vehicles} vehicles")), 400
+    
+    service = init_scraper_service()
+    use_cache = not request.cache_control.no_cache
+    concurrency = max(1, min(current_app.config['BATCH_MAX_CONCURRENCY'], len(vehicles)))
+    quotas, key_name = init_api_quotas(), current_api_key()
+    strict_vin = current_app.config['VIN_STRICT_VALIDATION']
+    
+    def lookup(plate, vin):
+        result = service.get_vehicle_info(plate, vin, use_cache=use_cache, priority=PRIORITY_BULK)
+        charge_scrape(quotas, key_name, result)
+        return (200 if result['codigo'] == 'ok' else 404), result
+    
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch')
+        futures = {}
+        try:
+            for index, item in enumerate(vehicles):
+                validation = validate_vehicle_entry(item, strict_vin=strict_vin)
+                plate, vin = validation['plate'], validation['vin']
+                if not validation['valid']:
+                    yield _ndjson_line(index, plate, vin, 400, error_payload(validation['message']))
+                    continue
+                futures[executor.submit(lookup, plate, vin)] = (index, plate, vin)
+            
+            for future in as_completed(futures):
+                index, plate, vin = futures[future]
+                try:
+                    status_code, result = future.result()
+                except Exception as e:
+                    logger.error("Batch lookup failed for %s: %s", plate, e, exc_info=True)
+                    status_code, result = 500, error_payload(f"Internal server error: {str(e)}")
+                yield _ndjson_line(index, plate, vin, status_code, result)
+        finally:
+            # Stop queued lookups if the client goes away mid-stream
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    logger.info("Batch lookup of %s vehicles with concurrency %s", len(vehicles), concurrency)
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+def _ndjson_line(index, plate, vin, status_code, result):
+    """Serialize one batch result as an NDJSON line."""
+    return json.dumps({
+        "index": index,
+        "plate": plate,
+        "niv": vin,
+        "status": status_code,
+        "result": result
+    }) + "\n"
@@ -1,6 +1,24 @@
 """
 Service layer for the application.
 """
-from .scraper_service import ScraperService
+from .scraper_service import ScraperService, result_etag
+from .result_cache import ResultCache
+from .persistent_cache import SQLiteResultCache
+from .negative_cache import NegativeResultCache
+from .singleflight import SingleFlight, AsyncSingleFlight
+from .job_queue import JobQueue
+from .scheduler import PriorityScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from .admission import AdmissionController, ServiceOverloaded
+from .rate_limiter import UpstreamRateLimiter
+from .quotas import ApiKeyQuotas, QuotaExceeded
+from .async_scraper_service import AsyncScraperService
+from .upstream_probe import UpstreamProber
+from .captcha_telemetry import CaptchaTelemetry
+from .request_profiler import RequestProfiler
+from .periodic_snapshot import PeriodicSnapshot
 
-__all__ = ['ScraperService']
\ No newline at end of file
+__all__ = ['ScraperService', 'result_etag', 'ResultCache', 'SQLiteResultCache', 'NegativeResultCache',
+           'SingleFlight', 'AsyncSingleFlight', 'JobQueue', 'PriorityScheduler', 'PRIORITY_INTERACTIVE', 'PRIORITY_BULK', 'AdmissionController',
+           'ServiceOverloaded', 'UpstreamRateLimiter', 'ApiKeyQuotas', 'QuotaExceeded',
+           'AsyncScraperService', 'UpstreamProber', 'CaptchaTelemetry', 'RequestProfiler',
+           'PeriodicSnapshot']
@@ -0,0 +1,141 @@
+"""
+Admission control for the upstream scrape path.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceOverloaded(Exception):
+    """Raised when a lookup is refused because the wait queue is full."""
+
+    def __init__(self, retry_after, in_flight, queued):
+        super().__init__(f"Service overloaded: {in_flight} lookups in flight, {queued} queued")
+        self.retry_after = retry_after
+        self.in_flight = in_flight
+        self.queued = queued
+
+
+class _Admission:
+    """An admitted lookup, waiting until it occupies a slot."""
+
+    __slots__ = ('waiting',)
+
+    def __init__(self):
+        self.waiting = True
+
+
+class AdmissionController:
+    """
+    Bounded admission in front of the scraper slots.
+
+    At most ``capacity`` lookups hold a slot at once (the scheduler
+    enforces that); up to ``max_queue`` admitted lookups more may wait for
+    one. Any further lookup is refused immediately with a retry hint
+    derived from the measured service time, instead of tying up a worker
+    until it times out.
+
+    Interactive lookups pass ``admit`` before waiting for a slot; every
+    lookup, bulk ones included, holds its slot inside ``occupy``, so slots
+    taken by bulk work leave less room for the queue, and the service time
+    covers only the time a slot is held, not the wait for it.
+    """
+
+    def __init__(self, capacity, max_queue, initial_service_time=11.0, smoothing=0.2):
+        """
+        Initialize the controller.
+
+        Args:
+            capacity: Number of lookups that can run concurrently
+            max_queue: Number of lookups allowed to wait for a slot
+            initial_service_time: Service time estimate before any measurement
+            smoothing: Weight of each new measurement in the moving average
+        """
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.service_time = initial_service_time
+
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self):
+        """
+        Admit a lookup for the duration of a ``with`` block.
+
+        Yields:
+            Admission to pass to ``occupy`` once the lookup gets its slot
+
+        Raises:
+            ServiceOverloaded: If the wait queue is already full
+        """
+        with self._lock:
+            if self._running + self._waiting >= self.capacity + self.max_queue:
+                self.rejected += 1
+                raise ServiceOverloaded(self._retry_after(), self._running, self._waiting)
+            self._waiting += 1
+            self.admitted += 1
+
+        admission = _Admission()
+        try:
+            yield admission
+        finally:
+            with self._lock:
+                if admission.waiting:
+                    # Gave up before getting a slot
+                    admission.waiting = False
+                    self._waiting -= 1
+
+    @contextmanager
+    def occupy(self, admission=None):
+        """
+        Account for a lookup holding a slot for the duration of a ``with`` block.
+
+        Args:
+            admission: Value yielded by ``admit``, or None for bulk lookups,
+                which are not subject to admission
+        """
+        with self._lock:
+            if admission is not None and admission.waiting:
+                admission.waiting = False
+                self._waiting -= 1
+            self._running += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._running -= 1
+                self.service_time += self.smoothing * (elapsed - self.service_time)
+
+    def stats(self):
+        """
+        Get admission statistics.
+
+        Returns:
+            Dictionary with in-flight and queued counts and the service time estimate
+        """
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'max_queue': self.max_queue,
+                'in_flight': self._running,
+                'queued': self._waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'service_time': round(self.service_time, 2)
+            }
+
+    def _retry_after(self):
+        """Seconds until a slot is likely free for a new caller. Caller holds the lock."""
+        return max(1, math.ceil(self.service_time * (self._waiting + 1) / self.capacity))
@@ -0,0 +1,222 @@
+"""
+Asyncio service layer for the ASGI application.
+"""
+from async_scraper import AsyncPagaFacilScraper
+import tracing
+from .scraper_service import ScraperService
+from .singleflight import AsyncSingleFlight
+from .scheduler import PRIORITY_INTERACTIVE, PRIORITY_BULK
+from .admission import ServiceOverloaded
+from ..utils.responses import error_payload
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScraperService(ScraperService):
+    """
+    ScraperService for an asyncio event loop.
+
+    Uses the same caches, negative cache, rate limiter and metadata as
+    ScraperService, but lookups run on AsyncPagaFacilScraper, so a slow
+    upstream lookup holds a coroutine instead of a thread. Cache reads
+    and writes, which may touch SQLite, run in the default executor;
+    captcha OCR runs on a small dedicated thread pool.
+    """
+
+    def __init__(self, proxy_host=None, proxy_port=None, proxy_username=None, proxy_password=None,
+                 max_concurrency=200, ocr_workers=None, async_scraper=None, **kwargs):
+        """
+        Initialize the service.
+
+        Args:
+            proxy_host: Proxy server hostname (optional)
+            proxy_port: Proxy server port (optional)
+            proxy_username: Proxy authentication username (optional)
+            proxy_password: Proxy authentication password (optional)
+            max_concurrency: Maximum number of concurrent upstream lookups
+            ocr_workers: Threads for captcha OCR (defaults to the CPU count)
+            async_scraper: Scraper with an async ``get_vehicle_info``
+                (defaults to an AsyncPagaFacilScraper with the settings above)
+            **kwargs: Remaining ScraperService settings (caches, rate limit,
+                admission queue); the pool settings are not used
+        """
+        # Read by _init_workers, which runs inside ScraperService.__init__
+        self.max_concurrency = max_concurrency
+        super().__init__(proxy_host=proxy_host, proxy_port=proxy_port, proxy_username=proxy_username,
+                         proxy_password=proxy_password, **kwargs)
+
+        self._ocr_executor = ThreadPoolExecutor(max_workers=ocr_workers, thread_name_prefix='ocr')
+        if async_scraper is None:
+            async_scraper = AsyncPagaFacilScraper(
+                proxy_host=proxy_host,
+                proxy_port=proxy_port,
+                proxy_username=proxy_username,
+                proxy_password=proxy_password,
+                rate_limiter=self.rate_limiter,
+                ocr_executor=self._ocr_executor,
+                max_attempts=self.config['max_retry_attempts'],
+                captcha_attempts=self.config['captcha_max_attempts'],
+                timeout=self.config['request_timeout'],
+                captcha_telemetry=self.captcha_telemetry,
+                base_url=self.config['base_url'],
+                form_url=self.config['form_url']
+            )
+        self.scraper = async_scraper
+        self.inflight = AsyncSingleFlight()
+
+    def _init_workers(self, scraper_factory, pool_size, priority_weights, refresh_workers):
+        """
+        Bound concurrent lookups with a semaphore instead of a scraper pool.
+
+        Refreshes run as tasks on the event loop, so no threads are started.
+
+        Returns:
+            Maximum number of concurrent upstream lookups
+        """
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._active = 0
+        self._refresh_tasks = set()
+        return self.max_concurrency
+
+    async def get_vehicle_info_async(self, plate, vin, use_cache=True):
+        """
+        Get vehicle tax information without blocking the event loop.
+
+        Same caching, coalescing and error behaviour as
+        ``ScraperService.get_vehicle_info`` for an interactive lookup.
+
+        Args:
+            plate: License plate number
+            vin: Vehicle Identification Number
+            use_cache: Whether a cached result may be returned
+
+        Returns:
+            Dictionary containing vehicle information and taxes
+
+        Raises:
+            ServiceOverloaded: If a scrape is needed and the admission queue is full
+        """
+        with tracing.span('service_lookup'):
+            try:
+                logger.info("AsyncScraperService: Getting vehicle info for plate=%s, vin=%s", plate, vin)
+
+                plate = self._clean_plate(plate)
+                vin = self._clean_vin(vin)
+                key = (plate, vin)
+
+                if use_cache:
+                    cached = await asyncio.to_thread(self._get_cached, key)
+                    if cached is not None:
+                        self._mark_age(key, cached)
+                        logger.info("AsyncScraperService: Cache %s for plate=%s, vin=%s", cached['_metadata']['cache'], plate, vin)
+                        tracing.annotate(cache=cached['_metadata']['cache'])
+                        return cached
+
+                result, shared = await self.inflight.do(key, lambda: self._fetch_async(key, PRIORITY_INTERACTIVE))
+                if shared:
+                    result['_metadata']['cache'] = 'coalesced'
+                elif not use_cache:
+                    result['_metadata']['cache'] = 'bypass'
+
+                logger.info("AsyncScraperService: Result code=%s", result['codigo'])
+                tracing.annotate(cache=result['_metadata']['cache'])
+                return result
+
+            except ServiceOverloaded:
+                raise
+            except Exception as e:
+                logger.error("AsyncScraperService error: %s", e, exc_info=True)
+                return error_payload(f"Service error: {str(e)}")
+
+    async def _fetch_async(self, key, priority):
+        """
+        Scrape a vehicle upstream and update the caches.
+
+        Args:
+            key: Normalized (plate, vin) tuple
+            priority: ``'interactive'`` lookups pass admission control
+
+        Returns:
+            Scraper result with service metadata
+        """
+        plate, vin = key
+
+        if priority == PRIORITY_INTERACTIVE:
+            with self.admission.admit() as admission:
+                result, scrape_seconds = await self._scrape_async(plate, vin, admission)
+        else:
+            result, scrape_seconds = await self._scrape_async(plate, vin)
+
+        return await asyncio.to_thread(self._finish, key, result, scrape_seconds)
+
+    async def _scrape_async(self, plate, vin, admission=None):
+        """
+        Run one upstream lookup once a concurrency slot is free.
+
+        Args:
+            plate: Normalized plate
+            vin: Normalized VIN
+            admission: Admission of an interactive lookup, if any
+
+        Returns:
+            Tuple of (scraper result, seconds the lookup held its slot)
+        """
+        requested = time.monotonic()
+        async with self._slots:
+            self._active += 1
+            started = time.monotonic()
+            try:
+                with self.admission.occupy(admission), \
+                        tracing.span('scrape', slot_wait_seconds=round(started - requested, 3)):
+                    result = await self.scraper.get_vehicle_info(plate, vin)
+                return result, time.monotonic() - started
+            finally:
+                self._active -= 1
+
+    def _schedule_refresh(self, key):
+        """Start a background refresh task unless one is already pending."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        task = asyncio.get_running_loop().create_task(self._refresh_async(key))
+        # The loop only keeps weak references to tasks
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh_async(self, key):
+        """Re-scrape a stale key; failures keep the stale entry until its hard TTL."""
+        try:
+            logger.info("AsyncScraperService: Refreshing stale result for plate=%s, vin=%s", key[0], key[1])
+            await self.inflight.do(key, lambda: self._fetch_async(key, PRIORITY_BULK))
+        except Exception as e:
+            logger.warning("Background refresh failed for %s: %s", key, e)
+        finally:
+            self._refreshing.discard(key)
+
+    def runtime_stats(self):
+        """
+        Get concurrency and lookup statistics for status reporting.
+
+        Returns:
+            Dictionary with coalescing, concurrency, admission and recent
+            lookup outcome counters
+        """
+        return {
+            'inflight': self.inflight.stats(),
+            'concurrency': {
+                'limit': self.max_concurrency,
+                'active': self._active
+            },
+            'admission': self.admission.stats(),
+            'lookups': self.lookup_stats()
+        }
+
+    def close(self):
+        """Stop the OCR threads and the status statistics refresh."""
+        self._ocr_executor.shutdown(wait=False, cancel_futures=True)
+        self._shared_stats.stop()
@@ -0,0 +1,189 @@
+"""
+Captcha solver telemetry shared by all workers on a node.
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class CaptchaTelemetry:
+    """
+    Record every captcha solve and whether pagafacil accepted the answer.
+
+    One row per solve holds its duration, the number of Tesseract calls it
+    made and the preprocessing variant and OCR config that produced the
+    answer; the row is updated once the answer has been submitted. Rows
+    live in SQLite (WAL mode, one connection per thread) so any worker can
+    summarize the solves of all of them over a time window. Rows older than
+    ``retention`` seconds are deleted every ``prune_interval`` seconds.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS captcha_solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            solved_at REAL NOT NULL,
+            seconds REAL NOT NULL,
+            tesseract_calls INTEGER NOT NULL,
+            solved INTEGER NOT NULL,
+            variant TEXT,
+            config TEXT,
+            accepted INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_captcha_solves_solved_at ON captcha_solves (solved_at);
+    """
+
+    def __init__(self, db_path, retention=7 * 86400, prune_interval=3600):
+        """
+        Initialize the store and create the schema if needed.
+
+        Args:
+            db_path: Path to the SQLite database file
+            retention: Seconds solves are kept for
+            prune_interval: Minimum seconds between deletions of old solves
+        """
+        self.db_path = db_path
+        self.retention = retention
+        self.prune_interval = prune_interval
+
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+
+    def record_solve(self, solve):
+        """
+        Store one captcha solve.
+
+        Args:
+            solve: Solve details from ``CaptchaSolver.solve_image_details``
+
+        Returns:
+            Row id to pass to ``record_submission``, or None if it could not be stored
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO captcha_solves (solved_at, seconds, tesseract_calls, solved, variant, config) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (now, solve['seconds'], solve['tesseract_calls'], solve['text'] is not None,
+                     solve['variant'], solve['config'])
+                )
+                if now - self._last_prune >= self.prune_interval:
+                    self._last_prune = now
+                    conn.execute("DELETE FROM captcha_solves WHERE solved_at < ?", (now - self.retention,))
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            # Telemetry must never fail a lookup
+            logger.warning("Could not record captcha solve: %s", e)
+            return None
+
+    def record_submission(self, solve_id, accepted):
+        """
+        Store whether pagafacil accepted the answer of a solve.
+
+        Args:
+            solve_id: Row id returned by ``record_solve``
+            accepted: False if the site rejected the captcha
+        """
+        if solve_id is None:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("UPDATE captcha_solves SET accepted = ? WHERE id = ?", (accepted, solve_id))
+        except sqlite3.Error as e:
+            logger.warning("Could not record captcha submission: %s", e)
+
+    def summary(self, window=3600):
+        """
+        Summarize the solves of all workers over a time window.
+
+        Args:
+            window: Seconds back from now to cover
+
+        Returns:
+            Dictionary with solve counts and rate, solve time and Tesseract
+            call distribution, the server-side accept rate, and submissions
+            and accept rate per (variant, config) that produced the answer
+        """
+        since = time.time() - window
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT seconds, tesseract_calls, solved, accepted FROM captcha_solves WHERE solved_at >= ?",
+            (since,)
+        ).fetchall()
+        answers = conn.execute(
+            "SELECT variant, config, COUNT(*), SUM(accepted) FROM captcha_solves "
+            "WHERE solved_at >= ? AND accepted IS NOT NULL "
+            "GROUP BY variant, config ORDER BY COUNT(*) DESC",
+            (since,)
+        ).fetchall()
+
+        seconds = sorted(row[0] for row in rows)
+        calls = sorted(row[1] for row in rows)
+        solved = sum(row[2] for row in rows)
+        submitted = [row[3] for row in rows if row[3] is not None]
+        accepted = sum(submitted)
+
+        return {
+            'window_seconds': window,
+            'since': since,
+            'solves': len(rows),
+            'solved': solved,
+            'solve_rate': round(solved / len(rows), 4) if rows else None,
+            'solve_seconds': {
+                'mean': round(sum(seconds) / len(seconds), 3) if seconds else None,
+                'p50': _percentile(seconds, 0.5),
+                'p95': _percentile(seconds, 0.95),
+                'max': seconds[-1] if seconds else None
+            },
+            'tesseract_calls': {
+                'total': sum(calls),
+                'mean': round(sum(calls) / len(calls), 2) if calls else None,
+                'p95': _percentile(calls, 0.95)
+            },
+            'submitted': len(submitted),
+            'accepted': accepted,
+            'accept_rate': round(accepted / len(submitted), 4) if submitted else None,
+            'answers': [
+                {
+                    'variant': variant,
+                    'config': config,
+                    'submitted': count,
+                    'accepted': accepted_count,
+                    'accept_rate': round(accepted_count / count, 4)
+                }
+                for variant, config, count, accepted_count in answers
+            ]
+        }
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
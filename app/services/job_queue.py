@@ -0,0 +1,292 @@
+"""
+Durable job queue for asynchronous vehicle lookups.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of lookup jobs.
+
+    A job is a list of vehicles; each vehicle is a separate item, so
+    several worker processes can work on one job at the same time.
+    Items are claimed atomically and carry a lease: an item whose worker
+    died is handed out again once its lease has expired. A failed lookup
+    can be requeued with ``retry`` until the item has used up its attempts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS job_items (
+            job_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            plate TEXT NOT NULL,
+            vin TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            worker TEXT,
+            claimed_at REAL,
+            finished_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            retry_at REAL,
+            PRIMARY KEY (job_id, idx)
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items (status, claimed_at);
+        CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at);
+    """
+
+    def __init__(self, db_path, lease_seconds=300):
+        """
+        Initialize the queue and create the schema if needed.
+
+        Args:
+            db_path: Path to the SQLite database file
+            lease_seconds: Seconds before an unfinished claimed item is requeued
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(job_items)")}
+        # Queues created before retries were added
+        if 'attempts' not in columns:
+            conn.execute("ALTER TABLE job_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if 'retry_at' not in columns:
+            conn.execute("ALTER TABLE job_items ADD COLUMN retry_at REAL")
+        conn.commit()
+
+    def submit(self, vehicles):
+        """
+        Enqueue a new job.
+
+        Args:
+            vehicles: List of (plate, vin) tuples
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO jobs (id, status, total, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, len(vehicles), now)
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, idx, plate, vin, status) VALUES (?, ?, ?, ?, 'queued')",
+                [(job_id, idx, plate, vin) for idx, (plate, vin) in enumerate(vehicles)]
+            )
+        logger.info("Queued job %s with %s vehicles", job_id, len(vehicles))
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a job with its progress and finished results.
+
+        Args:
+            job_id: Job id returned by ``submit``
+
+        Returns:
+            Dictionary describing the job, or None if it does not exist
+        """
+        conn = self._connect()
+        job = conn.execute(
+            "SELECT id, status, total, completed, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if job is None:
+            return None
+
+        items = conn.execute(
+            "SELECT idx, plate, vin, status, result FROM job_items WHERE job_id = ? ORDER BY idx",
+            (job_id,)
+        ).fetchall()
+
+        job_id, status, total, completed, created_at, started_at, finished_at = job
+        return {
+            'job_id': job_id,
+            'status': status,
+            'total': total,
+            'completed': completed,
+            'progress': round(completed / total, 4) if total else 1.0,
+            'created_at': created_at,
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'results': [
+                {
+                    'index': idx,
+                    'plate': plate,
+                    'niv': vin,
+                    'status': item_status,
+                    'result': json.loads(result) if result else None
+                }
+                for idx, plate, vin, item_status, result in items
+            ]
+        }
+
+    def claim(self, worker_id):
+        """
+        Claim the next queued item, or an item whose lease has expired.
+
+        Items requeued by ``retry`` are skipped until their retry time.
+        Every claim counts as an attempt.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            Tuple of (job_id, idx, plate, vin), or None if nothing is queued
+        """
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers
+            # can never select the same item
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job_id, idx, plate, vin FROM job_items "
+                "WHERE (status = 'queued' AND COALESCE(retry_at, 0) <= ?) "
+                "OR (status = 'running' AND claimed_at < ?) "
+                "ORDER BY rowid LIMIT 1",
+                (now, now - self.lease_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, idx, plate, vin = row
+            conn.execute(
+                "UPDATE job_items SET status = 'running', worker = ?, claimed_at = ?, "
+                "attempts = attempts + 1 WHERE job_id = ? AND idx = ?",
+                (worker_id, now, job_id, idx)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+                "WHERE id = ? AND status = 'queued'",
+                (now, job_id)
+            )
+        return row
+
+    def complete(self, job_id, idx, result):
+        """
+        Store an item's result and update its job's progress.
+
+        Args:
+            job_id: Job id
+            idx: Item index within the job
+            result: Lookup result dictionary
+        """
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE job_items SET status = 'done', result = ?, finished_at = ? "
+                "WHERE job_id = ? AND idx = ? AND status != 'done'",
+                (json.dumps(result), now, job_id, idx)
+            )
+            if cursor.rowcount:
+                conn.execute(
+                    "UPDATE jobs SET completed = completed + 1, "
+                    "status = CASE WHEN completed + 1 >= total THEN 'done' ELSE status END, "
+                    "finished_at = CASE WHEN completed + 1 >= total THEN ? ELSE finished_at END "
+                    "WHERE id = ?",
+                    (now, job_id)
+                )
+
+    def retry(self, job_id, idx, result, max_attempts, delay=0.0):
+        """
+        Requeue a failed item, or complete it with its error once it has
+        used up its attempts.
+
+        Args:
+            job_id: Job id
+            idx: Item index within the job
+            result: Error result of the failed lookup
+            max_attempts: Attempts allowed per item, counting the first
+            delay: Seconds before the item may be claimed again
+
+        Returns:
+            True if the item was requeued, False if it was completed
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE job_items SET status = 'queued', worker = NULL, claimed_at = NULL, retry_at = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'running' AND attempts < ?",
+                (time.time() + delay, job_id, idx, max_attempts)
+            )
+        if cursor.rowcount:
+            return True
+        self.complete(job_id, idx, result)
+        return False
+
+    def prune(self, retention_seconds):
+        """
+        Delete finished jobs older than the retention period.
+
+        Args:
+            retention_seconds: Seconds to keep finished jobs
+
+        Returns:
+            Number of jobs removed
+        """
+        cutoff = time.time() - retention_seconds
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM job_items WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status = 'done' AND finished_at < ?)",
+                (cutoff,)
+            )
+            cursor = conn.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        Get queue statistics.
+
+        Returns:
+            Dictionary with item counts per status
+        """
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM job_items GROUP BY status").fetchall()
+        counts = {'queued': 0, 'running': 0, 'done': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Autocommit mode; transactions are opened explicitly with BEGIN
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
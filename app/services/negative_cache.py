@@ -0,0 +1,205 @@
+"""
+Negative-result cache for plate/VIN pairs that pagafacil does not know.
+"""
+import fcntl
+import glob
+import hashlib
+import math
+import mmap
+import os
+import threading
+import time
+import logging
+
+from .persistent_cache import SQLiteResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter stored in a memory-mapped file.
+
+    Every process that maps the same file sees the same bits, so one
+    worker's additions are visible to the others without any I/O.
+    Additions take an exclusive file lock; lookups are lock-free.
+    """
+
+    def __init__(self, path, capacity=100000, error_rate=0.01):
+        """
+        Open or create the filter file.
+
+        Args:
+            path: Path of the backing file
+            capacity: Expected number of keys
+            error_rate: Target false-positive rate at capacity
+        """
+        self.path = path
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+
+        size = (self.num_bits + 7) // 8
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def add(self, key):
+        """Add a key to the filter."""
+        with open(self.path, 'rb') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            for position in self._positions(key):
+                index = position >> 3
+                self._mmap[index] = self._mmap[index] | (1 << (position & 7))
+
+    def __contains__(self, key):
+        return all(self._mmap[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key):
+        """Bit positions for a key, using double hashing over one digest."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+
+class NegativeResultCache:
+    """
+    Short-lived cache of "no record found" results.
+
+    Entries live in their own SQLite table with exact expiry times. In
+    front of it sits a Bloom filter shared by all workers: a key that is
+    not in the filter cannot be a known-bad pair, so the common case is
+    answered without touching the database. Filters rotate every
+    ``ttl`` seconds and the current and previous generations are
+    checked, which keeps them from filling up with expired keys.
+    """
+
+    def __init__(self, db_path, ttl=300, capacity=100000, error_rate=0.01):
+        """
+        Initialize the negative cache.
+
+        Args:
+            db_path: SQLite database file (shared with the result cache)
+            ttl: Time-to-live for negative entries in seconds
+            capacity: Expected number of bad pairs per TTL window
+            error_rate: Bloom filter false-positive rate at capacity
+        """
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.store = SQLiteResultCache(db_path, ttl=ttl, prune_interval=ttl, table='negative_results')
+
+        self._bloom_prefix = f"{db_path}.negative-bloom"
+        self._blooms = {}
+        # Guards the filter table and the counters
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.bloom_rejections = 0
+
+    def get(self, key):
+        """
+        Get the cached not-found result for a pair.
+
+        Args:
+            key: Normalized (plate, vin) tuple
+
+        Returns:
+            The cached error result, or None if the pair is not known bad
+        """
+        bloom_key = self._bloom_key(key)
+        generation = self._generation()
+        filters = [self._bloom(g, create=False) for g in (generation, generation - 1)]
+        if not any(f is not None and bloom_key in f for f in filters):
+            with self._lock:
+                self.bloom_rejections += 1
+            return None
+
+        # Bloom filters give false positives, so confirm with the stored entry
+        result = self.store.get(key)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+        return result
+
+    def set(self, key, result):
+        """
+        Record a not-found result for a pair.
+
+        Args:
+            key: Normalized (plate, vin) tuple
+            result: Error result returned by the scraper
+        """
+        self.store.set(key, result)
+        self._bloom(self._generation(), create=True).add(self._bloom_key(key))
+
+    def invalidate(self, key):
+        """Forget a pair, e.g. after it was found upstream."""
+        self.store.invalidate(key)
+
+    def stats(self):
+        """
+        Get negative cache statistics.
+
+        Returns:
+            Dictionary with entry count and this worker's counters
+        """
+        store_stats = self.store.stats()
+        with self._lock:
+            hits, bloom_rejections = self.hits, self.bloom_rejections
+        return {
+            'entries': store_stats['entries'],
+            'ttl': self.ttl,
+            'hits': hits,
+            'bloom_rejections': bloom_rejections,
+            'db_lookups': store_stats['hits'] + store_stats['misses']
+        }
+
+    def _generation(self):
+        return int(time.time() // self.ttl)
+
+    def _bloom_key(self, key):
+        return '|'.join(key)
+
+    def _bloom(self, generation, create):
+        """
+        Get the filter for a generation.
+
+        Args:
+            generation: Filter generation number
+            create: Whether to create the file if it does not exist
+
+        Returns:
+            BloomFilter, or None if it does not exist and ``create`` is False
+        """
+        bloom = self._blooms.get(generation)
+        if bloom is not None:
+            return bloom
+
+        path = f"{self._bloom_prefix}-{generation}"
+        if not create and not os.path.exists(path):
+            return None
+
+        with self._lock:
+            bloom = self._blooms.get(generation)
+            if bloom is None:
+                bloom = BloomFilter(path, capacity=self.capacity, error_rate=self.error_rate)
+                self._blooms[generation] = bloom
+                self._drop_old_generations(generation)
+        return bloom
+
+    def _drop_old_generations(self, generation):
+        """Forget and delete filters older than the previous generation. Caller holds the lock."""
+        for old in [g for g in self._blooms if g < generation - 1]:
+            del self._blooms[old]
+
+        for path in glob.glob(f"{self._bloom_prefix}-*"):
+            try:
+                if int(path.rsplit('-', 1)[1]) < generation - 1:
+                    os.remove(path)
+            except (ValueError, OSError):
+                continue
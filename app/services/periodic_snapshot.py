@@ -0,0 +1,69 @@
+"""
+Values recomputed in the background for constant-time status reads.
+"""
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicSnapshot:
+    """
+    Cache the result of an expensive callable and refresh it in a daemon thread.
+
+    The first ``get`` computes the value and starts the refresh thread, so
+    processes that never read the snapshot (job workers, CLIs) run nothing
+    in the background. Later reads return the last value without calling
+    ``compute``.
+    """
+
+    def __init__(self, compute, interval=15, name='periodic-snapshot'):
+        """
+        Initialize the snapshot.
+
+        Args:
+            compute: Zero-argument callable producing the value
+            interval: Seconds between refreshes (0 computes on every read)
+            name: Name of the refresh thread
+        """
+        self.compute = compute
+        self.interval = interval
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._value = None
+
+    def get(self):
+        """
+        Get the latest value.
+
+        Returns:
+            Value of the last successful ``compute``, or None if none has succeeded
+        """
+        if self.interval <= 0:
+            return self._refresh()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._refresh()
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+        return self._value
+
+    def stop(self):
+        """Stop the refresh thread after its current refresh."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            self._value = self.compute()
+        except Exception as e:
+            # Keep serving the previous value
+            logger.warning("Could not refresh %s: %s", self.name, e)
+        return self._value
@@ -0,0 +1,209 @@
+"""
+Disk-backed result cache shared by all workers on a node.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteResultCache:
+    """
+    Persistent TTL cache for scraper results stored in SQLite.
+
+    The database runs in WAL mode so readers in every gunicorn worker
+    proceed while another worker writes. Each thread gets its own
+    connection, and a daemon thread per process deletes expired rows
+    every ``prune_interval`` seconds.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            plate TEXT NOT NULL,
+            vin TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (plate, vin)
+        );
+        CREATE INDEX IF NOT EXISTS idx_{table}_expires_at ON {table} (expires_at);
+    """
+
+    def __init__(self, db_path, ttl=900, prune_interval=300, table='results'):
+        """
+        Initialize the cache and create the schema if needed.
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl: Default time-to-live for entries in seconds
+            prune_interval: Seconds between background pruning runs
+            table: Table holding this cache's entries
+        """
+        self.db_path = db_path
+        self.table = table
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+
+        self._local = threading.local()
+        self._pruner_lock = threading.Lock()
+        self._pruner_pid = None
+
+        # Lookups run on pool, batch, refresh and worker threads at once
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(self.SCHEMA.format(table=self.table))
+        conn.commit()
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+            key: (plate, vin) tuple
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key):
+        """
+        Get a cached value with its timestamps.
+
+        Args:
+            key: (plate, vin) tuple
+
+        Returns:
+            Tuple of (value, stored_at, expires_at), or None on a miss
+        """
+        self._ensure_pruner()
+        plate, vin = key
+        row = self._connect().execute(
+            f"SELECT payload, stored_at, expires_at FROM {self.table} "
+            "WHERE plate = ? AND vin = ? AND expires_at > ?",
+            (plate, vin, time.time())
+        ).fetchone()
+
+        if row is None:
+            with self._counter_lock:
+                self.misses += 1
+            return None
+
+        with self._counter_lock:
+            self.hits += 1
+        payload, stored_at, expires_at = row
+        return json.loads(payload), stored_at, expires_at
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value in the cache.
+
+        Args:
+            key: (plate, vin) tuple
+            value: JSON-serializable value
+            ttl: Time-to-live in seconds (defaults to the cache TTL)
+        """
+        self._ensure_pruner()
+        plate, vin = key
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (plate, vin, payload, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (plate, vin, payload, now, expires_at)
+            )
+
+    def invalidate(self, key):
+        """Remove a single entry from the cache."""
+        plate, vin = key
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE plate = ? AND vin = ?", (plate, vin))
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def prune(self):
+        """
+        Delete expired entries.
+
+        Returns:
+            Number of rows removed
+        """
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size and this worker's hit/miss counters
+        """
+        entries = self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'db_path': self.db_path,
+            'entries': entries,
+            'ttl': self.ttl,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_pruner(self):
+        """Start the pruning thread in this process if it is not running."""
+        if self._pruner_pid == os.getpid() or self.prune_interval <= 0:
+            return
+
+        with self._pruner_lock:
+            if self._pruner_pid == os.getpid():
+                return
+            thread = threading.Thread(target=self._prune_loop, name='result-cache-pruner', daemon=True)
+            thread.start()
+            self._pruner_pid = os.getpid()
+
+    def _prune_loop(self):
+        """Periodically delete expired entries."""
+        while True:
+            time.sleep(self.prune_interval)
+            try:
+                removed = self.prune()
+                if removed:
+                    logger.info("Pruned %s expired rows from %s", removed, self.table)
+            except sqlite3.Error as e:
+                logger.warning("Result cache pruning failed: %s", e)
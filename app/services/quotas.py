@@ -0,0 +1,213 @@
+"""
+API keys with per-key request-rate and concurrency quotas.
+"""
+import hashlib
+import math
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    """Raised when a key is over its request-rate or concurrency quota."""
+
+    def __init__(self, name, reason, retry_after):
+        super().__init__(f"API key '{name}' over its {reason} quota")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _KeyState:
+    """Quota and usage counters for one API key."""
+
+    def __init__(self, name, rate_per_minute, burst, max_concurrent):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self.max_concurrent = max_concurrent
+
+        self.lock = threading.Lock()
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.active = 0
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.concurrency_limited = 0
+        self.scrapes = 0
+        self.scrape_seconds = 0.0
+
+
+class ApiKeyQuotas:
+    """
+    In-memory registry of API keys and their quotas.
+
+    Each key has a token bucket for its request rate and a cap on
+    concurrent requests, so one team's loop cannot take every scraper
+    session. Checks take one per-key lock and no I/O. Counters are per
+    process; with several gunicorn workers each enforces its own share.
+    """
+
+    def __init__(self, keys, rate_per_minute=60, burst=10, max_concurrent=4):
+        """
+        Initialize the registry.
+
+        Args:
+            keys: Mapping of key name to either the secret or a dict with
+                ``key`` and optional ``rate_per_minute``, ``burst`` and
+                ``max_concurrent`` overrides
+            rate_per_minute: Default requests per minute per key
+            burst: Default requests a key may send back to back
+            max_concurrent: Default concurrent requests per key
+        """
+        self._by_digest = {}
+        self._states = {}
+        for name, spec in keys.items():
+            if not isinstance(spec, dict):
+                spec = {'key': spec}
+            state = _KeyState(
+                name,
+                spec.get('rate_per_minute', rate_per_minute),
+                spec.get('burst', burst),
+                spec.get('max_concurrent', max_concurrent)
+            )
+            self._states[name] = state
+            self._by_digest[self._digest(spec['key'])] = state
+
+    @classmethod
+    def from_config(cls, value, rate_per_minute=60, burst=10, max_concurrent=4):
+        """
+        Build the registry from the ``API_KEYS`` setting.
+
+        The setting is a comma-separated list of ``name:key`` entries; an
+        entry may add its own limits as ``name:key:rate_per_minute:max_concurrent``.
+
+        Args:
+            value: The ``API_KEYS`` string
+            rate_per_minute: Default requests per minute per key
+            burst: Default requests a key may send back to back
+            max_concurrent: Default concurrent requests per key
+
+        Returns:
+            ApiKeyQuotas instance, or None if no keys are configured
+        """
+        keys = {}
+        for entry in (value or '').split(','):
+            parts = [part.strip() for part in entry.split(':')]
+            if len(parts) < 2 or not parts[0] or not parts[1]:
+                continue
+            spec = {'key': parts[1]}
+            if len(parts) > 2 and parts[2]:
+                spec['rate_per_minute'] = float(parts[2])
+            if len(parts) > 3 and parts[3]:
+                spec['max_concurrent'] = int(parts[3])
+            keys[parts[0]] = spec
+
+        if not keys:
+            return None
+        return cls(keys, rate_per_minute=rate_per_minute, burst=burst, max_concurrent=max_concurrent)
+
+    def authenticate(self, key):
+        """
+        Look up the name of an API key.
+
+        Args:
+            key: Key sent by the client
+
+        Returns:
+            Key name, or None if the key is unknown
+        """
+        if not key:
+            return None
+        state = self._by_digest.get(self._digest(key))
+        return state.name if state is not None else None
+
+    def acquire(self, name):
+        """
+        Count a request against a key's quotas.
+
+        Every successful call must be paired with ``release``.
+
+        Args:
+            name: Key name returned by ``authenticate``
+
+        Raises:
+            QuotaExceeded: If the key is over its rate or concurrency quota
+        """
+        state = self._states[name]
+        with state.lock:
+            now = time.monotonic()
+            state.tokens = min(state.burst, state.tokens + (now - state.updated_at) * state.rate)
+            state.updated_at = now
+
+            if state.tokens < 1.0:
+                state.rate_limited += 1
+                retry_after = max(1, math.ceil((1.0 - state.tokens) / state.rate)) if state.rate else 60
+                raise QuotaExceeded(name, 'rate', retry_after)
+            if state.active >= state.max_concurrent:
+                state.concurrency_limited += 1
+                raise QuotaExceeded(name, 'concurrency', 1)
+
+            state.tokens -= 1.0
+            state.active += 1
+            state.requests += 1
+
+    def release(self, name):
+        """Mark a request of a key as finished."""
+        state = self._states[name]
+        with state.lock:
+            state.active -= 1
+
+    @contextmanager
+    def request(self, name):
+        """Hold a key's quota for the duration of a ``with`` block."""
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def record_scrape(self, name, seconds):
+        """
+        Charge upstream scrape time to a key.
+
+        Args:
+            name: Key name
+            seconds: Seconds a scraper session was busy for the key
+        """
+        state = self._states[name]
+        with state.lock:
+            state.scrapes += 1
+            state.scrape_seconds += seconds
+
+    def usage(self):
+        """
+        Get quotas and usage counters for every key.
+
+        Returns:
+            Dictionary keyed by key name
+        """
+        usage = {}
+        for name, state in self._states.items():
+            with state.lock:
+                usage[name] = {
+                    'rate_per_minute': round(state.rate * 60, 2),
+                    'max_concurrent': state.max_concurrent,
+                    'active': state.active,
+                    'requests': state.requests,
+                    'rate_limited': state.rate_limited,
+                    'concurrency_limited': state.concurrency_limited,
+                    'scrapes': state.scrapes,
+                    'scrape_seconds': round(state.scrape_seconds, 3)
+                }
+        return usage
+
+    @staticmethod
+    def _digest(key):
+        # Keys are looked up by digest so the dictionary probe does not
+        # compare secrets character by character
+        return hashlib.sha256(key.encode('utf-8')).digest()
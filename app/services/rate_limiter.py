@@ -0,0 +1,216 @@
+"""
+Outbound rate limiting for requests to pagafacil.gob.mx.
+"""
+import asyncio
+import fcntl
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamRateLimiter:
+    """
+    Token bucket whose state lives in a small file shared by all processes.
+
+    Every outbound request takes one token; tokens refill at ``rate`` per
+    second up to ``burst``. The bucket is read and updated under an
+    exclusive file lock, so all gunicorn workers, job workers and fleet
+    imports on a host draw from the same budget.
+
+    In adaptive mode the rate follows upstream latency (AIMD): while the
+    smoothed latency stays under ``latency_target`` the rate creeps back
+    up towards its configured maximum, and when it rises above the target
+    or upstream answers 429/503 the rate is halved, at most once per
+    ``cooldown`` seconds.
+    """
+
+    # tokens, updated_at, rate, latency_ewma, last_decrease
+    STATE = struct.Struct('5d')
+
+    def __init__(self, path, rate, burst=5, adaptive=False, min_rate=0.2, latency_target=3.0,
+                 increase_step=0.05, decrease_factor=0.5, cooldown=10.0, smoothing=0.2):
+        """
+        Initialize the limiter, creating the state file if needed.
+
+        Args:
+            path: Path of the shared state file
+            rate: Maximum requests per second
+            burst: Bucket size, i.e. requests allowed back to back
+            adaptive: Whether to adjust the rate to upstream latency
+            min_rate: Lowest rate adaptive mode may back off to
+            latency_target: Smoothed latency in seconds above which to back off
+            increase_step: Requests per second added after each healthy response
+            decrease_factor: Multiplier applied to the rate when backing off
+            cooldown: Minimum seconds between two back-offs
+            smoothing: Weight of each new latency sample in the moving average
+        """
+        self.path = path
+        self.max_rate = float(rate)
+        self.burst = float(burst)
+        self.adaptive = adaptive
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+
+        self._counter_lock = threading.Lock()
+        self.acquired = 0
+        self.total_wait = 0.0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o644))
+
+        with self._locked() as f:
+            if os.fstat(f.fileno()).st_size < self.STATE.size:
+                self._write(f, (self.burst, time.time(), self.max_rate, 0.0, 0.0))
+
+    def acquire(self):
+        """
+        Block until a token is available and take it.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        delay = self._take()
+        while delay:
+            time.sleep(delay)
+            waited += delay
+            delay = self._take()
+        self._record_wait(waited)
+        return waited
+
+    async def acquire_async(self):
+        """
+        Wait without blocking the event loop until a token is available.
+
+        The locked state file is read and written in a worker thread, so
+        a contended lock stalls that thread rather than the loop.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        delay = await asyncio.to_thread(self._take)
+        while delay:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = await asyncio.to_thread(self._take)
+        self._record_wait(waited)
+        return waited
+
+    def _take(self):
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until the next one
+        """
+        with self._locked() as f:
+            tokens, updated_at, rate, latency, last_decrease = self._refill(self._read(f))
+            if tokens >= 1.0:
+                self._write(f, (tokens - 1.0, updated_at, rate, latency, last_decrease))
+                return 0.0
+            self._write(f, (tokens, updated_at, rate, latency, last_decrease))
+            return (1.0 - tokens) / rate
+
+    def _record_wait(self, waited):
+        with self._counter_lock:
+            self.acquired += 1
+            self.total_wait += waited
+        if waited > 1.0:
+            logger.info("Waited %.1fs for an upstream request token", waited)
+
+    def observe(self, latency, throttled=False):
+        """
+        Feed a response time back into adaptive mode.
+
+        Args:
+            latency: Seconds the request took
+            throttled: Whether upstream refused or timed out the request
+        """
+        if not self.adaptive:
+            return
+
+        with self._locked() as f:
+            tokens, updated_at, rate, ewma, last_decrease = self._refill(self._read(f))
+            ewma = latency if ewma == 0.0 else ewma + self.smoothing * (latency - ewma)
+            now = time.time()
+
+            if throttled or ewma > self.latency_target:
+                if now - last_decrease >= self.cooldown and rate > self.min_rate:
+                    rate = max(self.min_rate, rate * self.decrease_factor)
+                    last_decrease = now
+                    logger.warning(
+                        "Upstream slowing down (latency %.2fs, throttled=%s), rate lowered to %.2f/s",
+                        ewma, throttled, rate
+                    )
+            else:
+                rate = min(self.max_rate, rate + self.increase_step)
+
+            self._write(f, (tokens, updated_at, rate, ewma, last_decrease))
+
+    async def observe_async(self, latency, throttled=False):
+        """
+        ``observe`` for the event loop; the state file is updated in a worker thread.
+
+        Args:
+            latency: Seconds the request took
+            throttled: Whether upstream refused or timed out the request
+        """
+        if self.adaptive:
+            await asyncio.to_thread(self.observe, latency, throttled)
+
+    def stats(self):
+        """
+        Get limiter statistics.
+
+        Returns:
+            Dictionary with the shared rate and bucket level and this
+            process's token counters
+        """
+        with self._locked() as f:
+            tokens, _, rate, latency, _ = self._refill(self._read(f))
+        with self._counter_lock:
+            return {
+                'rate': round(rate, 3),
+                'max_rate': self.max_rate,
+                'burst': self.burst,
+                'tokens': round(tokens, 2),
+                'adaptive': self.adaptive,
+                'latency': round(latency, 3),
+                'acquired': self.acquired,
+                'avg_wait': round(self.total_wait / self.acquired, 3) if self.acquired else 0.0
+            }
+
+    def _refill(self, state):
+        """Add the tokens earned since the last update."""
+        tokens, updated_at, rate, latency, last_decrease = state
+        # The file may have been written by a process with other settings
+        rate = min(rate, self.max_rate) if self.adaptive else self.max_rate
+        now = time.time()
+        tokens = min(self.burst, tokens + max(0.0, now - updated_at) * rate)
+        return tokens, now, rate, latency, last_decrease
+
+    @contextmanager
+    def _locked(self):
+        """Open the state file under an exclusive lock."""
+        # A fresh open file per call, so the lock also excludes threads and forked children
+        with open(self.path, 'r+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield f
+
+    def _read(self, f):
+        return self.STATE.unpack(os.pread(f.fileno(), self.STATE.size, 0))
+
+    def _write(self, f, state):
+        os.pwrite(f.fileno(), self.STATE.pack(*state), 0)
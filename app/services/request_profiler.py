@@ -0,0 +1,160 @@
+"""
+On-demand profiling of single lookups, shared by all workers on a node.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# <milliseconds since epoch>-<trace id, or "notrace">.prof
+PROFILE_NAME = re.compile(r'^(\d+)-([0-9a-z]+)\.prof$')
+
+
+class RequestProfiler:
+    """
+    Run a call under cProfile and keep the profile on disk.
+
+    Profiles are ``pstats`` dumps named after the time they were taken and
+    the trace id of the request, so a slow trace can be matched with its
+    profile. Only the newest ``keep`` profiles in the directory are kept.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, keep=50):
+        """
+        Initialize the profiler and create the directory if needed.
+
+        Args:
+            directory: Directory the profiles are written to
+            sample_rate: Fraction of lookups profiled without being asked
+            keep: Number of newest profiles kept
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+
+        os.makedirs(directory, exist_ok=True)
+
+    def should_profile(self, requested=False):
+        """
+        Decide whether to profile a lookup.
+
+        Args:
+            requested: Whether an admin asked for this lookup to be profiled
+
+        Returns:
+            True if the lookup is requested or falls in the sample
+        """
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def profile_call(self, trace_id, fn, *args, **kwargs):
+        """
+        Call ``fn`` under cProfile and save the profile.
+
+        Only the calling thread is profiled; work handed to other threads
+        shows up as time spent waiting for it.
+
+        Args:
+            trace_id: Trace id of the request, or None outside a trace
+            fn: Callable to profile
+            *args: Positional arguments for ``fn``
+            **kwargs: Keyword arguments for ``fn``
+
+        Returns:
+            Tuple of (return value of ``fn``, profile name or None if it
+            could not be saved)
+        """
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            name = self._save(profiler, trace_id)
+        return result, name
+
+    def _save(self, profiler, trace_id):
+        name = f"{int(time.time() * 1000)}-{trace_id or 'notrace'}.prof"
+        path = os.path.join(self.directory, name)
+        try:
+            profiler.dump_stats(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning("Could not save profile %s: %s", name, e)
+            return None
+        self._prune()
+        return name
+
+    def _prune(self):
+        for entry in self.list()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, entry['name']))
+            except FileNotFoundError:
+                # Pruned by another worker
+                pass
+
+    def list(self):
+        """
+        List the saved profiles, newest first.
+
+        Returns:
+            List of ``{"name", "trace_id", "created_at", "bytes"}`` dicts
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            match = PROFILE_NAME.match(name)
+            if not match:
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            trace_id = match.group(2)
+            entries.append({
+                'name': name,
+                'trace_id': None if trace_id == 'notrace' else trace_id,
+                'created_at': int(match.group(1)) / 1000,
+                'bytes': size
+            })
+        entries.sort(key=lambda entry: entry['name'], reverse=True)
+        return entries
+
+    def path(self, name):
+        """
+        Path of a saved profile.
+
+        Args:
+            name: Profile name as returned by ``list``
+
+        Returns:
+            Absolute path, or None if there is no such profile
+        """
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.exists(path) else None
+
+    def render_text(self, name, sort='cumulative', limit=50):
+        """
+        Render a saved profile as the ``pstats`` text report.
+
+        Args:
+            name: Profile name as returned by ``list``
+            sort: ``pstats`` sort key
+            limit: Number of functions listed
+
+        Returns:
+            Report text, or None if there is no such profile
+        """
+        path = self.path(name)
+        if path is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
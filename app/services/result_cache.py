@@ -0,0 +1,150 @@
+"""
+In-process result cache for vehicle lookups.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Bounded TTL/LRU cache for scraper results.
+
+    Values are stored JSON-encoded, which gives an exact size for the
+    byte budget and hands every caller its own copy of the result.
+    Expired entries are dropped on access; the least recently used
+    entries are evicted whenever the entry or byte limit is exceeded.
+    """
+
+    def __init__(self, ttl=900, max_entries=1000, max_bytes=16 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Default time-to-live for entries in seconds
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of the encoded entries
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (encoded value, size, stored_at, expires_at)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            A fresh copy of the cached value, or None on a miss
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key):
+        """
+        Get a cached value with its timestamps.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, stored_at, expires_at), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            encoded, _, stored_at, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return json.loads(encoded), stored_at, expires_at
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value in the cache.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time-to-live in seconds (defaults to the cache TTL)
+        """
+        encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        size = len(encoded.encode('utf-8'))
+        if size > self.max_bytes:
+            logger.warning("Result for %s too large to cache (%s bytes)", key, size)
+            return
+
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (encoded, size, now, expires_at)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove a single entry from the cache."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size and hit/miss counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remove(self, key):
+        """Remove an entry and release its bytes. Caller holds the lock."""
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
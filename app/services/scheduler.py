@@ -0,0 +1,171 @@
+"""
+Priority scheduling of upstream lookups over the scraper session slots.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Priority classes
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+
+
+class _Waiter:
+    """A caller queued for a slot."""
+
+    def __init__(self):
+        self.granted = threading.Event()
+        self.enqueued_at = time.monotonic()
+
+
+class _ClassStats:
+    """Queue-time counters for one priority class."""
+
+    def __init__(self, window=1000):
+        self.granted = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.in_service = 0
+        self.recent_waits = deque(maxlen=window)
+
+    def record(self, wait):
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+        self.in_service += 1
+
+
+class PriorityScheduler:
+    """
+    Weighted fair scheduler for a fixed number of slots.
+
+    Callers queue per priority class. When a slot frees up it goes to
+    the class with the lowest virtual pass (stride scheduling): each
+    grant advances the class's pass by ``1 / weight``, so with weights
+    8:1 interactive callers get eight slots for every bulk one while
+    both are waiting, and bulk work is never starved outright. A class
+    that was idle rejoins at the current virtual time rather than with
+    banked credit, so a newly arrived interactive lookup goes ahead of
+    an already queued bulk backlog.
+    """
+
+    def __init__(self, slots, weights=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            slots: Number of concurrent slots
+            weights: Mapping of priority class to weight
+        """
+        self.slots = slots
+        self.weights = dict(weights or {PRIORITY_INTERACTIVE: 8, PRIORITY_BULK: 1})
+
+        self._lock = threading.Lock()
+        self._free = slots
+        self._queues = {name: deque() for name in self.weights}
+        self._pass = {name: 0.0 for name in self.weights}
+        self._vtime = 0.0
+        self._stats = {name: _ClassStats() for name in self.weights}
+
+    @contextmanager
+    def slot(self, priority, timeout=None):
+        """
+        Hold a slot for the duration of a ``with`` block.
+
+        Args:
+            priority: Priority class name
+            timeout: Seconds to wait for a slot (None waits forever)
+
+        Raises:
+            TimeoutError: If no slot was granted within ``timeout``
+        """
+        self._acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def _acquire(self, priority, timeout):
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        with self._lock:
+            if self._free > 0:
+                self._free -= 1
+                self._stats[priority].record(0.0)
+                return
+
+            waiter = _Waiter()
+            queue = self._queues[priority]
+            if not queue:
+                self._pass[priority] = max(self._pass[priority], self._vtime)
+            queue.append(waiter)
+
+        if waiter.granted.wait(timeout):
+            return
+
+        with self._lock:
+            if waiter.granted.is_set():
+                # Granted between the timeout and taking the lock
+                return
+            self._queues[priority].remove(waiter)
+            self._stats[priority].timeouts += 1
+        raise TimeoutError(f"No scraper slot free for {priority} lookup within {timeout}s")
+
+    def _release(self, priority):
+        with self._lock:
+            self._stats[priority].in_service -= 1
+
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                self._free += 1
+                return
+
+            # Hand the slot straight to the next waiter; ties go to the heavier class
+            chosen = min(waiting, key=lambda name: (self._pass[name], -self.weights[name]))
+            self._vtime = self._pass[chosen]
+            self._pass[chosen] += 1.0 / self.weights[chosen]
+
+            waiter = self._queues[chosen].popleft()
+            self._stats[chosen].record(time.monotonic() - waiter.enqueued_at)
+            waiter.granted.set()
+
+    def queued(self):
+        """Total number of callers waiting for a slot."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        """
+        Get per-class queue-time statistics.
+
+        Returns:
+            Dictionary with slot usage and, per class, queue length and
+            wait-time counters in seconds
+        """
+        with self._lock:
+            classes = {}
+            for name, stats in self._stats.items():
+                recent = sorted(stats.recent_waits)
+                classes[name] = {
+                    'weight': self.weights[name],
+                    'queued': len(self._queues[name]),
+                    'in_service': stats.in_service,
+                    'granted': stats.granted,
+                    'timeouts': stats.timeouts,
+                    'avg_wait': round(stats.total_wait / stats.granted, 3) if stats.granted else 0.0,
+                    'max_wait': round(stats.max_wait, 3),
+                    'p50_wait': round(recent[len(recent) // 2], 3) if recent else 0.0,
+                    'p95_wait': round(recent[int(len(recent) * 0.95)], 3) if recent else 0.0
+                }
+            return {
+                'slots': self.slots,
+                'free': self._free,
+                'classes': classes
+            }
@@ -0,0 +1,88 @@
+"""
+Pool of scraper instances with independent HTTP sessions.
+"""
+import threading
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScraperPool:
+    """
+    Fixed-size pool of PagaFacilScraper instances.
+
+    Each scraper owns its own ``requests.Session`` and is used by one
+    caller at a time, so concurrent lookups never share cookies or the
+    captcha state bound to a session. Scrapers are created lazily, the
+    first time a slot is needed.
+    """
+
+    def __init__(self, factory, size=4):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Zero-argument callable returning a new scraper
+            size: Maximum number of scrapers (concurrent upstream lookups)
+        """
+        self.size = size
+        self._factory = factory
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._created = 0
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """
+        Borrow a scraper for the duration of a ``with`` block.
+
+        Args:
+            timeout: Seconds to wait for a free slot (None waits forever)
+
+        Yields:
+            A scraper used by no other caller until the block exits
+
+        Raises:
+            TimeoutError: If no slot became free within ``timeout``
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No scraper available in pool")
+
+        try:
+            with self._lock:
+                scraper = self._idle.pop() if self._idle else None
+                if scraper is None:
+                    self._created += 1
+            if scraper is None:
+                scraper = self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            self._slots.release()
+            raise
+
+        try:
+            yield scraper
+        finally:
+            with self._lock:
+                self._idle.append(scraper)
+            self._slots.release()
+
+    def stats(self):
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with pool size and slot usage
+        """
+        with self._lock:
+            idle = len(self._idle)
+            created = self._created
+        return {
+            'size': self.size,
+            'created': created,
+            'idle': idle,
+            'in_use': created - idle
+        }
@@ -1,12 +1,49 @@
 """
 Service layer wrapper for the PagaFacilScraper.
 """
-from scraper import PagaFacilScraper
+from scraper import PagaFacilScraper, is_not_found
+import tracing
+from .result_cache import ResultCache
+from .persistent_cache import SQLiteResultCache
+from .negative_cache import NegativeResultCache
+from .singleflight import SingleFlight
+from .scraper_pool import ScraperPool
+from .scheduler import PriorityScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from .admission import AdmissionController, ServiceOverloaded
+from .rate_limiter import UpstreamRateLimiter
+from .captcha_telemetry import CaptchaTelemetry
+from .periodic_snapshot import PeriodicSnapshot
+from ..utils.responses import error_payload
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import hashlib
+import json
+import sqlite3
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def result_etag(result):
+    """
+    Strong entity tag for a lookup result.
+    
+    Computed over the payload without ``_metadata``, which changes on
+    every response (age, cache tier) even when the data does not.
+    
+    Args:
+        result: Lookup result dictionary
+        
+    Returns:
+        Hex digest identifying the payload
+    """
+    payload = {key: value for key, value in result.items() if key != '_metadata'}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
 class ScraperService:
     """
     Service layer for vehicle information scraping.
@@ -17,7 +54,14 @@ class ScraperService:
     
     def __init__(self, proxy_host=None, proxy_port=None, proxy_username=None, proxy_password=None,
                  base_url=None, form_url=None, request_timeout=30, max_retry_attempts=3,
-                 captcha_max_attempts=2):
+                 captcha_max_attempts=2, cache_ttl=900, cache_max_entries=1000,
+                 cache_max_bytes=16 * 1024 * 1024, cache_db_path=None, cache_prune_interval=300,
+                 negative_cache_ttl=300, negative_cache_capacity=100000, cache_soft_ttl=300,
+                 cache_refresh_workers=2, pool_size=4, scraper_factory=None,
+                 priority_weights=None, admission_max_queue=8, upstream_rate_limit=0,
+                 upstream_rate_burst=5, upstream_rate_state_path=None, upstream_rate_adaptive=False,
+                 upstream_rate_min=0.2, upstream_latency_target=3.0, captcha_telemetry_db_path=None,
+                 captcha_telemetry_retention=7 * 86400, stats_interval=15):
         """
         Initialize the scraper service.
         
@@ -31,65 +75,504 @@ class ScraperService:
             request_timeout: HTTP request timeout in seconds
             max_retry_attempts: Maximum retry attempts for failed requests
             captcha_max_attempts: Maximum captcha solving attempts
+            cache_ttl: Result cache hard TTL in seconds (0 disables the cache)
+            cache_max_entries: Maximum number of cached results
+            cache_max_bytes: Maximum total size of cached results in bytes
+            cache_db_path: SQLite file for the cache shared by all workers (optional)
+            cache_prune_interval: Seconds between expired-entry pruning runs
+            negative_cache_ttl: TTL for "no record found" results (0 disables)
+            negative_cache_capacity: Expected bad pairs per TTL window, sizes the Bloom filter
+            cache_soft_ttl: Age after which cached results are served stale and
+                refreshed in the background (0 disables)
+            cache_refresh_workers: Threads available for background refreshes
+            pool_size: Number of scrapers, each with its own session, i.e. the
+                maximum number of concurrent upstream lookups
+            scraper_factory: Callable returning a new scraper (defaults to a
+                PagaFacilScraper with the proxy settings above)
+            priority_weights: Share of the pool slots per priority class,
+                e.g. ``{'interactive': 8, 'bulk': 1}``
+            admission_max_queue: Interactive lookups allowed to wait for a
+                pool slot before further ones are refused
+            upstream_rate_limit: Requests per second to pagafacil shared by all
+                processes using the same state file (0 disables)
+            upstream_rate_burst: Requests allowed back to back
+            upstream_rate_state_path: File holding the shared token bucket
+            upstream_rate_adaptive: Lower the rate while upstream latency is high
+            upstream_rate_min: Lowest rate adaptive mode backs off to
+            upstream_latency_target: Response time in seconds above which
+                adaptive mode backs off
+            captcha_telemetry_db_path: SQLite file recording captcha solves
+                of all workers (optional)
+            captcha_telemetry_retention: Seconds captcha solves are kept
+            stats_interval: Seconds between background refreshes of the cache
+                and rate limiter statistics ``status_stats`` reports (0
+                reads them on every call)
         """
-        self.scraper = PagaFacilScraper(
-            proxy_host=proxy_host,
-            proxy_port=proxy_port,
-            proxy_username=proxy_username,
-            proxy_password=proxy_password
-        )
+        self.rate_limiter = None
+        if upstream_rate_limit > 0 and upstream_rate_state_path:
+            self.rate_limiter = UpstreamRateLimiter(
+                upstream_rate_state_path,
+                rate=upstream_rate_limit,
+                burst=upstream_rate_burst,
+                adaptive=upstream_rate_adaptive,
+                min_rate=upstream_rate_min,
+                latency_target=upstream_latency_target
+            )
+        
+        self.captcha_telemetry = None
+        if captcha_telemetry_db_path:
+            self.captcha_telemetry = CaptchaTelemetry(
+                captcha_telemetry_db_path,
+                retention=captcha_telemetry_retention
+            )
+        
+        if scraper_factory is None:
+            def scraper_factory():
+                return PagaFacilScraper(
+                    proxy_host=proxy_host,
+                    proxy_port=proxy_port,
+                    proxy_username=proxy_username,
+                    proxy_password=proxy_password,
+                    rate_limiter=self.rate_limiter,
+                    captcha_telemetry=self.captcha_telemetry,
+                    base_url=base_url,
+                    form_url=form_url
+                )
         
         self.config = {
             'base_url': base_url,
             'form_url': form_url,
             'request_timeout': request_timeout,
             'max_retry_attempts': max_retry_attempts,
-            'captcha_max_attempts': captcha_max_attempts
+            'captcha_max_attempts': captcha_max_attempts,
+            'cache_ttl': cache_ttl,
+            'cache_soft_ttl': cache_soft_ttl,
+            'admission_max_queue': admission_max_queue,
+            'upstream_rate_limit': upstream_rate_limit,
+            'upstream_rate_adaptive': upstream_rate_adaptive
         }
         
-        logger.info(f"ScraperService initialized with config: {self.config}")
+        self.cache = None
+        if cache_ttl > 0:
+            self.cache = ResultCache(
+                ttl=cache_ttl,
+                max_entries=cache_max_entries,
+                max_bytes=cache_max_bytes
+            )
+        
+        # Shared across worker processes on this node and across restarts
+        self.persistent_cache = None
+        if cache_ttl > 0 and cache_db_path:
+            self.persistent_cache = SQLiteResultCache(
+                cache_db_path,
+                ttl=cache_ttl,
+                prune_interval=cache_prune_interval
+            )
+        
+        # Bad plate/VIN pairs are retried often; remember them briefly
+        self.negative_cache = None
+        if negative_cache_ttl > 0 and cache_db_path:
+            self.negative_cache = NegativeResultCache(
+                cache_db_path,
+                ttl=negative_cache_ttl,
+                capacity=negative_cache_capacity
+            )
+        
+        # Concurrent requests for the same vehicle share one upstream lookup
+        self.inflight = SingleFlight()
+        
+        # Stale results are refreshed in the background, at most once per key
+        self.soft_ttl = cache_soft_ttl
+        self.refresh_enabled = cache_soft_ttl > 0 and (self.cache is not None or self.persistent_cache is not None)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        
+        capacity = self._init_workers(scraper_factory, pool_size, priority_weights, cache_refresh_workers)
+        self.config['max_concurrency'] = capacity
+        
+        # Interactive lookups beyond the wait queue are refused rather than left to time out
+        self.admission = AdmissionController(capacity, admission_max_queue)
+        
+        # Outcomes of the latest upstream lookups, for success rates on /status
+        self._recent_outcomes = deque(maxlen=100)
+        
+        # Cache counts and the shared rate limiter state, refreshed off the request path
+        self._shared_stats = PeriodicSnapshot(self.shared_stats, interval=stats_interval, name='status-stats')
+        
+        logger.info("ScraperService initialized with config: %s", self.config)
     
-    def get_vehicle_info(self, plate, vin):
+    def _init_workers(self, scraper_factory, pool_size, priority_weights, refresh_workers):
+        """
+        Create the scraper pool, its scheduler and the background refresh threads.
+        
+        AsyncScraperService overrides this, since its lookups and
+        refreshes run as coroutines.
+        
+        Args:
+            scraper_factory: Callable returning a new scraper
+            pool_size: Number of scrapers in the pool
+            priority_weights: Share of the pool slots per priority class
+            refresh_workers: Threads available for background refreshes
+            
+        Returns:
+            Maximum number of concurrent upstream lookups, which sizes
+            admission control
+        """
+        self.pool = ScraperPool(scraper_factory, size=pool_size)
+        
+        # Decides which queued lookup gets the next free pool slot
+        self.scheduler = PriorityScheduler(pool_size, weights=priority_weights)
+        
+        self._refresh_executor = None
+        if self.refresh_enabled:
+            self._refresh_executor = ThreadPoolExecutor(
+                max_workers=refresh_workers,
+                thread_name_prefix='cache-refresh'
+            )
+        return pool_size
+    
+    @tracing.traced('service_lookup')
+    def get_vehicle_info(self, plate, vin, use_cache=True, priority=PRIORITY_INTERACTIVE):
         """
         Get vehicle tax information.
         
+        Successful results are cached per normalized (plate, VIN). When
+        ``use_cache`` is False the cache is not read, but the fresh
+        result still replaces any cached entry. Concurrent calls for the
+        same vehicle wait on a single upstream lookup and share its result.
+        
+        Cached results older than the soft TTL are returned immediately,
+        marked stale with their age, while a background refresh replaces
+        them. Only past the hard TTL does a caller wait for a new scrape.
+        
         Args:
             plate: License plate number
             vin: Vehicle Identification Number
+            use_cache: Whether a cached result may be returned
+            priority: Scheduling class for the upstream lookup
+                (``'interactive'`` or ``'bulk'``)
             
         Returns:
             Dictionary containing vehicle information and taxes
+            
+        Raises:
+            ServiceOverloaded: If an interactive lookup needs a scrape and
+                the admission queue is full
         """
         try:
-            logger.info(f"ScraperService: Getting vehicle info for plate={plate}, vin={vin}")
+            logger.info("ScraperService: Getting vehicle info for plate=%s, vin=%s", plate, vin)
             
             # Clean and validate inputs
             plate = self._clean_plate(plate)
             vin = self._clean_vin(vin)
+            key = (plate, vin)
             
-            # Use the existing scraper logic
-            result = self.scraper.get_vehicle_info(plate, vin)
+            if use_cache:
+                cached = self._get_cached(key)
+                if cached is not None:
+                    self._mark_age(key, cached)
+                    logger.info("ScraperService: Cache %s for plate=%s, vin=%s", cached['_metadata']['cache'], plate, vin)
+                    tracing.annotate(cache=cached['_metadata']['cache'])
+                    return cached
             
-            # Add service metadata
-            result['_metadata'] = {
-                'service_version': '1.0.0',
-                'scraper_used': 'PagaFacilScraper',
-                'processed_plate': plate,
-                'processed_vin': vin
-            }
+            result, shared = self.inflight.do(key, lambda: self._fetch(key, priority))
+            if shared:
+                result['_metadata']['cache'] = 'coalesced'
+            elif not use_cache:
+                result['_metadata']['cache'] = 'bypass'
             
-            logger.info(f"ScraperService: Result code={result['codigo']}")
+            logger.info("ScraperService: Result code=%s", result['codigo'])
+            tracing.annotate(cache=result['_metadata']['cache'])
             return result
             
+        except ServiceOverloaded:
+            # Surfaced to the caller so it can answer 429 instead of an error payload
+            raise
         except Exception as e:
-            logger.error(f"ScraperService error: {str(e)}", exc_info=True)
-            return {
-                "codigo": "error",
-                "info": None,
-                "error": {
-                    "mensaje": f"Service error: {str(e)}"
-                }
-            }
+            logger.error("ScraperService error: %s", e, exc_info=True)
+            return error_payload(f"Service error: {str(e)}")
+    
+    def _fetch(self, key, priority):
+        """
+        Scrape a vehicle upstream and update the caches.
+        
+        Args:
+            key: Normalized (plate, vin) tuple
+            priority: Scheduling class for the pool slot
+            
+        Returns:
+            Scraper result with service metadata
+        """
+        plate, vin = key
+        
+        if priority == PRIORITY_INTERACTIVE:
+            with self.admission.admit() as admission:
+                result, scrape_seconds = self._scrape(plate, vin, priority, admission)
+        else:
+            # Bulk work is already bounded by its callers and may wait
+            result, scrape_seconds = self._scrape(plate, vin, priority)
+        
+        return self._finish(key, result, scrape_seconds)
+    
+    def _finish(self, key, result, scrape_seconds):
+        """
+        Annotate a fresh scraper result and update the caches.
+        
+        Args:
+            key: Normalized (plate, vin) tuple
+            result: Scraper result, annotated in place
+            scrape_seconds: Seconds the scraper session was busy
+            
+        Returns:
+            Scraper result with service metadata
+        """
+        plate, vin = key
+        
+        # Add service metadata
+        result['_metadata'] = {
+            'service_version': '1.0.0',
+            'scraper_used': 'PagaFacilScraper',
+            'processed_plate': plate,
+            'processed_vin': vin,
+            'scraped_at': time.time(),
+            'scrape_seconds': round(scrape_seconds, 3),
+            'cache': 'miss'
+        }
+        # Hashed once here and cached with the result, so polling clients
+        # can be answered with 304 without serializing the payload again
+        result['_metadata']['etag'] = result_etag(result)
+        
+        # Only successful and not-found lookups are cached; other errors may be transient
+        if result['codigo'] == 'ok':
+            self._recent_outcomes.append('ok')
+            self._store_cached(key, result)
+        elif is_not_found(result):
+            self._recent_outcomes.append('not_found')
+            self._store_negative(key, result)
+        else:
+            self._recent_outcomes.append('error')
+        
+        return result
+    
+    def _scrape(self, plate, vin, priority, admission=None):
+        """
+        Run one upstream lookup on a pool scraper once a slot is granted.
+        
+        Args:
+            plate: Normalized plate
+            vin: Normalized VIN
+            priority: Scheduling class for the pool slot
+            admission: Admission of an interactive lookup, if any
+        
+        Returns:
+            Tuple of (scraper result, seconds the scraper session was busy)
+        """
+        # Use the existing scraper logic on a session no other lookup is using;
+        # the scheduler caps concurrency at the pool size, so acquire never blocks
+        requested = time.monotonic()
+        with self.scheduler.slot(priority), self.admission.occupy(admission):
+            with self.pool.acquire() as scraper:
+                started = time.monotonic()
+                with tracing.span('scrape', priority=priority, slot_wait_seconds=round(started - requested, 3)):
+                    result = scraper.get_vehicle_info(plate, vin)
+                return result, time.monotonic() - started
+    
+    def _mark_age(self, key, cached):
+        """
+        Record a cached result's age and refresh it if it is past the soft TTL.
+        
+        Args:
+            key: Normalized (plate, vin) tuple
+            cached: Cached result, annotated in place
+        """
+        metadata = cached['_metadata']
+        age = time.time() - metadata['scraped_at']
+        metadata['age'] = round(age, 1)
+        
+        if not self.refresh_enabled or metadata['cache'] == 'negative_hit':
+            return
+        
+        if age > self.soft_ttl:
+            metadata['stale'] = True
+            self._schedule_refresh(key)
+    
+    def _schedule_refresh(self, key):
+        """Start a background refresh for a key unless one is already pending."""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        self._refresh_executor.submit(self._refresh, key)
+    
+    def _refresh(self, key):
+        """Re-scrape a stale key; failures keep the stale entry until its hard TTL."""
+        try:
+            logger.info("ScraperService: Refreshing stale result for plate=%s, vin=%s", key[0], key[1])
+            self.inflight.do(key, lambda: self._fetch(key, PRIORITY_BULK))
+        except Exception as e:
+            logger.warning("Background refresh failed for %s: %s", key, e)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+    
+    def _get_cached(self, key):
+        """
+        Look a result up in the memory cache, then in the shared disk cache.
+        
+        Disk hits are copied into the memory cache for their remaining TTL.
+        
+        Args:
+            key: Normalized (plate, vin) tuple
+            
+        Returns:
+            Cached result with ``_metadata.cache`` set, or None on a miss
+        """
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached['_metadata']['cache'] = 'hit'
+                return cached
+        
+        if self.persistent_cache is not None:
+            try:
+                entry = self.persistent_cache.get_entry(key)
+            except (sqlite3.Error, ValueError) as e:
+                # A locked or corrupt disk cache means a fresh scrape, not a failed lookup
+                logger.warning("Could not read result from disk cache: %s", e)
+                entry = None
+            if entry is not None:
+                cached, _, expires_at = entry
+                if self.cache is not None:
+                    self.cache.set(key, cached, ttl=expires_at - time.time())
+                cached['_metadata']['cache'] = 'disk_hit'
+                return cached
+        
+        if self.negative_cache is not None:
+            try:
+                cached = self.negative_cache.get(key)
+            except (sqlite3.Error, ValueError) as e:
+                # Same as the disk cache: an unreadable negative cache is a miss
+                logger.warning("Could not read result from negative cache: %s", e)
+                cached = None
+            if cached is not None:
+                cached['_metadata']['cache'] = 'negative_hit'
+                return cached
+        
+        return None
+    
+    def _store_cached(self, key, result):
+        """Store a result in every configured cache tier."""
+        if self.cache is not None:
+            self.cache.set(key, result)
+        
+        if self.persistent_cache is not None:
+            try:
+                self.persistent_cache.set(key, result)
+            except Exception as e:
+                logger.warning("Could not write result to disk cache: %s", e)
+        
+        if self.negative_cache is not None:
+            try:
+                self.negative_cache.invalidate(key)
+            except Exception as e:
+                logger.warning("Could not clear negative cache entry: %s", e)
+    
+    def _store_negative(self, key, result):
+        """Remember a "no record found" result and drop any cached positive result."""
+        if self.cache is not None:
+            self.cache.invalidate(key)
+        
+        try:
+            if self.persistent_cache is not None:
+                self.persistent_cache.invalidate(key)
+            if self.negative_cache is not None:
+                self.negative_cache.set(key, result)
+        except Exception as e:
+            logger.warning("Could not write negative cache entry: %s", e)
+    
+    def cache_stats(self):
+        """
+        Get result cache statistics.
+        
+        Returns:
+            Dictionary with cache counters per tier, or None if caching is disabled
+        """
+        if self.cache is None and self.persistent_cache is None:
+            return None
+        return {
+            'memory': self.cache.stats() if self.cache is not None else None,
+            'disk': self.persistent_cache.stats() if self.persistent_cache is not None else None,
+            'negative': self.negative_cache.stats() if self.negative_cache is not None else None
+        }
+    
+    def shared_stats(self):
+        """
+        Get the statistics that read shared state.
+        
+        Counting the cache tables and reading the rate limiter's bucket
+        take SQLite and file locks that lookups need too, and the counts
+        cost more as the caches grow.
+        
+        Returns:
+            Dictionary with the cache statistics and (when enabled) the
+            upstream rate limiter counters
+        """
+        stats = {'cache': self.cache_stats()}
+        if self.rate_limiter is not None:
+            stats['upstream_rate'] = self.rate_limiter.stats()
+        return stats
+    
+    def runtime_stats(self):
+        """
+        Get concurrency and lookup statistics for status reporting.
+        
+        Only reads this process's counters, so it is cheap to call.
+        
+        Returns:
+            Dictionary with coalescing, pool, scheduler, admission and recent
+            lookup outcome counters
+        """
+        return {
+            'inflight': self.inflight.stats(),
+            'pool': self.pool.stats(),
+            'scheduler': self.scheduler.stats(),
+            'admission': self.admission.stats(),
+            'lookups': self.lookup_stats()
+        }
+    
+    def status_stats(self):
+        """
+        Get the statistics ``/status`` reports, in constant time.
+        
+        The ``shared_stats`` come from a snapshot refreshed every
+        ``stats_interval`` seconds in the background; the in-process
+        counters are current.
+        
+        Returns:
+            Dictionary combining ``shared_stats`` and ``runtime_stats``
+        """
+        return {**(self._shared_stats.get() or {'cache': None}), **self.runtime_stats()}
+    
+    def lookup_stats(self):
+        """
+        Get the outcomes of the latest upstream lookups.
+        
+        A not-found answer counts as a success: upstream worked, the
+        vehicle just is not registered.
+        
+        Returns:
+            Dictionary with outcome counts and the success rate (None
+            before the first lookup)
+        """
+        # Copied in one step; iterating the live deque could race with appends
+        outcomes = list(self._recent_outcomes.copy())
+        counts = {outcome: outcomes.count(outcome) for outcome in ('ok', 'not_found', 'error')}
+        return {
+            'recent': len(outcomes),
+            **counts,
+            'success_rate': round(1 - counts['error'] / len(outcomes), 3) if outcomes else None
+        }
     
     def _clean_plate(self, plate):
         """Clean and normalize license plate."""
@@ -115,7 +598,7 @@ class ScraperService:
                 'config': self.config
             }
         except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
+            logger.error("Health check failed: %s", e)
             return {
                 'status': 'unhealthy',
                 'error': str(e)
@@ -0,0 +1,147 @@
+"""
+Coalescing of identical concurrent lookups.
+"""
+import asyncio
+import copy
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A lookup in progress and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers that arrive while a call for the same key is running wait
+    for it and receive its result (or exception) instead of starting
+    their own. Every caller of a shared call gets its own deep copy of
+    the result, so callers can annotate it independently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run ``fn`` for ``key`` unless a call for it is already running.
+
+        Args:
+            key: Hashable key identifying the call
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            Tuple of (result, shared), where ``shared`` is True if the
+            result was delivered to more than one caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # No caller can join once the key is removed, so waiters is final
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        if call.waiters:
+            logger.info("Coalesced %s concurrent lookups for %s", call.waiters, key)
+            return copy.deepcopy(call.result), True
+        return call.result, False
+
+    def stats(self):
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dictionary with in-flight and coalesced call counts
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'coalesced': self.coalesced
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop.
+
+    The shared call runs as its own task, so a caller that is cancelled
+    (e.g. its client disconnected) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Await ``fn()`` for ``key`` unless a call for it is already running.
+
+        Args:
+            key: Hashable key identifying the call
+            fn: Zero-argument callable returning a coroutine
+
+        Returns:
+            Tuple of (result, shared), as for ``SingleFlight.do``
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            call.waiters += 1
+            self.coalesced += 1
+            result = await asyncio.shield(call.task)
+            return copy.deepcopy(result), True
+
+        call = _Call()
+        call.task = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        call.task.add_done_callback(lambda task: self._calls.pop(key, None))
+
+        result = await asyncio.shield(call.task)
+        if call.waiters:
+            logger.info("Coalesced %s concurrent lookups for %s", call.waiters, key)
+            return copy.deepcopy(result), True
+        return result, False
+
+    def stats(self):
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dictionary with in-flight and coalesced call counts
+        """
+        return {
+            'in_flight': len(self._calls),
+            'coalesced': self.coalesced
+        }
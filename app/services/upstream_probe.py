@@ -0,0 +1,184 @@
+"""
+Background health probe of pagafacil.gob.mx.
+"""
+from collections import deque
+import fcntl
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamProber:
+    """
+    Periodically probe upstream in a background thread and cache the outcome.
+
+    Status endpoints read the last snapshot, which is built when a probe
+    finishes, so they answer in constant time and never start a scrape
+    themselves.
+
+    With a ``state_path``, only the process holding an ``flock`` on
+    ``<state_path>.lock`` probes; it writes its snapshot to ``state_path``
+    and the other workers on the host read it from there. When that
+    process exits, the next worker to check takes the lock over, so N
+    workers still send one probe per interval.
+    """
+
+    def __init__(self, probe, interval=60, history=20, state_path=None):
+        """
+        Initialize the prober.
+
+        Args:
+            probe: Zero-argument callable that checks upstream and returns a
+                dictionary of step timings; raises if upstream is unusable
+            interval: Seconds between probes
+            history: Number of recent probes the success rate covers
+            state_path: File sharing the snapshot between the processes of a
+                host (optional; without it every process probes)
+        """
+        self.probe = probe
+        self.interval = interval
+        self.state_path = state_path
+        self._lock_file = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._recent = deque(maxlen=history)
+        self._snapshot = {
+            'state': 'unknown',
+            'checked_at': None,
+            'probes': 0,
+            'success_rate': None,
+            'last': None
+        }
+
+    def start(self):
+        """Start the probe thread unless it is already running."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='upstream-probe', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the probe thread after its current probe."""
+        self._stop.set()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self.run_once()
+                self._stop.wait(self.interval)
+        finally:
+            self._release()
+
+    def run_once(self):
+        """Probe if this process is the host's prober, else pick up that process's snapshot."""
+        if self.is_leader():
+            self.probe_once()
+        else:
+            self._load_shared()
+
+    def is_leader(self):
+        """
+        Whether this process probes for the host, taking the lock if it is free.
+
+        Returns:
+            True without a ``state_path``, else whether this process holds the lock
+        """
+        if self.state_path is None or self._lock_file is not None:
+            return True
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(f"{self.state_path}.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        # Carry on the history of the previous prober
+        self._load_shared()
+        return True
+
+    def _release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _load_shared(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            # Nothing probed yet on this host
+            return
+        with self._lock:
+            self._snapshot = state['snapshot']
+            self._recent = deque(state['recent'], maxlen=self._recent.maxlen)
+
+    def _store_shared(self, snapshot, recent):
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'snapshot': snapshot, 'recent': recent}, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.warning("Could not share probe snapshot: %s", e)
+
+    def probe_once(self):
+        """
+        Run one probe and update the snapshot.
+
+        Returns:
+            Outcome of this probe
+        """
+        started = time.monotonic()
+        try:
+            outcome = dict(self.probe())
+            outcome['ok'] = outcome.get('captcha_solved') is not False
+            outcome['error'] = None if outcome['ok'] else 'Captcha could not be solved'
+        except Exception as e:
+            logger.warning("Upstream probe failed: %s", e)
+            outcome = {'ok': False, 'error': str(e)}
+        outcome['seconds'] = round(time.monotonic() - started, 3)
+
+        with self._lock:
+            self._recent.append(outcome['ok'])
+            successes = sum(self._recent)
+            if outcome['ok']:
+                state = 'ok'
+            else:
+                # One failure among mostly good probes is upstream noise, not an outage
+                state = 'degraded' if successes * 2 >= len(self._recent) else 'error'
+            self._snapshot = {
+                'state': state,
+                'checked_at': time.time(),
+                'probes': self._snapshot['probes'] + 1,
+                'success_rate': round(successes / len(self._recent), 3),
+                'last': outcome
+            }
+            snapshot, recent = self._snapshot, list(self._recent)
+        if self.state_path is not None:
+            self._store_shared(snapshot, recent)
+        return outcome
+
+    def snapshot(self):
+        """
+        Get the outcome of the latest probes.
+
+        Returns:
+            Dictionary with the overall state (``unknown`` before the first
+            probe, then ``ok``, ``degraded`` or ``error``), the time of the
+            last probe, the recent success rate and the last probe's timings
+        """
+        with self._lock:
+            snapshot = dict(self._snapshot)
+        if snapshot['checked_at'] is not None:
+            snapshot['age'] = round(time.time() - snapshot['checked_at'], 1)
+        return snapshot
@@ -0,0 +1,49 @@
+"""
+Conditional GET handling shared by the Flask and ASGI lookup routes.
+"""
+from datetime import datetime, timezone
+from werkzeug.http import parse_date, parse_etags
+
+
+def last_modified_time(scraped_at):
+    """
+    ``Last-Modified`` value for a result scraped at a given time.
+
+    HTTP dates have one-second resolution, so the fraction is dropped to
+    let ``If-Modified-Since`` echo it back exactly.
+
+    Args:
+        scraped_at: Unix time the result was scraped, or None
+
+    Returns:
+        Timezone-aware datetime, or None
+    """
+    if scraped_at is None:
+        return None
+    return datetime.fromtimestamp(int(scraped_at), timezone.utc)
+
+
+def is_not_modified(etag, last_modified, if_none_match=None, if_modified_since=None):
+    """
+    Whether a GET or HEAD should be answered with 304 Not Modified.
+
+    Follows RFC 9110 section 13.2.2: ``If-None-Match`` uses the weak
+    comparison, so ``W/`` tags rewritten by proxies still match, and
+    ``If-Modified-Since`` is only considered when ``If-None-Match`` is
+    absent.
+
+    Args:
+        etag: Current entity tag (unquoted)
+        last_modified: Current ``last_modified_time``, or None
+        if_none_match: Raw ``If-None-Match`` header, if any
+        if_modified_since: Raw ``If-Modified-Since`` header, if any
+
+    Returns:
+        True if the client's copy is current
+    """
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag)
+    if if_modified_since and last_modified is not None:
+        since = parse_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
@@ -0,0 +1,27 @@
+"""
+Response payloads shared by the Flask routes and the ASGI application.
+"""
+
+
+def error_payload(message, details=None):
+    """
+    Error payload in the format used by every route.
+
+    Args:
+        message: Human-readable error message
+        details: List of specific problems, e.g. one per invalid item (optional)
+
+    Returns:
+        Dictionary with ``codigo``, ``info`` and ``error.mensaje`` (and
+        ``error.detalles`` when details are given)
+    """
+    payload = {
+        "codigo": "error",
+        "info": None,
+        "error": {
+            "mensaje": message
+        }
+    }
+    if details is not None:
+        payload["error"]["detalles"] = details
+    return payload
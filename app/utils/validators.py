@@ -32,12 +32,81 @@ def validate_plate(plate: str) -> Dict[str, Any]:
     return {'valid': True, 'cleaned': clean_plate}
 
 
-def validate_vin(vin: str) -> Dict[str, Any]:
+# Characters in VIN order (ISO 3779 excludes I, O and Q), used for WMI ranges
+_VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ1234567890"
+
+# Check-digit transliteration and position weights (49 CFR 565)
+_TRANSLITERATION = dict(zip("ABCDEFGHJKLMNPRSTUVWXYZ0123456789",
+                            [1, 2, 3, 4, 5, 6, 7, 8, 1, 2, 3, 4, 5, 7, 9, 2, 3, 4, 5, 6, 7, 8, 9,
+                             0, 1, 2, 3, 4, 5, 6, 7, 8, 9]))
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Weighted value of every character at every position, so the check digit
+# is a sum of 17 dictionary lookups
+_POSITION_VALUES = tuple(
+    {char: value * weight for char, value in _TRANSLITERATION.items()} for weight in _WEIGHTS
+)
+
+# Region of the first WMI character (ISO 3780)
+_WMI_REGIONS = {}
+for _chars, _region in (("ABCDEFGH", "Africa"), ("JKLMNPR", "Asia"), ("STUVWXYZ", "Europe"),
+                        ("12345", "North America"), ("67", "Oceania"), ("890", "South America")):
+    _WMI_REGIONS.update(dict.fromkeys(_chars, _region))
+
+
+def _wmi_range(first, start, end):
+    """Two-character WMI prefixes from first+start through first+end."""
+    return [first + char for char in _VIN_CHARS[_VIN_CHARS.index(start):_VIN_CHARS.index(end) + 1]]
+
+
+# Country of well-known two-character WMI prefixes (ISO 3780 allocations)
+WMI_COUNTRIES = {}
+for _first, _start, _end, _country in (
+        ("1", "A", "0", "United States"), ("4", "A", "0", "United States"), ("5", "A", "0", "United States"),
+        ("2", "A", "0", "Canada"), ("3", "A", "W", "Mexico"), ("3", "X", "7", "Costa Rica"),
+        ("J", "A", "0", "Japan"), ("K", "L", "R", "South Korea"), ("L", "A", "0", "China"),
+        ("M", "A", "E", "India"), ("M", "F", "K", "Indonesia"), ("M", "L", "R", "Thailand"),
+        ("S", "A", "M", "United Kingdom"), ("S", "U", "Z", "Poland"), ("T", "A", "H", "Switzerland"),
+        ("T", "J", "P", "Czech Republic"), ("T", "R", "V", "Hungary"), ("V", "A", "E", "Austria"),
+        ("V", "F", "R", "France"), ("V", "S", "W", "Spain"), ("W", "A", "0", "Germany"),
+        ("Y", "A", "E", "Belgium"), ("Y", "F", "K", "Finland"), ("Y", "S", "W", "Sweden"),
+        ("Z", "A", "R", "Italy"), ("6", "A", "W", "Australia"), ("7", "A", "E", "New Zealand"),
+        ("8", "A", "E", "Argentina"), ("8", "F", "K", "Chile"), ("9", "A", "E", "Brazil"),
+        ("9", "3", "9", "Brazil"), ("9", "F", "J", "Colombia")):
+    WMI_COUNTRIES.update(dict.fromkeys(_wmi_range(_first, _start, _end), _country))
+
+# North American VINs carry a mandatory check digit and model-year code
+_NORTH_AMERICA = frozenset("12345")
+_INVALID_MODEL_YEARS = frozenset("UZ0")
+
+
+def vin_check_digit(vin: str) -> str:
+    """
+    Compute the check digit of a 17-character VIN.
+    
+    Args:
+        vin: Cleaned 17-character VIN
+        
+    Returns:
+        Expected check digit ('0'-'9' or 'X')
+    """
+    remainder = sum(values[char] for values, char in zip(_POSITION_VALUES, vin)) % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def validate_vin(vin: str, strict: bool = False) -> Dict[str, Any]:
     """
     Validate Vehicle Identification Number (VIN).
     
+    17-character VINs are decoded per ISO 3779: the result reports the
+    WMI region and country and, for North American VINs, whether the
+    check digit matches. In strict mode a wrong check digit or model-year
+    code makes the VIN invalid, so the lookup is refused before going
+    upstream.
+    
     Args:
         vin: VIN string
+        strict: Reject North American VINs that fail the check digit
         
     Returns:
         Dictionary with validation result
@@ -56,7 +125,62 @@ def validate_vin(vin: str) -> Dict[str, Any]:
     if not re.match(r'^[A-HJ-NPR-Z0-9]+$', clean_vin):
         return {'valid': False, 'message': 'VIN contains invalid characters (no I, O, Q allowed)'}
     
-    return {'valid': True, 'cleaned': clean_vin}
+    # Pre-1981 VINs follow no common standard
+    if len(clean_vin) != 17:
+        return {'valid': True, 'cleaned': clean_vin}
+    
+    result = {
+        'valid': True,
+        'cleaned': clean_vin,
+        'wmi': clean_vin[:3],
+        'region': _WMI_REGIONS.get(clean_vin[0]),
+        'country': WMI_COUNTRIES.get(clean_vin[:2]),
+        'check_digit_valid': None
+    }
+    
+    if clean_vin[0] in _NORTH_AMERICA:
+        expected = vin_check_digit(clean_vin)
+        result['check_digit_valid'] = clean_vin[8] == expected
+        if strict and not result['check_digit_valid']:
+            return {'valid': False, 'message': f'VIN check digit does not match (expected {expected})'}
+        if strict and clean_vin[9] in _INVALID_MODEL_YEARS:
+            return {'valid': False, 'message': f'VIN model year code {clean_vin[9]} is not valid'}
+    
+    return result
+
+
+def validate_vehicle_entry(entry: Any, strict_vin: bool = False) -> Dict[str, Any]:
+    """
+    Validate one vehicle of a batch or job request.
+    
+    Args:
+        entry: Dictionary with 'plate' and 'niv' keys
+        strict_vin: Apply strict VIN check-digit validation
+        
+    Returns:
+        Dictionary with validation result, including the raw plate and VIN
+    """
+    if not isinstance(entry, dict):
+        return {'valid': False, 'plate': None, 'vin': None,
+                'message': "Each vehicle must be an object with 'plate' and 'niv'"}
+    
+    plate = entry.get('plate')
+    vin = entry.get('niv')
+    if not isinstance(plate, str) or not isinstance(vin, str) or not vin:
+        return {'valid': False, 'plate': plate, 'vin': vin,
+                'message': "Fields 'plate' and 'niv' (VIN) are required"}
+    
+    plate_result = validate_plate(plate)
+    if not plate_result['valid']:
+        return {'valid': False, 'plate': plate, 'vin': vin,
+                'message': f"Invalid plate format: {plate_result['message']}"}
+    
+    vin_result = validate_vin(vin, strict=strict_vin)
+    if not vin_result['valid']:
+        return {'valid': False, 'plate': plate, 'vin': vin,
+                'message': f"Invalid VIN format: {vin_result['message']}"}
+    
+    return {'valid': True, 'plate': plate, 'vin': vin}
 
 
 def validate_request_data(data: Dict[str, Any]) -> Dict[str, Any]:
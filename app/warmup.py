@@ -0,0 +1,100 @@
+"""
+Process warm-up and readiness tracking.
+
+A process is ready once the OCR stack, the Tesseract engine and the HTML
+parsers have been exercised, so no lookup pays their cold-start cost.
+Warm-up runs in a background thread after startup, or, when gunicorn
+preloads the app, once in the master before it forks its workers, which
+then share the loaded pages copy-on-write.
+"""
+import os
+import threading
+import time
+import logging
+from captcha_solver import warm_up_ocr_engine, ocr_stack_status
+from scraper import warm_up_parser
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_state = {
+    'mode': None,
+    'seconds': None,
+    'tesseract': None,
+    'warmed_in_pid': None
+}
+
+
+def warm_up():
+    """
+    Warm up this process synchronously.
+
+    Creates no threads and no network sessions, so it is safe to run in
+    a gunicorn master before it forks.
+    """
+    with _lock:
+        if _ready.is_set():
+            return
+        started = time.perf_counter()
+        _state['tesseract'] = warm_up_ocr_engine()
+        warm_up_parser()
+        _state['seconds'] = round(time.perf_counter() - started, 3)
+        _state['warmed_in_pid'] = os.getpid()
+        _ready.set()
+    logger.info("Warm-up finished in %.3fs", _state['seconds'])
+
+
+def start_warm_up(config):
+    """
+    Start warm-up according to the app config.
+
+    Args:
+        config: Configuration mapping with ``OCR_WARMUP`` and ``GUNICORN_PRELOAD``
+    """
+    if _ready.is_set():
+        return
+
+    if not config.get('OCR_WARMUP'):
+        # The OCR stack loads on the first captcha instead
+        _state['mode'] = 'lazy'
+        _ready.set()
+    elif config.get('GUNICORN_PRELOAD'):
+        _state['mode'] = 'preload'
+        warm_up()
+    else:
+        _state['mode'] = 'background'
+
+        def run():
+            try:
+                warm_up()
+            except Exception as e:
+                # A failed warm-up only means the first lookup is slower
+                logger.error("Warm-up failed: %s", e, exc_info=True)
+                _ready.set()
+
+        threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+
+def is_ready():
+    """Whether this process has finished warming up."""
+    return _ready.is_set()
+
+
+def readiness():
+    """
+    Report this process's warm-up state.
+
+    Returns:
+        Dictionary with the ready flag, warm-up mode and timings
+    """
+    return {
+        'ready': _ready.is_set(),
+        'pid': os.getpid(),
+        'mode': _state['mode'],
+        'warm_up_seconds': _state['seconds'],
+        'tesseract': _state['tesseract'],
+        # Differs from pid in workers forked from a preloaded master
+        'warmed_in_pid': _state['warmed_in_pid'],
+        'ocr_stack': ocr_stack_status()
+    }
@@ -0,0 +1,15 @@
+"""
+ASGI entry point for the Paga Fácil vehicle tax scraper.
+
+Serves the same API as ``app.py`` on an asyncio event loop:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+from app.asgi import create_asgi_app
+from app.config import Config
+from logging_config import configure_logging
+
+# Configure logging
+configure_logging(Config.LOG_MODE, Config.LOG_LEVEL, Config.LOG_OCR_SAMPLE_RATE)
+
+app = create_asgi_app()
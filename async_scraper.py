@@ -0,0 +1,237 @@
+"""
+Asynchronous scraper for Paga Fácil vehicle tax information.
+
+Same lookup flow as ``PagaFacilScraper`` (form page, captcha, submit,
+parse), but network I/O runs on ``curl_cffi``'s asyncio client and the
+CPU-bound captcha OCR runs in a thread pool, so one event loop can hold
+many slow lookups at once. Page parsing, captcha telemetry writes and
+the rate limiter's file locking also run off the loop, in worker threads.
+"""
+import asyncio
+import contextvars
+import time
+from typing import Any, Dict
+from urllib.parse import urljoin
+import logging
+
+from curl_cffi.requests import AsyncSession, RequestsError
+
+import metrics
+import tracing
+from scraper import PagaFacilScraper, RateLimitedSession, lookup_outcome, count_lookup_event, lookup_event_counts
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPagaFacilScraper(PagaFacilScraper):
+    """Async variant of PagaFacilScraper; reuses its parsing helpers."""
+
+    def __init__(self, proxy_host: str = None, proxy_port: int = None, proxy_username: str = None,
+                 proxy_password: str = None, rate_limiter=None, ocr_executor=None, max_attempts: int = 3,
+                 captcha_attempts: int = 2, timeout: int = 30, captcha_telemetry=None, base_url: str = None,
+                 form_url: str = None):
+        """
+        Initialize the scraper.
+
+        Args:
+            proxy_host: Proxy server hostname (optional)
+            proxy_port: Proxy server port (optional)
+            proxy_username: Proxy authentication username (optional)
+            proxy_password: Proxy authentication password (optional)
+            rate_limiter: Limiter consulted before every request to the site (optional)
+            ocr_executor: Executor for captcha OCR (defaults to the loop's executor)
+            max_attempts: Form cycles to try before giving up
+            captcha_attempts: Captcha downloads per form cycle
+            timeout: HTTP request timeout in seconds
+            captcha_telemetry: Store recording every captcha solve and
+                whether the site accepted it (optional)
+            base_url: Directory of the form page (optional)
+            form_url: Form page, relative to ``base_url`` (optional)
+        """
+        super().__init__(proxy_host, proxy_port, proxy_username, proxy_password,
+                         captcha_telemetry=captcha_telemetry, base_url=base_url, form_url=form_url)
+        self.headers = dict(self.session.headers)
+        self.session = None
+        self.rate_limiter = rate_limiter
+        self.ocr_executor = ocr_executor
+        self.max_attempts = max_attempts
+        self.captcha_attempts = captcha_attempts
+        self.timeout = timeout
+
+    async def get_vehicle_info(self, plate: str, vin: str) -> Dict[str, Any]:
+        """
+        Get complete vehicle information including taxes.
+
+        Args:
+            plate: License plate number
+            vin: Vehicle Identification Number
+
+        Returns:
+            Dictionary containing vehicle information and taxes
+        """
+        with tracing.span('scraper_lookup'):
+            return await self._get_vehicle_info(plate, vin)
+
+    async def _get_vehicle_info(self, plate: str, vin: str) -> Dict[str, Any]:
+        """Look up a vehicle inside the ``scraper_lookup`` span."""
+        started = time.perf_counter()
+        with lookup_event_counts() as counts:
+            try:
+                plate = plate.strip().upper()
+                vin = vin.strip().upper()
+                logger.info("Getting vehicle info for plate: %s, VIN: %s", plate, vin)
+
+                # A session per lookup: pagafacil ties the captcha to the session cookie
+                async with AsyncSession(proxies=self.proxies, headers=self.headers, timeout=self.timeout) as session:
+                    html_content = await self.submit_vehicle_query_async(session, plate, vin)
+
+                result = await asyncio.to_thread(self.parse_vehicle_info, html_content)
+                logger.info("Query result: %s", result['codigo'])
+
+            except Exception as e:
+                logger.error("Error getting vehicle info: %s", e)
+                result = {
+                    "codigo": "error",
+                    "info": None,
+                    "error": {
+                        "mensaje": f"Error processing request: {str(e)}"
+                    }
+                }
+
+        seconds = time.perf_counter() - started
+        outcome = lookup_outcome(result)
+        metrics.LOOKUP_SECONDS.labels(outcome).observe(seconds)
+        tracing.annotate(outcome=outcome)
+        self.log_lookup_summary(plate, vin, outcome, seconds, counts)
+        return result
+
+    async def submit_vehicle_query_async(self, session: AsyncSession, plate: str, vin: str) -> str:
+        """
+        Submit the vehicle query, solving the captcha, with retries.
+
+        Args:
+            session: Session for this lookup
+            plate: License plate number
+            vin: Vehicle Identification Number
+
+        Returns:
+            HTML response content
+        """
+        url = urljoin(self.base_url, self.form_url)
+
+        for attempt in range(self.max_attempts):
+            with tracing.span('attempt', number=attempt + 1) as span:
+                try:
+                    logger.info("Attempt %s/%s to submit query for plate: %s, VIN: %s", attempt + 1, self.max_attempts, plate, vin)
+                    metrics.ATTEMPTS.inc()
+                    count_lookup_event('attempts')
+
+                    with metrics.timed('form_get'):
+                        response = await self._request(session, 'GET', url)
+                    form_data, captcha_image_path = await asyncio.to_thread(self.parse_form_page, response.content)
+
+                    answer = None
+                    if captcha_image_path:
+                        solves = []
+                        captcha_text = await self.solve_captcha_async(session, captcha_image_path, on_solve=solves.append)
+                        answer = await asyncio.to_thread(self.record_captcha_solves, solves)
+                        if not captcha_text:
+                            logger.warning("Failed to solve captcha on attempt %s", attempt + 1)
+                            span.set_attribute('outcome', 'captcha_unsolved')
+                            if attempt < self.max_attempts - 1:
+                                continue
+                            raise ValueError("Unable to solve captcha after multiple attempts")
+                        form_data['codigo_usr'] = captcha_text
+                    else:
+                        logger.info("No captcha detected")
+
+                    self.fill_vehicle_fields(form_data, plate, vin)
+                    with metrics.timed('submit'):
+                        response = await self._request(session, 'POST', url, data=form_data)
+
+                    if self.is_captcha_rejected(response.text):
+                        logger.warning("Captcha validation failed on attempt %s", attempt + 1)
+                        metrics.CAPTCHA_REJECTIONS.inc()
+                        count_lookup_event('captcha_rejections')
+                        await asyncio.to_thread(self.record_captcha_submission, answer, False)
+                        span.set_attribute('outcome', 'captcha_rejected')
+                        if attempt < self.max_attempts - 1:
+                            continue
+                        logger.error("All captcha attempts failed")
+                        return response.text
+
+                    logger.info("Successfully submitted form on attempt %s", attempt + 1)
+                    await asyncio.to_thread(self.record_captcha_submission, answer, True)
+                    span.set_attribute('outcome', 'submitted')
+                    return response.text
+
+                except Exception as e:
+                    logger.error("Error on attempt %s: %s", attempt + 1, e)
+                    metrics.ATTEMPT_ERRORS.labels(type(e).__name__).inc()
+                    count_lookup_event('errors')
+                    span.record_error(e)
+                    if attempt >= self.max_attempts - 1:
+                        raise
+
+    async def solve_captcha_async(self, session: AsyncSession, captcha_image_path: str, on_solve=None):
+        """
+        Download the captcha and solve it off the event loop.
+
+        Args:
+            session: Session for this lookup
+            captcha_image_path: Captcha image path from the form page
+            on_solve: Called with the details of every solve (optional)
+
+        Returns:
+            Solved captcha text or None
+        """
+        captcha_url = self.captcha_solver.build_captcha_url(self.base_url, captcha_image_path)
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.captcha_attempts):
+            logger.info("Captcha solving attempt %s/%s", attempt + 1, self.captcha_attempts)
+            try:
+                with metrics.timed('captcha_download'):
+                    response = await self._request(session, 'GET', captcha_url, timeout=15)
+                if len(response.content) < 100:
+                    logger.warning("Captcha image too small, might be invalid")
+                else:
+                    # Run in a copy of this context so the OCR spans join the request's trace
+                    solve = await loop.run_in_executor(
+                        self.ocr_executor, contextvars.copy_context().run,
+                        self.captcha_solver.solve_image_details, response.content
+                    )
+                    if on_solve is not None:
+                        on_solve(solve)
+                    result = solve['text']
+                    if result and len(result) >= 3:
+                        return result
+            except Exception as e:
+                logger.error("Error solving captcha: %s", e)
+
+            await asyncio.sleep(1)
+
+        logger.warning("Failed to solve captcha after %s attempts", self.captcha_attempts)
+        return None
+
+    async def _request(self, session: AsyncSession, method: str, url: str, **kwargs):
+        """Send one rate-limited request and raise on HTTP errors."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+
+        started = time.monotonic()
+        try:
+            response = await session.request(method, url, **kwargs)
+        except RequestsError:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.observe_async(time.monotonic() - started, throttled=True)
+            raise
+
+        metrics.UPSTREAM_RESPONSES.labels(method, str(response.status_code)).inc()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.observe_async(
+                time.monotonic() - started,
+                throttled=response.status_code in RateLimitedSession.THROTTLED_STATUS_CODES
+            )
+        response.raise_for_status()
+        return response
@@ -1,26 +1,118 @@
 """
 Captcha solver module using OCR for Paga Fácil website.
 """
-import cv2
-import numpy as np
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
 import io
 import requests
 import logging
-from typing import Optional, Tuple
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 import re
+from urllib.parse import urljoin
+import metrics
+import tracing
 
 logger = logging.getLogger(__name__)
+# Up to one line per Tesseract call; sampled in production logging mode
+ocr_logger = logging.getLogger(f"{__name__}.ocr")
+
+# The OCR stack (OpenCV, NumPy, Tesseract bindings, Pillow) is imported on
+# first use or by warm_up_ocr_engine(), not when this module is imported, so
+# processes that never solve a captcha (or not yet) start quickly.
+cv2 = None
+np = None
+pytesseract = None
+Image = None
+ImageEnhance = None
+
+_ocr_lock = threading.Lock()
+_ocr_load_seconds = None
+
+
+def load_ocr_stack():
+    """
+    Import the OCR libraries if they are not loaded yet.
+    
+    Safe to call from several threads; the first caller imports and the
+    others wait for it.
+    
+    Returns:
+        Seconds the import took
+    """
+    global cv2, np, pytesseract, Image, ImageEnhance, _ocr_load_seconds
+    if _ocr_load_seconds is not None:
+        return _ocr_load_seconds
+    
+    with _ocr_lock:
+        if _ocr_load_seconds is None:
+            started = time.perf_counter()
+            import cv2 as _cv2
+            import numpy as _np
+            import pytesseract as _pytesseract
+            from PIL import Image as _Image, ImageEnhance as _ImageEnhance
+            cv2, np, pytesseract, Image, ImageEnhance = _cv2, _np, _pytesseract, _Image, _ImageEnhance
+            _ocr_load_seconds = time.perf_counter() - started
+            logger.info("OCR stack loaded in %.3fs", _ocr_load_seconds)
+    return _ocr_load_seconds
+
+
+def warm_up_ocr_engine():
+    """
+    Load the OCR libraries and run Tesseract once on a blank image.
+    
+    The first OCR call pays for loading the Tesseract binary and its
+    language data from disk; doing it at startup keeps that off the
+    first lookup.
+    
+    Returns:
+        True if Tesseract ran, False if it is unavailable
+    """
+    load_ocr_stack()
+    try:
+        blank = Image.new('L', (60, 20), color=255)
+        pytesseract.image_to_string(blank, config=r'--oem 3 --psm 8')
+        return True
+    except Exception as e:
+        logger.warning("Tesseract warm-up failed: %s", e)
+        return False
+
+
+def ocr_stack_status():
+    """
+    Report whether the OCR libraries are loaded.
+    
+    Returns:
+        Dictionary with the loaded flag and the import time in seconds
+    """
+    loaded = _ocr_load_seconds is not None
+    return {
+        'loaded': loaded,
+        'load_seconds': round(_ocr_load_seconds, 3) if loaded else None
+    }
+
 
 class CaptchaSolver:
     """OCR-based captcha solver for simple text captchas."""
     
+    # Names of the images produced by preprocess_image, in order
+    PREPROCESS_VARIANTS = ('otsu', 'adaptive', 'contrast', 'morphology', 'inverted')
+    
+    # Tesseract configurations tried on every preprocessed image, by name
+    OCR_CONFIGS = (
+        ('psm8-whitelist', r'--oem 3 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'),
+        ('psm7-whitelist', r'--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'),
+        ('psm6-whitelist', r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'),
+        ('psm13-whitelist', r'--oem 3 --psm 13 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'),
+        ('psm8', r'--oem 3 --psm 8'),
+        ('psm7', r'--oem 3 --psm 7'),
+    )
+    
     def __init__(self):
         """Initialize the captcha solver with optimal OCR settings."""
         # Tesseract configuration for alphanumeric captchas
         self.tesseract_config = r'--oem 3 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
         
+    @metrics.timed_stage('captcha_download')
     def download_captcha_image(self, session: requests.Session, captcha_url: str) -> Optional[bytes]:
         """
         Download captcha image from the website.
@@ -33,7 +125,7 @@ class CaptchaSolver:
             Raw image bytes or None if failed
         """
         try:
-            logger.info(f"Downloading captcha from: {captcha_url}")
+            logger.info("Downloading captcha from: %s", captcha_url)
             response = session.get(captcha_url, timeout=15)
             response.raise_for_status()
             
@@ -44,9 +136,10 @@ class CaptchaSolver:
             return response.content
             
         except Exception as e:
-            logger.error(f"Error downloading captcha: {str(e)}")
+            logger.error("Error downloading captcha: %s", e)
             return None
     
+    @metrics.timed_stage('captcha_preprocess')
     def preprocess_image(self, image_bytes: bytes) -> list:
         """
         Preprocess the captcha image to improve OCR accuracy.
@@ -59,6 +152,8 @@ class CaptchaSolver:
             List of processed images as numpy arrays
         """
         try:
+            load_ocr_stack()
+            
             # Convert bytes to PIL Image
             pil_image = Image.open(io.BytesIO(image_bytes))
             
@@ -72,7 +167,7 @@ class CaptchaSolver:
             new_width = int(width * scale_factor)
             new_height = int(height * scale_factor)
             pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            logger.info(f"Resized captcha from {width}x{height} to {new_width}x{new_height}")
+            logger.info("Resized captcha from %sx%s to %sx%s", width, height, new_width, new_height)
             
             processed_images = []
             
@@ -121,11 +216,11 @@ class CaptchaSolver:
             inverted = cv2.bitwise_not(binary1)
             processed_images.append(inverted)
             
-            logger.info(f"Generated {len(processed_images)} processed image versions")
+            logger.info("Generated %s processed image versions", len(processed_images))
             return processed_images
             
         except Exception as e:
-            logger.error(f"Error preprocessing image: {str(e)}")
+            logger.error("Error preprocessing image: %s", e)
             return []
     
     def extract_text_ocr(self, processed_images: list) -> Optional[str]:
@@ -138,32 +233,47 @@ class CaptchaSolver:
         Returns:
             Extracted text or None if failed
         """
+        return self.extract_text_details(processed_images)['text']
+    
+    def extract_text_details(self, processed_images: list) -> Dict[str, Any]:
+        """
+        Extract text from multiple preprocessed images using OCR and report how.
+        
+        Args:
+            processed_images: List of preprocessed images as numpy arrays
+            
+        Returns:
+            Dictionary with the extracted ``text`` (None if failed), the
+            ``variant`` and ``config`` names that first produced it and the
+            number of ``tesseract_calls`` made
+        """
+        details = {'text': None, 'variant': None, 'config': None, 'tesseract_calls': 0}
         try:
-            # Try different OCR configurations
-            configs = [
-                r'--oem 3 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                r'--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                r'--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                r'--oem 3 --psm 13 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-                r'--oem 3 --psm 8',
-                r'--oem 3 --psm 7',
-            ]
+            load_ocr_stack()
             
             best_result = ""
             best_confidence = 0
             results_count = {}
+            # First (variant, config) that read each result
+            sources = {}
             
             # Try each processed image with each config
             for img_idx, processed_image in enumerate(processed_images):
                 pil_image = Image.fromarray(processed_image)
                 
-                for config_idx, config in enumerate(configs):
+                for config_idx, (config_name, config) in enumerate(self.OCR_CONFIGS):
                     try:
                         # Extract text
-                        text = pytesseract.image_to_string(pil_image, config=config).strip()
+                        variant = self._variant_name(img_idx)
+                        details['tesseract_calls'] += 1
+                        with metrics.timed('ocr', call='image_to_string', variant=variant, config=config_name) as span:
+                            text = pytesseract.image_to_string(pil_image, config=config).strip()
+                            span.set_attribute('text', text)
                         
                         # Get confidence
-                        data = pytesseract.image_to_data(pil_image, config=config, output_type=pytesseract.Output.DICT)
+                        details['tesseract_calls'] += 1
+                        with metrics.timed('ocr', call='image_to_data', variant=variant, config=config_name):
+                            data = pytesseract.image_to_data(pil_image, config=config, output_type=pytesseract.Output.DICT)
                         confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
                         avg_confidence = sum(confidences) / len(confidences) if confidences else 0
                         
@@ -173,8 +283,9 @@ class CaptchaSolver:
                         if len(cleaned_text) >= 3:
                             # Count occurrences of this result
                             results_count[cleaned_text] = results_count.get(cleaned_text, 0) + 1
+                            sources.setdefault(cleaned_text, (variant, config_name))
                             
-                            logger.info(f"OCR result (img {img_idx}, cfg {config_idx}): '{cleaned_text}' (confidence: {avg_confidence:.1f}%)")
+                            ocr_logger.info("OCR result (img %s, cfg %s): '%s' (confidence: %.1f%%)", img_idx, config_idx, cleaned_text, avg_confidence)
                             
                             # Track best result by confidence
                             if avg_confidence > best_confidence:
@@ -185,32 +296,44 @@ class CaptchaSolver:
                         continue
             
             # If we have multiple results, prefer the most common one
+            chosen = None
             if results_count:
                 most_common = max(results_count.items(), key=lambda x: x[1])
                 most_common_text, count = most_common
                 
                 # If a result appears multiple times and has reasonable length, prefer it
                 if count >= 2 and len(most_common_text) >= 3:
-                    logger.info(f"Using most common result: '{most_common_text}' (appeared {count} times)")
-                    return most_common_text
+                    logger.info("Using most common result: '%s' (appeared %s times)", most_common_text, count)
+                    chosen = most_common_text
                 elif best_result and len(best_result) >= 3 and best_confidence > 10:
-                    logger.info(f"Using best confidence result: '{best_result}' (confidence: {best_confidence:.1f}%)")
-                    return best_result
+                    logger.info("Using best confidence result: '%s' (confidence: %.1f%%)", best_result, best_confidence)
+                    chosen = best_result
                 elif most_common_text and len(most_common_text) >= 3:
-                    logger.info(f"Using most common result: '{most_common_text}' (appeared {count} times)")
-                    return most_common_text
+                    logger.info("Using most common result: '%s' (appeared %s times)", most_common_text, count)
+                    chosen = most_common_text
                 elif best_result and len(best_result) >= 3:
-                    logger.info(f"Using best result (low confidence): '{best_result}' (confidence: {best_confidence:.1f}%)")
-                    return best_result
+                    logger.info("Using best result (low confidence): '%s' (confidence: %.1f%%)", best_result, best_confidence)
+                    chosen = best_result
             
-            logger.warning("No reliable OCR result found")
-            return None
+            if chosen:
+                details['text'] = chosen
+                details['variant'], details['config'] = sources[chosen]
+            else:
+                logger.warning("No reliable OCR result found")
+            return details
                 
         except Exception as e:
-            logger.error(f"Error in OCR extraction: {str(e)}")
-            return None
+            logger.error("Error in OCR extraction: %s", e)
+            return details
+    
+    def _variant_name(self, index: int) -> str:
+        """Name of the preprocessed image at an index."""
+        if index < len(self.PREPROCESS_VARIANTS):
+            return self.PREPROCESS_VARIANTS[index]
+        return f"variant{index}"
     
-    def solve_captcha(self, session: requests.Session, base_url: str, captcha_image_path: str) -> Optional[str]:
+    def solve_captcha(self, session: requests.Session, base_url: str, captcha_image_path: str,
+                      on_solve: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[str]:
         """
         Complete captcha solving workflow.
         
@@ -218,48 +341,95 @@ class CaptchaSolver:
             session: Requests session with proxy configuration
             base_url: Base URL of the website
             captcha_image_path: Relative path to captcha image
+            on_solve: Called with the details of the solve once the image
+                has been read (optional)
             
         Returns:
             Solved captcha text or None if failed
         """
         try:
-            # Construct full captcha URL
-            if captcha_image_path.startswith('../../'):
-                # Handle relative paths like ../../captcha/imagebuilder.php
-                captcha_url = captcha_image_path.replace('../../', f"{base_url.rstrip('/')}/../../")
-            else:
-                captcha_url = f"{base_url.rstrip('/')}/{captcha_image_path.lstrip('/')}"
-            
-            # Handle specific case for pagafacil structure
-            if 'captcha/imagebuilder.php' in captcha_image_path:
-                captcha_url = 'https://www.pagafacil.gob.mx/pagafacilv2/captcha/imagebuilder.php'
-            
-            logger.info(f"Attempting to solve captcha from: {captcha_url}")
+            captcha_url = self.build_captcha_url(base_url, captcha_image_path)
+            logger.info("Attempting to solve captcha from: %s", captcha_url)
             
             # Download captcha image
             image_bytes = self.download_captcha_image(session, captcha_url)
             if not image_bytes:
                 return None
             
-            # Preprocess image (now returns multiple versions)
-            processed_images = self.preprocess_image(image_bytes)
-            if not processed_images:
-                return None
-            
-            # Extract text using OCR
-            captcha_text = self.extract_text_ocr(processed_images)
-            
-            if captcha_text:
-                logger.info(f"Successfully solved captcha: '{captcha_text}'")
-                return captcha_text
-            else:
-                logger.warning("Failed to solve captcha")
-                return None
+            details = self.solve_image_details(image_bytes)
+            if on_solve is not None:
+                on_solve(details)
+            return details['text']
                 
         except Exception as e:
-            logger.error(f"Error solving captcha: {str(e)}")
+            logger.error("Error solving captcha: %s", e)
             return None
     
+    def build_captcha_url(self, base_url: str, captcha_image_path: str) -> str:
+        """
+        Construct the full captcha URL from the image path on the form page.
+        
+        Args:
+            base_url: Base URL of the website
+            captcha_image_path: Relative path to captcha image
+            
+        Returns:
+            Absolute captcha image URL
+        """
+        # Resolved like the browser does, e.g. ../../captcha/imagebuilder.php
+        # from .../pagafacilv2/epago/cv/ is .../pagafacilv2/captcha/imagebuilder.php
+        return urljoin(f"{base_url.rstrip('/')}/", captcha_image_path)
+    
+    def solve_image(self, image_bytes: bytes) -> Optional[str]:
+        """
+        Run preprocessing and OCR on downloaded captcha image bytes.
+        
+        This is the CPU-bound part of a solve and does no I/O, so async
+        callers can run it in an executor.
+        
+        Args:
+            image_bytes: Raw image bytes
+            
+        Returns:
+            Solved captcha text or None if failed
+        """
+        return self.solve_image_details(image_bytes)['text']
+    
+    def solve_image_details(self, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        Run preprocessing and OCR on captcha image bytes and report the cost.
+        
+        Args:
+            image_bytes: Raw image bytes
+            
+        Returns:
+            Dictionary as returned by ``extract_text_details``, plus the
+            ``seconds`` spent preprocessing and reading the image
+        """
+        started = time.perf_counter()
+        
+        with tracing.span('captcha_solve') as span:
+            # Preprocess image (now returns multiple versions)
+            processed_images = self.preprocess_image(image_bytes)
+            if processed_images:
+                # Extract text using OCR
+                details = self.extract_text_details(processed_images)
+            else:
+                details = {'text': None, 'variant': None, 'config': None, 'tesseract_calls': 0}
+            for key in ('variant', 'config', 'tesseract_calls'):
+                span.set_attribute(key, details[key])
+            span.set_attribute('solved', details['text'] is not None)
+        details['seconds'] = round(time.perf_counter() - started, 4)
+        
+        metrics.CAPTCHA_SOLVE_SECONDS.observe(details['seconds'])
+        metrics.CAPTCHA_TESSERACT_CALLS.observe(details['tesseract_calls'])
+        
+        if details['text']:
+            logger.info("Successfully solved captcha: '%s'", details['text'])
+        else:
+            logger.warning("Failed to solve captcha")
+        return details
+    
     def save_debug_image(self, image_bytes: bytes, filename: str = "debug_captcha.png"):
         """
         Save captcha image for debugging purposes.
@@ -271,12 +441,13 @@ class CaptchaSolver:
         try:
             with open(filename, 'wb') as f:
                 f.write(image_bytes)
-            logger.info(f"Debug image saved as: {filename}")
+            logger.info("Debug image saved as: %s", filename)
         except Exception as e:
-            logger.error(f"Error saving debug image: {e}")
+            logger.error("Error saving debug image: %s", e)
             
     def get_multiple_attempts(self, session: requests.Session, base_url: str, 
-                            captcha_image_path: str, max_attempts: int = 3) -> Optional[str]:
+                            captcha_image_path: str, max_attempts: int = 3,
+                            on_solve: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[str]:
         """
         Try to solve captcha with multiple attempts.
         
@@ -285,14 +456,15 @@ class CaptchaSolver:
             base_url: Base URL
             captcha_image_path: Path to captcha image
             max_attempts: Maximum number of attempts
+            on_solve: Called with the details of every solve (optional)
             
         Returns:
             Solved captcha text or None
         """
         for attempt in range(max_attempts):
-            logger.info(f"Captcha solving attempt {attempt + 1}/{max_attempts}")
+            logger.info("Captcha solving attempt %s/%s", attempt + 1, max_attempts)
             
-            result = self.solve_captcha(session, base_url, captcha_image_path)
+            result = self.solve_captcha(session, base_url, captcha_image_path, on_solve=on_solve)
             if result and len(result) >= 3:  # More permissive length requirement
                 return result
             
@@ -300,5 +472,5 @@ class CaptchaSolver:
             import time
             time.sleep(1)
         
-        logger.warning(f"Failed to solve captcha after {max_attempts} attempts")
+        logger.warning("Failed to solve captcha after %s attempts", max_attempts)
         return None
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Bulk fleet lookup from the command line.
+
+Reads a CSV or JSON fleet file, looks every vehicle up through
+ScraperService with a bounded worker pool and appends each result to an
+NDJSON output file. A checkpoint is written after every finished vehicle,
+so an interrupted run picks up where it stopped when started again with
+the same arguments. Lookups that failed (upstream errors, as opposed to
+"not found" or invalid input) are not checkpointed and are retried by
+the next run.
+
+Usage:
+    python fleet_import.py fleet.csv --output results.ndjson [--concurrency 4]
+
+CSV files need a header with ``plate`` and ``niv`` (or ``vin``) columns;
+JSON files hold a list of ``{"plate": ..., "niv": ...}`` objects, or an
+object with such a list under ``vehicles``.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.config import Config
+from logging_config import configure_logging
+from app.services import PRIORITY_BULK
+from scraper import lookup_outcome
+from app.utils.validators import validate_vehicle_entry
+from app.utils.responses import error_payload
+
+# Configure logging
+configure_logging(Config.LOG_MODE, Config.LOG_LEVEL, Config.LOG_OCR_SAMPLE_RATE)
+
+logger = logging.getLogger('fleet_import')
+
+
+def load_fleet(path):
+    """
+    Load vehicles from a CSV or JSON file.
+
+    Args:
+        path: Path to the fleet file
+
+    Returns:
+        List of dictionaries with ``plate`` and ``niv`` keys
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            vehicles = data.get('vehicles') if isinstance(data, dict) else data
+            if not isinstance(vehicles, list):
+                raise ValueError("JSON fleet file must be a list of vehicles or contain a 'vehicles' list")
+            return vehicles
+
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        vin_field = fields.get('niv') or fields.get('vin')
+        if 'plate' not in fields or not vin_field:
+            raise ValueError("CSV fleet file needs 'plate' and 'niv' (or 'vin') columns")
+        return [
+            {'plate': (row[fields['plate']] or '').strip(), 'niv': (row[vin_field] or '').strip()}
+            for row in reader
+        ]
+
+
+def fingerprint(path):
+    """Hash of the fleet file, so a checkpoint is never applied to a different fleet."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Set of finished vehicle indexes, rewritten atomically after every finished vehicle."""
+
+    def __init__(self, path, input_fingerprint, total):
+        self.path = path
+        self.input_fingerprint = input_fingerprint
+        self.total = total
+        self.completed = set()
+
+    def load(self):
+        """
+        Load a previous checkpoint for the same fleet file.
+
+        Returns:
+            True if a matching checkpoint was found
+        """
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('fingerprint') != self.input_fingerprint:
+            raise ValueError(f"Checkpoint {self.path} belongs to a different fleet file; use --restart")
+
+        self.completed = set(data.get('completed', []))
+        return True
+
+    def mark(self, index):
+        """Record a finished vehicle and persist the checkpoint."""
+        self.completed.add(index)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.input_fingerprint,
+                'total': self.total,
+                'completed': sorted(self.completed),
+                'updated_at': time.time()
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def trim_output(path, completed):
+    """
+    Drop output lines not covered by the checkpoint.
+
+    A crash between writing a result and saving the checkpoint leaves a
+    line for a vehicle that will be looked up again; removing it keeps
+    the output free of duplicates.
+    """
+    if not os.path.exists(path):
+        return
+
+    kept = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                if json.loads(line)['index'] in completed:
+                    kept.append(line)
+            except (ValueError, KeyError):
+                continue
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(kept)
+
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def build_service(concurrency):
+    """Create a ScraperService with one pool slot per concurrent lookup."""
+    from app import create_app
+    from app.routes.vehicular import init_scraper_service
+
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config['SCRAPER_POOL_SIZE'] = concurrency
+    app = create_app(config)
+    with app.app_context():
+        return init_scraper_service()
+
+
+def main():
+    """Run the fleet import."""
+    parser = argparse.ArgumentParser(description="Look up a whole fleet of vehicles")
+    parser.add_argument('fleet', help="CSV or JSON fleet file")
+    parser.add_argument('--output', '-o', required=True, help="NDJSON file to append results to")
+    parser.add_argument('--concurrency', '-c', type=int, default=Config.BATCH_MAX_CONCURRENCY,
+                        help="Maximum concurrent lookups")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument('--restart', action='store_true', help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    vehicles = load_fleet(args.fleet)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint", fingerprint(args.fleet), len(vehicles))
+
+    if args.restart:
+        for path in (checkpoint.path, args.output):
+            if os.path.exists(path):
+                os.remove(path)
+    elif checkpoint.load():
+        trim_output(args.output, checkpoint.completed)
+        logger.info("Resuming: %s/%s vehicles already done", len(checkpoint.completed), len(vehicles))
+
+    pending = [index for index in range(len(vehicles)) if index not in checkpoint.completed]
+    if not pending:
+        logger.info("Nothing to do, every vehicle is already in the output")
+        return 0
+
+    concurrency = max(1, min(args.concurrency, len(pending)))
+    service = build_service(concurrency)
+
+    def lookup(index):
+        """Look a vehicle up; returns the output line and whether it is final."""
+        validation = validate_vehicle_entry(vehicles[index], strict_vin=Config.VIN_STRICT_VALIDATION)
+        if not validation['valid']:
+            # Invalid input fails the same way every time, so it counts as done
+            result = error_payload(validation['message'])
+            final = True
+        else:
+            result = service.get_vehicle_info(validation['plate'], validation['vin'], priority=PRIORITY_BULK)
+            final = lookup_outcome(result) != 'error'
+        line = {
+            "index": index,
+            "plate": validation['plate'],
+            "niv": validation['vin'],
+            "result": result
+        }
+        return line, final
+
+    logger.info("Looking up %s vehicles with concurrency %s", len(pending), concurrency)
+    started = time.time()
+    done = 0
+    ok = 0
+    failed = 0
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fleet')
+    try:
+        futures = [executor.submit(lookup, index) for index in pending]
+        with open(args.output, 'a', encoding='utf-8') as output:
+            for future in as_completed(futures):
+                line, final = future.result()
+                output.write(json.dumps(line, ensure_ascii=False) + "\n")
+                output.flush()
+                if final:
+                    checkpoint.mark(line['index'])
+                else:
+                    # Left out of the checkpoint: the next run drops this
+                    # line from the output and looks the vehicle up again
+                    failed += 1
+
+                done += 1
+                ok += line['result'].get('codigo') == 'ok'
+                elapsed = time.time() - started
+                rate = done / elapsed if elapsed else 0.0
+                remaining = len(pending) - done
+                eta = remaining / rate if rate else 0.0
+                logger.info(
+                    "[%s/%s] %s: %s | %.1f vehicles/min | ETA %s",
+                    len(checkpoint.completed), len(vehicles), line['plate'],
+                    line['result'].get('codigo'), rate * 60, format_duration(eta)
+                )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; %s/%s done, rerun to resume", len(checkpoint.completed), len(vehicles))
+        executor.shutdown(wait=False, cancel_futures=True)
+        return 130
+
+    executor.shutdown()
+    elapsed = time.time() - started
+    logger.info(
+        "Finished %s vehicles (%s ok) in %s, %.1f vehicles/min",
+        done, ok, format_duration(elapsed), done / elapsed * 60 if elapsed else 0.0
+    )
+    if failed:
+        logger.warning("%s lookups failed and were not checkpointed; rerun to retry them", failed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Gunicorn configuration with worker profiles for the scraper API.
+
+Choose a profile with ``GUNICORN_PROFILE``:
+
+- ``sync``: one request per process. Each worker is blocked for the whole
+  upstream lookup, so throughput is roughly workers / latency.
+- ``gthread`` (default): one process per core, each with enough threads to
+  keep the core busy while most lookups wait on the network.
+- ``gevent``: one process per core with cooperative greenlets; needs the
+  ``gevent`` package. OCR still blocks its worker while it runs.
+
+Sizes come from the core count, the expected upstream latency
+(``UPSTREAM_EXPECTED_LATENCY``) and the CPU time a lookup spends parsing
+and solving the captcha (``REQUEST_CPU_SECONDS``). ``WEB_CONCURRENCY``,
+``GUNICORN_THREADS`` and ``GUNICORN_WORKER_CONNECTIONS`` override them.
+
+With ``GUNICORN_PRELOAD=true`` the master imports the app and warms up the
+OCR stack, Tesseract and the HTML parsers once, then forks workers that
+share those pages copy-on-write and start ready. Otherwise each worker
+warms up in a background thread and reports not-ready on ``/health``
+until it is done.
+
+Prometheus samples are written to ``PROMETHEUS_MULTIPROC_DIR`` (by default
+a ``pagafacil-metrics`` directory under the system temp directory) so that
+``/metrics`` on any worker reports the totals of all of them.
+
+Usage:
+    gunicorn -c gunicorn_config.py "app:create_app()"
+"""
+import gc
+import math
+import multiprocessing
+import os
+import tempfile
+
+PROFILES = ('sync', 'gthread', 'gevent')
+
+
+def available_cores():
+    """Number of cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def build_profile(name, cores, latency=11.0, cpu_seconds=0.5, max_threads=32, max_connections=1000):
+    """
+    Compute gunicorn settings for a worker profile.
+
+    A core can work on one lookup while others wait on the network, so it
+    needs about ``(latency + cpu_seconds) / cpu_seconds`` lookups in
+    flight to stay busy (Little's law).
+
+    Args:
+        name: Profile name (``sync``, ``gthread`` or ``gevent``)
+        cores: Number of CPU cores
+        latency: Expected seconds a lookup waits on pagafacil
+        cpu_seconds: Expected CPU seconds per lookup
+        max_threads: Upper bound on threads per gthread worker
+        max_connections: Upper bound on connections per gevent worker
+
+    Returns:
+        Dictionary of gunicorn settings
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown gunicorn profile '{name}', expected one of {', '.join(PROFILES)}")
+
+    cores = max(1, cores)
+    in_flight_per_core = max(1, math.ceil((latency + cpu_seconds) / cpu_seconds))
+
+    # A lookup may retry the whole form cycle, so allow several latencies
+    timeout = max(30, math.ceil(latency * 4))
+    profile = {
+        'worker_class': name,
+        'workers': max(2, cores),
+        'threads': 1,
+        'worker_connections': 1000,
+        'timeout': timeout,
+        'graceful_timeout': timeout
+    }
+
+    if name == 'sync':
+        profile['workers'] = 2 * cores + 1
+    elif name == 'gthread':
+        profile['threads'] = min(max_threads, in_flight_per_core)
+    else:
+        # Headroom beyond the scraping lookups for cheap cache hits and 304s
+        profile['worker_connections'] = min(max_connections, in_flight_per_core * 8)
+
+    return profile
+
+
+_profile = build_profile(
+    os.getenv('GUNICORN_PROFILE', 'gthread'),
+    available_cores(),
+    latency=float(os.getenv('UPSTREAM_EXPECTED_LATENCY', '11')),
+    cpu_seconds=float(os.getenv('REQUEST_CPU_SECONDS', '0.5'))
+)
+
+# Gunicorn settings
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = _profile['worker_class']
+workers = int(os.getenv('WEB_CONCURRENCY', _profile['workers']))
+threads = int(os.getenv('GUNICORN_THREADS', _profile['threads']))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', _profile['worker_connections']))
+timeout = _profile['timeout']
+graceful_timeout = _profile['graceful_timeout']
+keepalive = 5
+accesslog = '-'
+
+# gevent patches the standard library only after the fork, so modules
+# preloaded in the master would keep unpatched locks; workers warm up
+# synchronously on boot instead
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true' and worker_class != 'gevent'
+
+# Set in the master before the app is loaded, so every worker shares it
+metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'pagafacil-metrics'))
+raw_env = [f"PROMETHEUS_MULTIPROC_DIR={metrics_dir}"]
+
+
+def on_starting(server):
+    """Drop metric files left by workers of a previous run."""
+    import metrics
+    metrics.clear_stale_files(metrics_dir)
+
+
+def when_ready(server):
+    """Freeze the preloaded heap so the workers' garbage collector leaves its pages shared."""
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info("Preloaded app, %s objects frozen before forking", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Log whether a worker starts warm."""
+    if preload_app:
+        from app.warmup import readiness
+        state = readiness()
+        server.log.info(
+            "Worker %s forked %s, warmed up in master %s",
+            worker.pid, 'ready' if state['ready'] else 'not ready', state['warmed_in_pid']
+        )
+
+
+def child_exit(server, worker):
+    """Stop reporting a dead worker's gauges; its counters and histograms still count."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)
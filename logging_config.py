@@ -0,0 +1,120 @@
+"""
+Logging setup for the web app, job workers and CLI tools.
+
+Two modes, chosen with ``LOG_MODE``:
+
+- ``verbose`` (default): every step of every lookup is logged from the
+  thread doing the lookup, as during development.
+- ``production``: the per-step loggers of the scraper, captcha solver and
+  service layer only pass warnings; each lookup is instead described by
+  one summary line (``scraper.summary``), and only a sample of the
+  per-Tesseract-call lines (``captcha_solver.ocr``) is kept. Records go
+  through a queue to a listener thread, so formatting and writing to
+  stderr happen off the request thread.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Loggers that write one or more lines per lookup step
+HOT_PATH_LOGGERS = (
+    'scraper',
+    'async_scraper',
+    'captcha_solver',
+    'app.services.scraper_service',
+    'app.services.async_scraper_service'
+)
+SUMMARY_LOGGER = 'scraper.summary'
+OCR_LOGGER = 'captcha_solver.ocr'
+
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """Pass a random fraction of records; warnings and errors always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for a listener thread in the same process.
+
+    The stock handler formats every record before queueing it so that it
+    can be pickled; within one process the record can be queued as is and
+    formatted by the listener.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Render the traceback now rather than keep the frames alive
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(mode='verbose', level='INFO', ocr_sample_rate=0.05):
+    """
+    Configure the root logger once per process.
+
+    Does nothing if the root logger already has handlers, e.g. when an
+    entry point configured logging before creating the app.
+
+    Args:
+        mode: ``verbose`` or ``production``
+        level: Root log level name
+        ocr_sample_rate: Fraction of per-OCR-call lines kept in production mode
+    """
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.setLevel(level)
+
+    if mode != 'production':
+        root.addHandler(stream)
+        return
+
+    log_queue = queue.SimpleQueue()
+    handler = LocalQueueHandler(log_queue)
+    root.addHandler(handler)
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    # A forked gunicorn worker inherits the queue but not the listener thread
+    os.register_at_fork(after_in_child=lambda: _restart_listener(handler, stream))
+
+    for name in HOT_PATH_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    logging.getLogger(SUMMARY_LOGGER).setLevel(logging.INFO)
+    ocr_logger = logging.getLogger(OCR_LOGGER)
+    ocr_logger.setLevel(logging.INFO)
+    ocr_logger.addFilter(SamplingFilter(ocr_sample_rate))
+
+
+def _restart_listener(handler, stream):
+    global _listener
+    log_queue = queue.SimpleQueue()
+    handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    """Write out queued records before the process exits."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
@@ -0,0 +1,141 @@
+"""
+Prometheus metrics for lookups against Paga Fácil.
+
+Each step of a lookup is timed into one histogram labelled by stage:
+
+- ``form_get``, ``form_parse``: fetching and parsing the form page
+- ``captcha_download``, ``captcha_preprocess``, ``ocr``: solving the
+  captcha (``ocr`` is observed once per Tesseract call)
+- ``submit``: posting the form
+- ``classify``: checking the response for a rejected captcha
+- ``result_parse``: parsing vehicle and tax information
+
+Inside a request trace every timed stage is also recorded as a span.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set before this module is imported,
+every process writes its samples to files there and ``render`` sums them,
+so ``/metrics`` on any gunicorn worker reports the whole server.
+"""
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+import tracing
+
+_multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if _multiproc_dir:
+    # prometheus_client opens its sample files here as soon as a metric is created
+    os.makedirs(_multiproc_dir, exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Sub-millisecond parsing up to form cycles with slow upstream responses
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+LOOKUP_BUCKETS = (0.5, 1.0, 2.5, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0)
+
+STAGE_SECONDS = Histogram(
+    'pagafacil_stage_seconds', 'Time spent in each step of an upstream lookup',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+LOOKUP_SECONDS = Histogram(
+    'pagafacil_lookup_seconds', 'Time for a complete upstream lookup',
+    ['outcome'], buckets=LOOKUP_BUCKETS
+)
+ATTEMPTS = Counter('pagafacil_form_attempts_total', 'Form cycles (form page, captcha, submit) started')
+CAPTCHA_REJECTIONS = Counter('pagafacil_captcha_rejections_total', 'Submissions refused for a wrong captcha')
+ATTEMPT_ERRORS = Counter('pagafacil_attempt_errors_total', 'Form cycles that raised, by exception type', ['error'])
+CAPTCHA_SOLVE_SECONDS = Histogram(
+    'pagafacil_captcha_solve_seconds', 'Preprocessing and OCR time per captcha image',
+    buckets=STAGE_BUCKETS
+)
+CAPTCHA_TESSERACT_CALLS = Histogram(
+    'pagafacil_captcha_tesseract_calls', 'Tesseract calls per captcha image',
+    buckets=(1, 2, 5, 10, 20, 30, 40, 60, 80)
+)
+CAPTCHA_SUBMISSIONS = Counter(
+    'pagafacil_captcha_submissions_total', 'Submitted captcha answers by the variant and config that read them',
+    ['variant', 'config', 'accepted']
+)
+UPSTREAM_RESPONSES = Counter(
+    'pagafacil_upstream_responses_total', 'HTTP responses from pagafacil by method and status code',
+    ['method', 'status']
+)
+
+
+@contextmanager
+def timed(stage, **attributes):
+    """
+    Observe the duration of a ``with`` block as a lookup stage.
+
+    Args:
+        stage: Stage label, also used as the span name
+        **attributes: Span attributes
+
+    Yields:
+        The stage's trace span (a no-op outside a trace)
+    """
+    started = time.perf_counter()
+    try:
+        with tracing.span(stage, **attributes) as span:
+            yield span
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def timed_stage(stage):
+    """Decorator observing every call of a function as a lookup stage."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_response(response, *args, **kwargs):
+    """Count an upstream response; usable as a ``requests`` response hook."""
+    UPSTREAM_RESPONSES.labels(response.request.method, str(response.status_code)).inc()
+
+
+def render():
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body bytes, content type)
+    """
+    if _multiproc_dir:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def clear_stale_files(directory):
+    """
+    Remove sample files left by processes that are no longer running.
+
+    Files are named ``<type>_<pid>.db``; those of live processes (such as
+    job workers sharing the directory) are kept.
+
+    Args:
+        directory: Multiprocess metrics directory
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        pid = stem.rpartition('_')[2]
+        if ext != '.db' or not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            os.remove(os.path.join(directory, name))
+        except PermissionError:
+            # Alive, owned by another user
+            pass
@@ -3,19 +3,115 @@ Scraper module for Paga Fácil vehicle tax information.
 """
 import requests
 from bs4 import BeautifulSoup
+import contextvars
 import re
-from typing import Dict, List, Optional, Any
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Any
 from urllib.parse import urljoin
 import logging
+import metrics
+import tracing
 from captcha_solver import CaptchaSolver
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# One line per lookup; stays on in production logging mode, where the step logs are off
+summary_logger = logging.getLogger(f"{__name__}.summary")
+
+# Event counts of the lookup running in this context, for its summary line
+_lookup_counts = contextvars.ContextVar('lookup_counts', default=None)
+
+# Message returned when pagafacil has no record for the plate/VIN pair
+NOT_FOUND_MESSAGE = "Verifique los datos que ingreso, no se encontró registro de este vehículo."
+
+# Live site; BASE_URL/FORM_URL override these, e.g. to point at tests/fake_upstream.py
+DEFAULT_BASE_URL = "https://www.pagafacil.gob.mx/pagafacilv2/epago/cv/"
+DEFAULT_FORM_URL = "control_vehicular_25.php"
+
+# Phrases in a submit response that mean the captcha solution was wrong
+CAPTCHA_ERROR_INDICATORS = (
+    'codigo de seguridad incorrecto',
+    'captcha incorrecto',
+    'codigo incorrecto',
+    'verifique el codigo'
+)
+
+
+def warm_up_parser() -> None:
+    """Parse a small page with both HTML parsers so their first real use is not slower."""
+    page = '<html><body><form name="form1"><input type="hidden" name="t" value="1"></form></body></html>'
+    for parser in ('lxml', 'html.parser'):
+        BeautifulSoup(page, parser).find_all('form')
+
+
+def is_not_found(result: Dict[str, Any]) -> bool:
+    """Check whether a result is the upstream "no record found" error."""
+    return result.get('codigo') == 'error' and (result.get('error') or {}).get('mensaje') == NOT_FOUND_MESSAGE
+
+
+def lookup_outcome(result: Dict[str, Any]) -> str:
+    """Classify a result as ``ok``, ``not_found`` or ``error`` for metrics."""
+    if result.get('codigo') == 'ok':
+        return 'ok'
+    return 'not_found' if is_not_found(result) else 'error'
+
+
+def count_lookup_event(name: str, amount: int = 1) -> None:
+    """Add to an event count of the lookup running in this context, if any."""
+    counts = _lookup_counts.get()
+    if counts is not None:
+        counts[name] = counts.get(name, 0) + amount
+
+
+@contextmanager
+def lookup_event_counts() -> Iterator[Dict[str, int]]:
+    """
+    Collect the ``count_lookup_event`` counts of one lookup.
+
+    Works for threads and asyncio tasks alike, since each runs in its own
+    context.
+
+    Yields:
+        Dictionary of event counts, filled in while the block runs
+    """
+    counts = {}
+    token = _lookup_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _lookup_counts.reset(token)
+
+
+class RateLimitedSession(requests.Session):
+    """Session that takes a token from a rate limiter before every request."""
+    
+    # Status codes pagafacil answers with when it is throttling us
+    THROTTLED_STATUS_CODES = (429, 503)
+    
+    def __init__(self, rate_limiter):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+    
+    def request(self, method, url, *args, **kwargs):
+        self.rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.Timeout:
+            self.rate_limiter.observe(time.monotonic() - started, throttled=True)
+            raise
+        self.rate_limiter.observe(
+            time.monotonic() - started,
+            throttled=response.status_code in self.THROTTLED_STATUS_CODES
+        )
+        return response
+
 
 class PagaFacilScraper:
     """Scraper for Paga Fácil vehicle tax website."""
     
-    def __init__(self, proxy_host: str = None, proxy_port: int = None, proxy_username: str = None, proxy_password: str = None):
+    def __init__(self, proxy_host: str = None, proxy_port: int = None, proxy_username: str = None, proxy_password: str = None,
+                 rate_limiter=None, captcha_telemetry=None, base_url: str = None, form_url: str = None):
         """
         Initialize the scraper with optional proxy configuration.
         
@@ -24,16 +120,23 @@ class PagaFacilScraper:
             proxy_port: Proxy server port (optional)
             proxy_username: Proxy authentication username (optional)
             proxy_password: Proxy authentication password (optional)
+            rate_limiter: Limiter consulted before every request to the site,
+                covering form GETs, captcha downloads and submits (optional)
+            captcha_telemetry: Store recording every captcha solve and
+                whether the site accepted it (optional)
+            base_url: Directory of the form page (optional, defaults to
+                pagafacil.gob.mx; point it at a fake upstream for load tests)
+            form_url: Form page, relative to ``base_url`` (optional)
         """
-        self.base_url = "https://www.pagafacil.gob.mx/pagafacilv2/epago/cv/"
-        self.form_url = "control_vehicular_25.php"
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.form_url = form_url or DEFAULT_FORM_URL
         
         # Configure session
-        self.session = requests.Session()
+        self.session = RateLimitedSession(rate_limiter) if rate_limiter else requests.Session()
         
         # Configure proxy if provided
         if proxy_host and proxy_port and proxy_username and proxy_password:
-            logger.info(f"Using proxy: {proxy_host}:{proxy_port}")
+            logger.info("Using proxy: %s:%s", proxy_host, proxy_port)
             self.proxies = {
                 'http': f'http://{proxy_username}:{proxy_password}@{proxy_host}:{proxy_port}',
                 'https': f'http://{proxy_username}:{proxy_password}@{proxy_host}:{proxy_port}'
@@ -43,12 +146,16 @@ class PagaFacilScraper:
             logger.info("No proxy configured, using direct connection")
             self.proxies = None
         
+        # Count every upstream response by status code
+        self.session.hooks['response'].append(metrics.record_response)
+        
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
         
         # Initialize captcha solver
         self.captcha_solver = CaptchaSolver()
+        self.captcha_telemetry = captcha_telemetry
 
     def get_form_data(self) -> tuple:
         """
@@ -59,13 +166,32 @@ class PagaFacilScraper:
         """
         try:
             url = urljoin(self.base_url, self.form_url)
-            logger.info(f"Fetching form data from: {url}")
+            logger.info("Fetching form data from: %s", url)
             
-            response = self.session.get(url, timeout=30)
+            with metrics.timed('form_get'):
+                response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
+            return self.parse_form_page(response.content)
+            
+        except Exception as e:
+            logger.error("Error getting form data: %s", e)
+            raise
+
+    @metrics.timed_stage('form_parse')
+    def parse_form_page(self, page: bytes) -> tuple:
+        """
+        Extract the vehicle form fields and captcha image from the form page.
+        
+        Args:
+            page: Raw bytes of the form page
+            
+        Returns:
+            Tuple of (form data dictionary, captcha image path)
+        """
+        try:
             # Handle BOM and encoding issues
-            content = response.content.decode('utf-8-sig', errors='ignore')
+            content = page.decode('utf-8-sig', errors='ignore')
             # Try lxml parser which is more robust
             try:
                 soup = BeautifulSoup(content, 'lxml')
@@ -73,9 +199,9 @@ class PagaFacilScraper:
                 soup = BeautifulSoup(content, 'html.parser')
             
             # Debug: log page content size and forms found
-            logger.info(f"Page size: {len(response.text)} characters")
+            logger.info("Page size: %s characters", len(content))
             all_forms = soup.find_all('form')
-            logger.info(f"Total forms found: {len(all_forms)}")
+            logger.info("Total forms found: %s", len(all_forms))
             
             # Find the main form (the one with plate and VIN inputs)
             form = soup.find('form', id='pide_placa')
@@ -92,7 +218,7 @@ class PagaFacilScraper:
             if not form:
                 # Final debug: show what forms we did find
                 for i, f in enumerate(all_forms):
-                    logger.info(f"Form {i+1}: id={f.get('id')}, class={f.get('class')}")
+                    logger.info("Form %s: id=%s, class=%s", i+1, f.get('id'), f.get('class'))
                 raise ValueError("Could not find vehicle form on page")
             
             form_data = {}
@@ -132,7 +258,7 @@ class PagaFacilScraper:
             captcha_imgs = soup.find_all('img', src=lambda x: x and ('captcha' in x.lower() or 'imagebuilder' in x.lower()))
             if captcha_imgs:
                 captcha_image_path = captcha_imgs[0].get('src')
-                logger.info(f"Found captcha image: {captcha_image_path}")
+                logger.info("Found captcha image: %s", captcha_image_path)
                 
                 # Also get the captcha hidden field from the captcha form
                 captcha_form = soup.find('form', id='captcha_gen')
@@ -142,11 +268,11 @@ class PagaFacilScraper:
                         form_data['codigo_gen'] = captcha_hidden.get('value', '')
                         logger.info("Added captcha hidden field to form data")
             
-            logger.info(f"Form data extracted: {list(form_data.keys())}")
+            logger.info("Form data extracted: %s", list(form_data.keys()))
             return form_data, captcha_image_path
             
         except Exception as e:
-            logger.error(f"Error getting form data: {str(e)}")
+            logger.error("Error parsing form page: %s", e)
             raise
 
     def submit_vehicle_query(self, plate: str, vin: str) -> str:
@@ -163,94 +289,193 @@ class PagaFacilScraper:
         max_attempts = 3
         
         for attempt in range(max_attempts):
-            try:
-                logger.info(f"Attempt {attempt + 1}/{max_attempts} to submit query for plate: {plate}, VIN: {vin}")
-                
-                # Get initial form data and captcha image path
-                form_data, captcha_image_path = self.get_form_data()
-                
-                # Solve captcha if present
-                if captcha_image_path:
-                    logger.info("Captcha detected, attempting to solve...")
-                    captcha_text = self.captcha_solver.get_multiple_attempts(
-                        self.session, self.base_url, captcha_image_path, max_attempts=2
-                    )
+            with tracing.span('attempt', number=attempt + 1) as span:
+                try:
+                    logger.info("Attempt %s/%s to submit query for plate: %s, VIN: %s", attempt + 1, max_attempts, plate, vin)
+                    metrics.ATTEMPTS.inc()
+                    count_lookup_event('attempts')
+                    
+                    # Get initial form data and captcha image path
+                    form_data, captcha_image_path = self.get_form_data()
+                    answer = None
                     
-                    if not captcha_text:
-                        logger.warning(f"Failed to solve captcha on attempt {attempt + 1}")
+                    # Solve captcha if present
+                    if captcha_image_path:
+                        logger.info("Captcha detected, attempting to solve...")
+                        solves = []
+                        captcha_text = self.captcha_solver.get_multiple_attempts(
+                            self.session, self.base_url, captcha_image_path, max_attempts=2,
+                            on_solve=solves.append
+                        )
+                        answer = self.record_captcha_solves(solves)
+                        
+                        if not captcha_text:
+                            logger.warning("Failed to solve captcha on attempt %s", attempt + 1)
+                            span.set_attribute('outcome', 'captcha_unsolved')
+                            if attempt < max_attempts - 1:
+                                continue
+                            else:
+                                raise ValueError("Unable to solve captcha after multiple attempts")
+                        
+                        # Add captcha text to form data
+                        form_data['codigo_usr'] = captcha_text
+                        logger.info("Using captcha solution: %s", captcha_text)
+                    else:
+                        logger.info("No captcha detected")
+                    
+                    # Update form data with vehicle information
+                    self.fill_vehicle_fields(form_data, plate, vin)
+                    
+                    # Submit form
+                    url = urljoin(self.base_url, self.form_url)
+                    with metrics.timed('submit'):
+                        response = self.session.post(url, data=form_data, timeout=30)
+                    response.raise_for_status()
+                    
+                    # Check if submission was successful (not a captcha error)
+                    if self.is_captcha_rejected(response.text):
+                        logger.warning("Captcha validation failed on attempt %s", attempt + 1)
+                        metrics.CAPTCHA_REJECTIONS.inc()
+                        count_lookup_event('captcha_rejections')
+                        self.record_captcha_submission(answer, accepted=False)
+                        span.set_attribute('outcome', 'captcha_rejected')
                         if attempt < max_attempts - 1:
                             continue
                         else:
-                            raise ValueError("Unable to solve captcha after multiple attempts")
+                            logger.error("All captcha attempts failed")
+                            # Return the response anyway for error handling
+                            return response.text
                     
-                    # Add captcha text to form data
-                    form_data['codigo_usr'] = captcha_text
-                    logger.info(f"Using captcha solution: {captcha_text}")
-                else:
-                    logger.info("No captcha detected")
-                
-                # Update form data with vehicle information
-                # Based on the actual form fields found
-                plate_fields = ['placa', 'placas', 'plate', 'license_plate', 'matricula']
-                vin_fields = ['numserie', 'vin', 'niv', 'numero_identificacion', 'serie']
-                
-                # Try to find the correct field names
-                plate_set = False
-                for field in plate_fields:
-                    if field in form_data:
-                        form_data[field] = plate
-                        plate_set = True
-                        break
-                
-                if not plate_set:
-                    # If no matching field found, try common patterns
-                    form_data['placa'] = plate
-                
-                vin_set = False
-                for field in vin_fields:
-                    if field in form_data:
-                        form_data[field] = vin
-                        vin_set = True
-                        break
-                
-                if not vin_set:
-                    # If no matching field found, try common patterns - based on form analysis, use 'numserie'
-                    form_data['numserie'] = vin
-                    form_data['niv'] = vin
-                
-                # Submit form
-                url = urljoin(self.base_url, self.form_url)
-                response = self.session.post(url, data=form_data, timeout=30)
-                response.raise_for_status()
-                
-                # Check if submission was successful (not a captcha error)
-                response_text = response.text.lower()
-                captcha_error_indicators = [
-                    'codigo de seguridad incorrecto',
-                    'captcha incorrecto',
-                    'codigo incorrecto',
-                    'verifique el codigo'
-                ]
-                
-                if any(indicator in response_text for indicator in captcha_error_indicators):
-                    logger.warning(f"Captcha validation failed on attempt {attempt + 1}")
+                    logger.info("Successfully submitted form on attempt %s", attempt + 1)
+                    self.record_captcha_submission(answer, accepted=True)
+                    span.set_attribute('outcome', 'submitted')
+                    return response.text
+                    
+                except Exception as e:
+                    logger.error("Error on attempt %s: %s", attempt + 1, e)
+                    metrics.ATTEMPT_ERRORS.labels(type(e).__name__).inc()
+                    count_lookup_event('errors')
+                    span.record_error(e)
                     if attempt < max_attempts - 1:
                         continue
                     else:
-                        logger.error("All captcha attempts failed")
-                        # Return the response anyway for error handling
-                        return response.text
-                
-                logger.info(f"Successfully submitted form on attempt {attempt + 1}")
-                return response.text
-                
-            except Exception as e:
-                logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
-                if attempt < max_attempts - 1:
-                    continue
-                else:
-                    raise
+                        raise
+
+    def record_captcha_solves(self, solves: list) -> Optional[tuple]:
+        """
+        Record the captcha solves of one form cycle.
+        
+        Args:
+            solves: Solve details in order; the last one is the answer submitted
+            
+        Returns:
+            Tuple of (answer solve details, telemetry row id), or None if
+            no image was read
+        """
+        solve_id = None
+        for solve in solves:
+            count_lookup_event('captcha_solves')
+            count_lookup_event('tesseract_calls', solve['tesseract_calls'])
+            if self.captcha_telemetry is not None:
+                solve_id = self.captcha_telemetry.record_solve(solve)
+        return (solves[-1], solve_id) if solves else None
+    
+    def record_captcha_submission(self, answer: Optional[tuple], accepted: bool) -> None:
+        """
+        Record whether the site accepted a submitted captcha answer.
+        
+        Args:
+            answer: Value returned by ``record_captcha_solves``
+            accepted: False if the site rejected the captcha
+        """
+        if answer is None or not answer[0]['text']:
+            return
+        solve, solve_id = answer
+        metrics.CAPTCHA_SUBMISSIONS.labels(solve['variant'], solve['config'], str(accepted).lower()).inc()
+        if self.captcha_telemetry is not None:
+            self.captcha_telemetry.record_submission(solve_id, accepted)
+    
+    def probe(self) -> Dict[str, Any]:
+        """
+        Check that the site works without querying a vehicle.
+        
+        Fetches and parses the form page, then downloads and solves one
+        captcha, timing each step. Nothing is submitted.
+        
+        Returns:
+            Dictionary with step timings and whether the captcha was solved
+            
+        Raises:
+            Exception: If the form page cannot be fetched or parsed
+        """
+        started = time.monotonic()
+        _, captcha_image_path = self.get_form_data()
+        form_seconds = time.monotonic() - started
+        
+        result = {
+            'form_seconds': round(form_seconds, 3),
+            'captcha_seconds': None,
+            'captcha_solved': None
+        }
+        if captcha_image_path:
+            started = time.monotonic()
+            captcha_text = self.captcha_solver.solve_captcha(self.session, self.base_url, captcha_image_path)
+            result['captcha_seconds'] = round(time.monotonic() - started, 3)
+            result['captcha_solved'] = bool(captcha_text)
+        return result
+
+    def fill_vehicle_fields(self, form_data: Dict[str, str], plate: str, vin: str) -> None:
+        """
+        Put the plate and VIN into the matching form fields.
+        
+        Args:
+            form_data: Form fields from ``parse_form_page``, updated in place
+            plate: License plate number
+            vin: Vehicle Identification Number
+        """
+        # Based on the actual form fields found
+        plate_fields = ['placa', 'placas', 'plate', 'license_plate', 'matricula']
+        vin_fields = ['numserie', 'vin', 'niv', 'numero_identificacion', 'serie']
+        
+        # Try to find the correct field names
+        plate_set = False
+        for field in plate_fields:
+            if field in form_data:
+                form_data[field] = plate
+                plate_set = True
+                break
+        
+        if not plate_set:
+            # If no matching field found, try common patterns
+            form_data['placa'] = plate
+        
+        vin_set = False
+        for field in vin_fields:
+            if field in form_data:
+                form_data[field] = vin
+                vin_set = True
+                break
+        
+        if not vin_set:
+            # If no matching field found, try common patterns - based on form analysis, use 'numserie'
+            form_data['numserie'] = vin
+            form_data['niv'] = vin
+
+    @metrics.timed_stage('classify')
+    def is_captcha_rejected(self, html_content: str) -> bool:
+        """
+        Check whether a submit response is a captcha validation error.
+        
+        Args:
+            html_content: HTML response from the form submission
+            
+        Returns:
+            True if the site rejected the captcha solution
+        """
+        response_text = html_content.lower()
+        return any(indicator in response_text for indicator in CAPTCHA_ERROR_INDICATORS)
 
+    @metrics.timed_stage('result_parse')
     def parse_vehicle_info(self, html_content: str) -> Dict[str, Any]:
         """
         Parse vehicle information from HTML response.
@@ -280,7 +505,7 @@ class PagaFacilScraper:
                         "codigo": "error",
                         "info": None,
                         "error": {
-                            "mensaje": "Verifique los datos que ingreso, no se encontró registro de este vehículo."
+                            "mensaje": NOT_FOUND_MESSAGE
                         }
                     }
             
@@ -308,7 +533,7 @@ class PagaFacilScraper:
             return result
             
         except Exception as e:
-            logger.error(f"Error parsing vehicle info: {str(e)}")
+            logger.error("Error parsing vehicle info: %s", e)
             return {
                 "codigo": "error",
                 "info": None,
@@ -432,7 +657,7 @@ class PagaFacilScraper:
                     tax_info.append(tax_entry)
                     
                 except (ValueError, IndexError) as e:
-                    logger.warning(f"Error parsing tax row: {e}")
+                    logger.warning("Error parsing tax row: %s", e)
                     continue
         
         # Sort by period (most recent first)
@@ -440,6 +665,7 @@ class PagaFacilScraper:
         
         return tax_info
 
+    @tracing.traced('scraper_lookup')
     def get_vehicle_info(self, plate: str, vin: str) -> Dict[str, Any]:
         """
         Get complete vehicle information including taxes.
@@ -451,28 +677,70 @@ class PagaFacilScraper:
         Returns:
             Dictionary containing vehicle information and taxes
         """
-        try:
-            # Clean inputs
-            plate = plate.strip().upper()
-            vin = vin.strip().upper()
-            
-            logger.info(f"Getting vehicle info for plate: {plate}, VIN: {vin}")
-            
-            # Submit query and get response
-            html_content = self.submit_vehicle_query(plate, vin)
-            
-            # Parse the response
-            result = self.parse_vehicle_info(html_content)
-            
-            logger.info(f"Query result: {result['codigo']}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error getting vehicle info: {str(e)}")
-            return {
-                "codigo": "error",
-                "info": None,
-                "error": {
-                    "mensaje": f"Error processing request: {str(e)}"
+        started = time.perf_counter()
+        with lookup_event_counts() as counts:
+            try:
+                # Clean inputs
+                plate = plate.strip().upper()
+                vin = vin.strip().upper()
+                
+                logger.info("Getting vehicle info for plate: %s, VIN: %s", plate, vin)
+                
+                # Submit query and get response
+                html_content = self.submit_vehicle_query(plate, vin)
+                
+                # Parse the response
+                result = self.parse_vehicle_info(html_content)
+                
+                logger.info("Query result: %s", result['codigo'])
+                
+            except Exception as e:
+                logger.error("Error getting vehicle info: %s", e)
+                result = {
+                    "codigo": "error",
+                    "info": None,
+                    "error": {
+                        "mensaje": f"Error processing request: {str(e)}"
+                    }
                 }
-            }
\ No newline at end of file
+        
+        seconds = time.perf_counter() - started
+        outcome = lookup_outcome(result)
+        metrics.LOOKUP_SECONDS.labels(outcome).observe(seconds)
+        tracing.annotate(outcome=outcome)
+        self.log_lookup_summary(plate, vin, outcome, seconds, counts)
+        return result
+    
+    def log_lookup_summary(self, plate: str, vin: str, outcome: str, seconds: float, counts: Dict[str, int]) -> None:
+        """
+        Log one structured line describing a finished lookup.
+        
+        The fields are also attached to the record as ``lookup`` for
+        handlers that emit JSON.
+        
+        Args:
+            plate: License plate number
+            vin: Vehicle Identification Number
+            outcome: ``ok``, ``not_found`` or ``error``
+            seconds: Duration of the lookup
+            counts: Events counted with ``count_lookup_event``
+        """
+        if not summary_logger.isEnabledFor(logging.INFO):
+            return
+        summary = {
+            'plate': plate,
+            'vin': vin,
+            'outcome': outcome,
+            'seconds': round(seconds, 3),
+            'attempts': counts.get('attempts', 0),
+            'captcha_solves': counts.get('captcha_solves', 0),
+            'captcha_rejections': counts.get('captcha_rejections', 0),
+            'tesseract_calls': counts.get('tesseract_calls', 0),
+            'errors': counts.get('errors', 0),
+            'trace_id': tracing.current_trace_id()
+        }
+        summary_logger.info(
+            "lookup plate=%s vin=%s outcome=%s seconds=%.3f attempts=%d captcha_solves=%d "
+            "captcha_rejections=%d tesseract_calls=%d errors=%d trace_id=%s",
+            *summary.values(), extra={'lookup': summary}
+        )
\ No newline at end of file
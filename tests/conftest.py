@@ -0,0 +1,52 @@
+"""
+Pytest fixtures for the offline tests that build the application.
+
+Every app gets its files under the test's ``tmp_path`` and starts without
+warm-up or the upstream probe; the module globals the routes keep are
+reset after each test.
+"""
+import pytest
+
+from app import create_app
+from app.routes import vehicular
+from app.services.scraper_service import ScraperService
+from tests.support import make_config, reset_globals
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """Factory for full app configs with every path under ``tmp_path``."""
+    yield lambda **overrides: make_config(str(tmp_path), **overrides)
+    reset_globals()
+
+
+@pytest.fixture
+def make_app(app_config):
+    """Factory for Flask apps built from ``app_config`` with the given overrides."""
+    return lambda **overrides: create_app(app_config(**overrides))
+
+
+@pytest.fixture
+def app(make_app):
+    """Flask app with the default test config."""
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    """Test client of ``app``."""
+    return app.test_client()
+
+
+@pytest.fixture
+def install_scraper(app_config):
+    """
+    Install a ScraperService built on fake scrapers as the routes' service.
+
+    Call it with the scraper factory and any ScraperService settings; the
+    service is removed again after the test.
+    """
+    def install(scraper_factory, **kwargs):
+        vehicular.scraper_service = ScraperService(scraper_factory=scraper_factory, **kwargs)
+        return vehicular.scraper_service
+    return install
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Fake pagafacil.gob.mx upstream for offline load and latency tests.
+
+Serves ``control_vehicular_25.php`` (the ``pide_placa`` form and the
+``captcha_gen`` form), a session-bound ``imagebuilder.php`` that draws a
+new captcha for every download, and the captcha-rejected, not-found and
+result pages, at the same paths as the real site. Point ``BASE_URL`` at it
+and run the app without a proxy:
+
+    python -m tests.fake_upstream --port 8081 --latency 0.3 --jitter 0.5 --error-rate 0.02
+    BASE_URL=http://127.0.0.1:8081/pagafacilv2/epago/cv/ python app.py
+
+Latency, error rate and captcha difficulty are configurable, so throughput
+and tail latency (see ``/metrics``) can be measured without the live site
+or the paid proxy.
+
+Offline unit tests use ``ScriptedTransport`` and ``ScriptedSolver`` instead:
+they feed the same pages to a scraper's session in-process.
+"""
+import sys
+import os
+import argparse
+import html
+import io
+import random
+import threading
+import time
+from collections import OrderedDict
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from PIL import Image, ImageDraw, ImageFont
+
+FORM_PATH = '/pagafacilv2/epago/cv/control_vehicular_25.php'
+CAPTCHA_PATH = '/pagafacilv2/captcha/imagebuilder.php'
+SESSION_COOKIE = 'PHPSESSID'
+
+# Characters the captcha solver's OCR whitelist accepts
+CAPTCHA_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+
+# Difficulty name: (characters, rotation degrees, noise lines, noise dots)
+DIFFICULTIES = {
+    'easy': (4, 0, 0, 0),
+    'medium': (5, 10, 4, 150),
+    'hard': (6, 25, 10, 600)
+}
+
+FORM_PAGE = """<html><head><meta charset="utf-8"><title>Control Vehicular</title></head><body>
+<form id="captcha_gen" method="post" action="control_vehicular_25.php">
+<input type="hidden" name="codigo_gen" value="{codigo_gen}">
+</form>
+<form id="pide_placa" class="codigo" method="post" action="control_vehicular_25.php">
+<input type="hidden" name="token" value="{token}">
+<input type="text" name="placa" value="">
+<input type="text" name="numserie" value="">
+<img src="../../captcha/imagebuilder.php" alt="codigo">
+<input type="text" name="codigo_usr" value="">
+<input type="submit" value="Consultar">
+</form>
+</body></html>"""
+
+REJECTED_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<p>Codigo de seguridad incorrecto, intente de nuevo.</p>
+</body></html>"""
+
+NOT_FOUND_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<p>Verifique los datos que ingreso, no se encontró registro.</p>
+</body></html>"""
+
+RESULT_PAGE = """<html><head><meta charset="utf-8"><title>Control Vehicular</title></head><body>
+<table>
+<tr><td>NIV:</td><td>{vin}</td></tr>
+<tr><td>Placa</td><td>{plate}</td></tr>
+<tr><td>Marca</td><td>{make}</td></tr>
+<tr><td>Descripción</td><td>{description}</td></tr>
+<tr><td>Modelo</td><td>{year}</td></tr>
+<tr><td>Color</td><td>{color}</td></tr>
+</table>
+<table>
+<tr><th>Ejercicio</th><th>Tenencia</th><th>Refrendo</th><th>Total</th></tr>
+{rows}
+</table>
+</body></html>"""
+
+UNAVAILABLE_PAGE = "<html><body><h1>Service Unavailable</h1></body></html>"
+
+
+def synthetic_vehicle(plate, vin):
+    """A plausible vehicle with taxes owed, derived from the plate and VIN."""
+    rng = random.Random(f"{plate}/{vin}")
+    year = rng.randint(2012, 2024)
+    taxes = []
+    for period in range(2025, 2025 - rng.randint(1, 3), -1):
+        tenencia = round(rng.uniform(500, 5000), 2)
+        taxes.append({'periodo': period, 'tenencia': tenencia, 'refrendo': 650.0})
+    return {
+        'make': rng.choice(['NISSAN', 'VOLKSWAGEN', 'CHEVROLET', 'TOYOTA']),
+        'description': rng.choice(['SEDAN 4 PUERTAS', 'HATCHBACK', 'PICK UP']),
+        'year': str(year),
+        'color': rng.choice(['BLANCO', 'GRIS', 'ROJO', 'NEGRO']),
+        'taxes': taxes
+    }
+
+
+class FakeUpstream:
+    """
+    Threaded HTTP server imitating the Paga Fácil vehicle lookup.
+
+    A session cookie is set on the first request. Each captcha download
+    replaces the session's answer, and each submit consumes it, as on the
+    real site. Only the ``sessions_max`` most recently used sessions are
+    kept; a client whose session was evicted starts over, as if it expired.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 difficulty='medium', vehicles=None, seed=None, sessions_max=100000):
+        """
+        Initialize the server; call ``start`` to serve in the background.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds every response is delayed by
+            jitter: Up to this many extra seconds, uniformly random, per response
+            error_rate: Fraction of requests answered with 503
+            difficulty: Captcha difficulty, a key of ``DIFFICULTIES``
+            vehicles: ``{(plate, vin): vehicle}`` of registered vehicles (see
+                ``synthetic_vehicle`` for the fields); None finds every
+                lookup and makes up its vehicle
+            seed: Seed for captchas, latency and errors, for repeatable runs
+            sessions_max: Sessions kept before the least recently used is evicted
+        """
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.difficulty = difficulty
+        self.vehicles = vehicles
+        self.sessions_max = sessions_max
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self.stats = {'form': 0, 'captcha': 0, 'submit': 0, 'accepted': 0, 'rejected': 0,
+                      'found': 0, 'not_found': 0, 'errors': 0}
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.upstream = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """``BASE_URL`` for the scraper."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{os.path.dirname(FORM_PATH)}/"
+
+    def start(self):
+        """Serve from a background thread; returns the server."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-upstream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def captcha_answer(self, session_id):
+        """
+        Answer of the captcha last downloaded in a session.
+
+        Lets tests and benchmarks skip OCR while still going through the
+        real download and submit flow.
+
+        Args:
+            session_id: Value of the ``PHPSESSID`` cookie
+
+        Returns:
+            Captcha text, or None if no unused captcha was downloaded
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session['captcha'] if session else None
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self, rate):
+        with self._lock:
+            return self._random.random() < rate
+
+    def _delay(self):
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def _session(self, session_id):
+        """Session state, created if new, evicting the least recently used beyond ``sessions_max``."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {'token': None, 'captcha': None}
+                while len(self._sessions) > self.sessions_max:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def _new_token(self, session):
+        with self._lock:
+            session['token'] = '%032x' % self._random.getrandbits(128)
+            return session['token']
+
+    def _new_captcha(self, session):
+        length = DIFFICULTIES[self.difficulty][0]
+        with self._lock:
+            text = ''.join(self._random.choice(CAPTCHA_ALPHABET) for _ in range(length))
+            seed = self._random.getrandbits(32)
+            session['captcha'] = text
+        return render_captcha(text, self.difficulty, seed)
+
+    def _check_answer(self, session, token, answer):
+        """Consume the session's captcha; True if token and answer match."""
+        with self._lock:
+            expected, session['captcha'] = session['captcha'], None
+            return bool(expected) and token == session['token'] and answer.strip().upper() == expected
+
+    def _result_page(self, plate, vin):
+        if self.vehicles is None:
+            vehicle = synthetic_vehicle(plate, vin)
+        else:
+            vehicle = self.vehicles.get((plate, vin))
+        if vehicle is None:
+            self._count('not_found')
+            return NOT_FOUND_PAGE
+        self._count('found')
+        rows = '\n'.join(
+            f"<tr><td>{tax['periodo']}</td><td>${tax['tenencia']:,.2f}</td><td>${tax['refrendo']:,.2f}</td>"
+            f"<td>${tax['tenencia'] + tax['refrendo']:,.2f}</td></tr>"
+            for tax in vehicle['taxes']
+        )
+        return RESULT_PAGE.format(
+            vin=html.escape(vin), plate=html.escape(plate), make=vehicle['make'],
+            description=vehicle['description'], year=vehicle['year'], color=vehicle['color'], rows=rows
+        )
+
+
+class ScriptedTransport(requests.adapters.BaseAdapter):
+    """
+    In-process transport for a scraper's session, for tests that need the
+    scraper's own flow but no server.
+
+    Every GET gets the form page and each POST the next of the scripted
+    pages (e.g. ``REJECTED_PAGE``, ``NOT_FOUND_PAGE``). Pair it with a
+    ``ScriptedSolver`` so the captcha image is never downloaded.
+    """
+
+    def __init__(self, submit_pages):
+        super().__init__()
+        self.submit_pages = list(submit_pages)
+
+    def send(self, request, **kwargs):
+        if request.method == 'GET':
+            page = FORM_PAGE.format(token='abc', codigo_gen='0')
+        else:
+            page = self.submit_pages.pop(0)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = page.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def solve_details(text, variant='otsu', config='psm8-whitelist', seconds=0.4, calls=60):
+    """Solve details as returned by ``CaptchaSolver.solve_image_details``."""
+    return {'text': text, 'variant': variant, 'config': config, 'tesseract_calls': calls, 'seconds': seconds}
+
+
+class ScriptedSolver:
+    """
+    Captcha solver stand-in reporting scripted solves per form cycle.
+
+    Each call takes the next cycle, a list of ``solve_details``, reports
+    them to ``on_solve`` and answers with the last one's text. Without
+    cycles every call is a single ``AB12`` solve.
+    """
+
+    def __init__(self, cycles=None):
+        self.cycles = list(cycles) if cycles is not None else None
+
+    def get_multiple_attempts(self, session, base_url, captcha_image_path, max_attempts=3, on_solve=None):
+        solves = self.cycles.pop(0) if self.cycles is not None else [solve_details('AB12')]
+        if on_solve is not None:
+            for details in solves:
+                on_solve(details)
+        return solves[-1]['text']
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError, OSError):
+        # Pillow without FreeType only has the small bitmap font
+        return ImageFont.load_default()
+
+
+def render_captcha(text, difficulty='medium', seed=None):
+    """
+    Draw a captcha image.
+
+    Args:
+        text: Characters to draw
+        difficulty: Key of ``DIFFICULTIES``
+        seed: Seed for the distortions
+
+    Returns:
+        PNG bytes
+    """
+    _, rotation, lines, dots = DIFFICULTIES[difficulty]
+    rng = random.Random(seed)
+    width, height = 36 * len(text) + 20, 60
+    image = Image.new('RGB', (width, height), 'white')
+    font = _font(34)
+
+    for index, char in enumerate(text):
+        glyph = Image.new('RGBA', (40, 50), (255, 255, 255, 0))
+        ImageDraw.Draw(glyph).text((6, 4), char, font=font, fill=(0, 0, 0, 255))
+        if rotation:
+            glyph = glyph.rotate(rng.uniform(-rotation, rotation), resample=Image.BICUBIC, expand=False)
+        offset = rng.randint(-4, 4) if rotation else 0
+        image.paste(glyph, (10 + 36 * index, 5 + offset), glyph)
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(lines):
+        points = [(rng.randint(0, width), rng.randint(0, height)) for _ in range(2)]
+        draw.line(points, fill=(rng.randint(0, 150),) * 3, width=rng.randint(1, 2))
+    for _ in range(dots):
+        draw.point((rng.randint(0, width - 1), rng.randint(0, height - 1)), fill=(rng.randint(0, 200),) * 3)
+
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the FakeUpstream that owns the server."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Per-request access lines would swamp a load test
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        upstream = self.server.upstream
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        upstream._delay()
+
+        if upstream._roll(upstream.error_rate):
+            upstream._count('errors')
+            return self._send(503, UNAVAILABLE_PAGE.encode('utf-8'))
+
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        session_id = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+        new_session = session_id is None
+        if new_session:
+            session_id = os.urandom(16).hex()
+        session = upstream._session(session_id)
+        set_cookie = f"{SESSION_COOKIE}={session_id}; path=/" if new_session else None
+
+        path = urlsplit(self.path).path
+        if path == FORM_PATH and self.command == 'GET':
+            upstream._count('form')
+            page = FORM_PAGE.format(token=upstream._new_token(session), codigo_gen=os.urandom(4).hex())
+            return self._send(200, page.encode('utf-8'), set_cookie=set_cookie)
+
+        if path == CAPTCHA_PATH and self.command == 'GET':
+            upstream._count('captcha')
+            return self._send(200, upstream._new_captcha(session), 'image/png', set_cookie)
+
+        if path == FORM_PATH and self.command == 'POST':
+            upstream._count('submit')
+            form = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+            if not upstream._check_answer(session, form.get('token'), form.get('codigo_usr', '')):
+                upstream._count('rejected')
+                return self._send(200, REJECTED_PAGE.encode('utf-8'), set_cookie=set_cookie)
+            upstream._count('accepted')
+            page = upstream._result_page(form.get('placa', '').strip().upper(), form.get('numserie', '').strip().upper())
+            return self._send(200, page.encode('utf-8'), set_cookie=set_cookie)
+
+        return self._send(404, b"<html><body>Not Found</body></html>", set_cookie=set_cookie)
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', set_cookie=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if set_cookie:
+            self.send_header('Set-Cookie', set_cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake pagafacil upstream for load tests.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8081, help="Port to listen on")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds every response is delayed by")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra random seconds per response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--difficulty', choices=list(DIFFICULTIES), default='medium', help="Captcha difficulty")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for repeatable runs")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, difficulty=args.difficulty, seed=args.seed)
+    print(f"Fake upstream serving BASE_URL={upstream.base_url}", file=sys.stderr)
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream.server.server_close()
+        print(f"Requests: {upstream.stats}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
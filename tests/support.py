@@ -0,0 +1,63 @@
+"""
+Helpers shared by the offline tests and the scripts they run in child processes.
+
+Not a test module: the pytest fixtures built on these live in ``conftest.py``.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the project root to Python path
+sys.path.insert(0, ROOT)
+
+from app.config import Config
+
+# Config keys naming files or directories, with the name used under the scratch directory
+PATH_KEYS = {
+    'RESULT_CACHE_DB_PATH': 'results.sqlite3',
+    'JOB_DB_PATH': 'jobs.sqlite3',
+    'UPSTREAM_RATE_STATE_PATH': 'ratelimit.state',
+    'UPSTREAM_PROBE_STATE_PATH': 'probe.json',
+    'CAPTCHA_TELEMETRY_DB_PATH': 'captcha.sqlite3',
+}
+
+
+def make_config(directory, **overrides):
+    """
+    Full app config that keeps every file under a scratch directory.
+
+    Warm-up, the upstream probe, API keys, trace export and profiling are
+    off, so an app built from it starts no threads and writes nothing
+    outside ``directory``.
+
+    Args:
+        directory: Scratch directory for the app's files
+        **overrides: Config values to set on top
+
+    Returns:
+        Config dictionary for ``create_app`` or ``create_asgi_app``
+    """
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config.update({key: os.path.join(directory, name) for key, name in PATH_KEYS.items()})
+    config.update(API_KEYS="", OCR_WARMUP=False, UPSTREAM_PROBE_INTERVAL=0, TRACE_FILE="", PROFILE_DIR="")
+    config.update(overrides)
+    return config
+
+
+def reset_globals():
+    """
+    Drop the services and tracer that the Flask routes keep in module globals.
+
+    The profiler and API key quotas live in each app's ``extensions``, so a
+    fresh app already starts without them.
+    """
+    import tracing
+    from app.routes import health, jobs, vehicular
+
+    if health.upstream_prober is not None:
+        health.upstream_prober.stop()
+    health.upstream_prober = None
+    vehicular.scraper_service = None
+    jobs.job_queue = None
+    tracing.configure(None)
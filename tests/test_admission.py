@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Offline tests for admission control of interactive lookups.
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.admission import AdmissionController, ServiceOverloaded
+
+VIN = "ML3AB56J7JH004905"
+
+
+class SlowScraper:
+    """Scraper stand-in that blocks until released."""
+
+    release = threading.Event()
+
+    def get_vehicle_info(self, plate, vin):
+        SlowScraper.release.wait(5)
+        return {"codigo": "ok", "info": []}
+
+
+def test_queue_bound_and_retry_after():
+    """Callers past capacity plus queue are refused with a retry hint."""
+    controller = AdmissionController(capacity=1, max_queue=1, initial_service_time=4.0)
+    with controller.admit() as first, controller.occupy(first):
+        with controller.admit():
+            stats = controller.stats()
+            assert stats["in_flight"] == 1
+            assert stats["queued"] == 1
+            try:
+                with controller.admit():
+                    pass
+                raise AssertionError("expected ServiceOverloaded")
+            except ServiceOverloaded as e:
+                assert e.retry_after == 8
+                assert e.queued == 1
+
+    stats = controller.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    assert stats["rejected"] == 1
+    assert stats["service_time"] < 4.0
+
+
+def test_bulk_slots_and_queue_wait():
+    """Slots held by bulk lookups count against the queue; waiting is not service time."""
+    controller = AdmissionController(capacity=1, max_queue=1, initial_service_time=1.0, smoothing=1.0)
+    with controller.occupy():
+        with controller.admit() as waiting:
+            try:
+                with controller.admit():
+                    pass
+                raise AssertionError("expected ServiceOverloaded")
+            except ServiceOverloaded as e:
+                assert e.in_flight == 1 and e.queued == 1
+
+            time.sleep(0.2)
+            with controller.occupy(waiting):
+                assert controller.stats()["queued"] == 0
+
+            # The measurement covers the short slot hold, not the 0.2s wait for it
+            assert controller.stats()["service_time"] < 0.1
+
+
+def test_route_answers_429_when_overloaded(client, install_scraper):
+    """The GET endpoint returns 429 with Retry-After instead of waiting."""
+    install_scraper(SlowScraper, pool_size=1, admission_max_queue=0)
+    SlowScraper.release.clear()
+
+    first = threading.Thread(target=client.get, args=(f"/api/vehicular/tenencia/FDH923C?niv={VIN}",))
+    first.start()
+    try:
+        time.sleep(0.2)
+        response = client.get(f"/api/vehicular/tenencia/ABC1234?niv={VIN}")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.get_json()["codigo"] == "error"
+
+        status = client.get("/status").get_json()
+        assert status["admission"]["in_flight"] == 1
+        assert status["admission"]["rejected"] == 1
+    finally:
+        SlowScraper.release.set()
+        first.join()
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
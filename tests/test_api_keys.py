@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Offline tests for API key authentication, quotas and usage reporting.
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.quotas import ApiKeyQuotas, QuotaExceeded
+
+VIN = "ML3AB56J7JH004905"
+URL = f"/api/vehicular/tenencia/FDH923C?niv={VIN}"
+
+
+class FakeScraper:
+    """Scraper stand-in that blocks while ``hold`` is clear."""
+
+    hold = threading.Event()
+
+    def get_vehicle_info(self, plate, vin):
+        FakeScraper.hold.wait(5)
+        return {"codigo": "ok", "info": []}
+
+
+@pytest.fixture
+def make_client(make_app, install_scraper):
+    """Factory for test clients with API keys configured and fake scrapers."""
+    def build(**overrides):
+        overrides.setdefault("API_KEYS", "ops:secret-ops,fleet:secret-fleet:2:1")
+        overrides.setdefault("ADMIN_TOKEN", "admin-secret")
+        client = make_app(**overrides).test_client()
+        install_scraper(FakeScraper)
+        FakeScraper.hold.set()
+        return client
+    return build
+
+
+def test_parse_and_rate_quota():
+    """Per-key overrides are parsed and the bucket refuses past the burst."""
+    quotas = ApiKeyQuotas.from_config("a:k1, b:k2:120:2, broken", burst=2)
+    assert ApiKeyQuotas.from_config("") is None
+    assert quotas.authenticate("k2") == "b"
+    assert quotas.authenticate("nope") is None
+    assert quotas.usage()["b"]["max_concurrent"] == 2
+
+    quotas.acquire("a")
+    quotas.release("a")
+    quotas.acquire("a")
+    quotas.release("a")
+    try:
+        quotas.acquire("a")
+        raise AssertionError("expected QuotaExceeded")
+    except QuotaExceeded as e:
+        assert e.reason == "rate"
+        assert e.retry_after >= 1
+
+
+def get(client, url, **kwargs):
+    """GET and close the response, as a WSGI server would once it is sent."""
+    response = client.get(url, **kwargs)
+    response.close()
+    return response
+
+
+def test_key_required_and_scrape_seconds_charged(make_client):
+    """Requests need a valid key and fresh scrapes are charged to it."""
+    client = make_client()
+    assert get(client, URL).status_code == 401
+    assert get(client, URL, headers={"X-API-Key": "wrong"}).status_code == 401
+
+    assert get(client, URL, headers={"X-API-Key": "secret-ops"}).status_code == 200
+    assert get(client, URL, headers={"X-API-Key": "secret-ops"}).status_code == 200
+
+    assert get(client, "/api/admin/usage").status_code == 403
+    usage = get(client, "/api/admin/usage", headers={"Authorization": "Bearer admin-secret"}).get_json()
+    ops = usage["keys"]["ops"]
+    assert ops["requests"] == 2
+    assert ops["scrapes"] == 1
+    assert ops["active"] == 0
+
+
+def test_concurrency_quota(make_client):
+    """A key at its concurrency limit gets 429 while another key is unaffected."""
+    client = make_client()
+    FakeScraper.hold.clear()
+    responses = {}
+
+    def call(name, url, key):
+        responses[name] = get(client, url, headers={"X-API-Key": key})
+
+    first = threading.Thread(target=call, args=("fleet", URL, "secret-fleet"))
+    first.start()
+    time.sleep(0.2)
+    other = threading.Thread(target=call, args=("ops", f"/api/vehicular/tenencia/XYZ9876?niv={VIN}", "secret-ops"))
+    other.start()
+    try:
+        time.sleep(0.2)
+        response = get(client, f"/api/vehicular/tenencia/ABC1234?niv={VIN}", headers={"X-API-Key": "secret-fleet"})
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+    finally:
+        FakeScraper.hold.set()
+        first.join()
+        other.join()
+    assert responses["fleet"].status_code == 200
+    assert responses["ops"].status_code == 200
+
+
+def test_open_without_keys(make_client):
+    """Without API_KEYS the endpoints stay open and admin routes are hidden without a token."""
+    client = make_client(API_KEYS="", ADMIN_TOKEN=None)
+    assert get(client, URL).status_code == 200
+    assert get(client, "/api/admin/usage").status_code == 404
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
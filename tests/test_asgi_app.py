@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the ASGI application.
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.asgi import create_asgi_app
+from app.services import AsyncScraperService
+
+PATH = "/api/vehicular/tenencia/FDH923C"
+QUERY = "niv=ML3AB56J7JH004905"
+
+
+class FakeAsyncScraper:
+    """Async scraper stand-in that counts lookups and takes a while."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+
+    async def get_vehicle_info(self, plate, vin):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"codigo": "ok", "info": [{"periodo": 2025, "total": "1,234.00"}]}
+
+
+@pytest.fixture
+def make_asgi_app(app_config):
+    """Factory for ASGI apps whose service uses a fake scraper."""
+    def build(scraper, **overrides):
+        app = create_asgi_app(app_config(DEBUG=False, **overrides))
+        app.service = AsyncScraperService(async_scraper=scraper, max_concurrency=50)
+        return app
+    return build
+
+
+async def call(app, path, query="", headers=None, method="GET"):
+    """Send one request to the ASGI app and collect the response."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start, body = messages
+    response_headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    payload = json.loads(body["body"]) if body["body"] else None
+    return start["status"], response_headers, payload
+
+
+def test_health_and_not_found(make_asgi_app):
+    """Health and unknown paths answer like the Flask app."""
+    app = make_asgi_app(FakeAsyncScraper())
+
+    async def run():
+        status, _, body = await call(app, "/health")
+        assert status == 200 and body["status"] == "ok"
+
+        status, _, body = await call(app, "/nope")
+        assert status == 404
+        assert body == {"codigo": "error", "info": None, "error": {"mensaje": "Endpoint not found"}}
+
+        status, _, _ = await call(app, PATH, QUERY, method="POST")
+        assert status == 405
+
+    asyncio.run(run())
+
+
+def test_validation_errors(make_asgi_app):
+    """Missing or malformed parameters get the same 400 payloads."""
+    app = make_asgi_app(FakeAsyncScraper())
+
+    async def run():
+        status, _, body = await call(app, PATH)
+        assert status == 400
+        assert body["error"]["mensaje"] == "Parameter 'niv' (VIN) is required"
+
+        status, _, body = await call(app, "/api/vehicular/tenencia/AB", QUERY)
+        assert status == 400
+        assert body["error"]["mensaje"].startswith("Invalid plate format")
+
+    asyncio.run(run())
+
+
+def test_lookup_cache_and_not_modified(make_asgi_app):
+    """A lookup is cached, tagged and answered with 304 when unchanged."""
+    scraper = FakeAsyncScraper(delay=0)
+    app = make_asgi_app(scraper)
+
+    async def run():
+        status, headers, body = await call(app, PATH, QUERY)
+        assert status == 200
+        assert body["_metadata"]["cache"] == "miss"
+        assert "last-modified" in headers
+        etag = headers["etag"]
+
+        status, headers, body = await call(app, PATH, QUERY)
+        assert body["_metadata"]["cache"] == "hit"
+        assert headers["etag"] == etag
+
+        status, headers, body = await call(app, PATH, QUERY, {"If-None-Match": etag})
+        assert status == 304 and body is None
+        assert scraper.calls == 1
+
+        status, _, body = await call(app, PATH, QUERY, {"Cache-Control": "no-cache"})
+        assert body["_metadata"]["cache"] == "bypass"
+        assert scraper.calls == 2
+
+        # HEAD gets the GET headers, including Content-Length, but no body
+        _, get_headers, _ = await call(app, PATH, QUERY)
+        status, headers, body = await call(app, PATH, QUERY, method="HEAD")
+        assert status == 200 and body is None
+        assert headers["etag"] == get_headers["etag"]
+        assert headers["content-length"] == get_headers["content-length"]
+
+        status, _, body = await call(app, "/status")
+        assert body["inflight"]["in_flight"] == 0
+        assert body["concurrency"]["limit"] == 50
+
+    asyncio.run(run())
+
+
+def test_concurrent_lookups_share_one_scrape(make_asgi_app):
+    """Concurrent requests for a vehicle coalesce; distinct ones run in parallel."""
+    scraper = FakeAsyncScraper(delay=0.3)
+    app = make_asgi_app(scraper)
+
+    async def run():
+        same = [call(app, PATH, QUERY) for _ in range(20)]
+        others = [call(app, f"/api/vehicular/tenencia/ABC{i:03d}", QUERY) for i in range(30)]
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*same, *others)
+        elapsed = loop.time() - started
+
+        assert all(status == 200 for status, _, _ in results)
+        assert scraper.calls == 31
+        # Every caller of a shared lookup sees it marked as coalesced
+        assert all(body["_metadata"]["cache"] == "coalesced" for _, _, body in results[:20])
+        # 31 lookups of 0.3s each on one event loop, not one after another
+        assert elapsed < 2.0
+
+    asyncio.run(run())
+
+
+def test_api_key_required(make_asgi_app):
+    """Configured API keys are enforced on lookups."""
+    app = make_asgi_app(FakeAsyncScraper(delay=0), API_KEYS="acme:secret")
+
+    async def run():
+        status, _, body = await call(app, PATH, QUERY)
+        assert status == 401
+        status, _, _ = await call(app, PATH, QUERY, {"X-API-Key": "secret"})
+        assert status == 200
+
+    asyncio.run(run())
+
+
+def test_lookup_error_returns_500(make_asgi_app):
+    """A failing lookup gets a 500 payload with its trace id instead of a dropped response."""
+    class BrokenService:
+        async def get_vehicle_info_async(self, plate, vin, use_cache=True):
+            raise RuntimeError("upstream parser crashed")
+
+    app = make_asgi_app(FakeAsyncScraper())
+    app.service = BrokenService()
+
+    async def run():
+        status, headers, body = await call(app, PATH, QUERY)
+        assert status == 500
+        assert len(headers["x-trace-id"]) == 32
+        assert body == {"codigo": "error", "info": None,
+                        "error": {"mensaje": "Internal server error: upstream parser crashed"}}
+
+    asyncio.run(run())
+
+
+def test_service_builds_no_thread_pool():
+    """The async service sizes admission from its concurrency and starts no scraper or refresh threads."""
+    service = AsyncScraperService(async_scraper=FakeAsyncScraper(), max_concurrency=50, cache_soft_ttl=60)
+    try:
+        assert service.admission.capacity == 50
+        assert service.refresh_enabled
+        assert not hasattr(service, "pool")
+        assert not hasattr(service, "_refresh_executor")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
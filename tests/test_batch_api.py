@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the batch lookup endpoint, using stubbed scrapers.
+"""
+import sys
+import os
+import json
+import time
+import threading
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import NOT_FOUND_MESSAGE
+
+
+class FakeScraper:
+    """Scraper stand-in with a per-plate delay and a shared concurrency gauge."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def get_vehicle_info(self, plate, vin):
+        with FakeScraper.lock:
+            FakeScraper.active += 1
+            FakeScraper.peak = max(FakeScraper.peak, FakeScraper.active)
+        try:
+            time.sleep(0.3 if plate == "SLOW123" else 0.05)
+            if plate == "BAD1234":
+                return {"codigo": "error", "info": None, "error": {"mensaje": NOT_FOUND_MESSAGE}}
+            return {"codigo": "ok", "info": []}
+        finally:
+            with FakeScraper.lock:
+                FakeScraper.active -= 1
+
+
+@pytest.fixture
+def client(make_app, install_scraper):
+    """Test client allowing two concurrent lookups per batch, on fake scrapers."""
+    install_scraper(FakeScraper, pool_size=2)
+    return make_app(BATCH_MAX_CONCURRENCY=2, BATCH_MAX_VEHICLES=10).test_client()
+
+
+def test_batch_streams_results_in_completion_order(client):
+    """Fast lookups are streamed before slow ones and concurrency is bounded."""
+    FakeScraper.peak = 0
+    response = client.post("/api/vehicular/tenencia/batch", json={"vehicles": [
+        {"plate": "SLOW123", "niv": "3G1TA5AF1DL163526"},
+        {"plate": "FKY171B", "niv": "3G1TA5AF1DL163526"},
+        {"plate": "BAD1234", "niv": "3G1TA5AF1DL163526"},
+        {"plate": "X", "niv": "3G1TA5AF1DL163526"},
+    ]})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert [line["index"] for line in lines][0] == 3
+    assert lines[-1]["plate"] == "SLOW123"
+    statuses = {line["plate"]: line["status"] for line in lines}
+    assert statuses == {"SLOW123": 200, "FKY171B": 200, "BAD1234": 404, "X": 400}
+    assert FakeScraper.peak <= 2
+
+
+def test_batch_rejects_bad_bodies(client):
+    """Empty and oversized batches are rejected up front."""
+    assert client.post("/api/vehicular/tenencia/batch", json={"vehicles": []}).status_code == 400
+    too_many = [{"plate": "FKY171B", "niv": "3G1TA5AF1DL163526"}] * 11
+    assert client.post("/api/vehicular/tenencia/batch", json=too_many).status_code == 400
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
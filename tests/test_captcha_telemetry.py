@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline tests for captcha solve telemetry and its admin endpoint.
+"""
+import sys
+import os
+import tempfile
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import CaptchaTelemetry
+from scraper import PagaFacilScraper
+from tests.fake_upstream import NOT_FOUND_PAGE, REJECTED_PAGE, ScriptedSolver, ScriptedTransport, solve_details
+
+
+def test_summary_per_window():
+    """Solves, accept rates and costs are summarized over the requested window only."""
+    with tempfile.TemporaryDirectory() as directory:
+        telemetry = CaptchaTelemetry(os.path.join(directory, "captcha.sqlite3"))
+
+        old = telemetry.record_solve(solve_details("OLD1", seconds=9.0))
+        telemetry.record_submission(old, accepted=False)
+        conn = telemetry._connect()
+        with conn:
+            conn.execute("UPDATE captcha_solves SET solved_at = ? WHERE id = ?", (time.time() - 7200, old))
+
+        telemetry.record_solve(solve_details(None, variant=None, config=None, seconds=0.6, calls=60))
+        for accepted in (True, True, False):
+            telemetry.record_submission(telemetry.record_solve(solve_details("AB12")), accepted)
+        inverted = telemetry.record_solve(solve_details("CD34", variant="inverted", config="psm7"))
+        telemetry.record_submission(inverted, True)
+
+        summary = telemetry.summary(window=3600)
+        assert summary["solves"] == 5
+        assert summary["solved"] == 4
+        assert summary["solve_rate"] == 0.8
+        assert summary["submitted"] == 4
+        assert summary["accept_rate"] == 0.75
+        assert summary["solve_seconds"]["max"] == 0.6
+        assert summary["tesseract_calls"] == {"total": 300, "mean": 60.0, "p95": 60}
+        assert summary["answers"][0] == {
+            "variant": "otsu", "config": "psm8-whitelist", "submitted": 3, "accepted": 2, "accept_rate": 0.6667
+        }
+        assert summary["answers"][1]["accept_rate"] == 1.0
+
+        assert telemetry.summary(window=3 * 3600)["solves"] == 6
+
+
+def test_scraper_records_solves_and_submissions():
+    """The scraper stores every solve and whether the site accepted the submitted answer."""
+    with tempfile.TemporaryDirectory() as directory:
+        telemetry = CaptchaTelemetry(os.path.join(directory, "captcha.sqlite3"))
+        scraper = PagaFacilScraper(captcha_telemetry=telemetry)
+        scraper.session.mount('https://', ScriptedTransport([REJECTED_PAGE, NOT_FOUND_PAGE]))
+        scraper.captcha_solver = ScriptedSolver([
+            [solve_details(None, variant=None, config=None), solve_details("WRONG", variant="adaptive")],
+            [solve_details("RIGHT", variant="contrast", config="psm7")]
+        ])
+
+        result = scraper.get_vehicle_info("FDH923C", "ML3AB56J7JH004905")
+        assert result["codigo"] == "error"
+
+        summary = telemetry.summary()
+        assert summary["solves"] == 3
+        assert summary["submitted"] == 2
+        assert summary["accepted"] == 1
+        answers = {(row["variant"], row["config"]): row["accept_rate"] for row in summary["answers"]}
+        assert answers == {("adaptive", "psm8-whitelist"): 0.0, ("contrast", "psm7"): 1.0}
+
+
+def test_admin_endpoint(make_app):
+    """The admin endpoint needs the admin token and validates the window."""
+    app = make_app(ADMIN_TOKEN="admin-secret")
+    CaptchaTelemetry(app.config["CAPTCHA_TELEMETRY_DB_PATH"]).record_solve(solve_details("AB12"))
+    client = app.test_client()
+    auth = {"Authorization": "Bearer admin-secret"}
+
+    assert client.get("/api/admin/captcha").status_code == 403
+    assert client.get("/api/admin/captcha?window=soon", headers=auth).status_code == 400
+    assert client.get("/api/admin/captcha?window=0", headers=auth).status_code == 400
+
+    response = client.get("/api/admin/captcha?window=600", headers=auth)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["captcha_telemetry_enabled"] is True
+    assert body["captcha"]["window_seconds"] == 600
+    assert body["captcha"]["solves"] == 1
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
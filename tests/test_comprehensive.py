@@ -13,6 +13,7 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.scraper_service import ScraperService
+from logging_config import configure_logging
 
 # All test cases provided by user - organized and cleaned
 TEST_CASES = [
@@ -279,4 +280,5 @@ def main():
     return 0 if success_rate >= 75 else 1
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Offline tests for ETag / If-None-Match and If-Modified-Since handling on the tenencia endpoint.
+"""
+import sys
+import os
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+URL = "/api/vehicular/tenencia/FDH923C?niv=ML3AB56J7JH004905"
+
+
+class FakeScraper:
+    """Scraper stand-in whose amount due can be changed between lookups."""
+
+    amount = "1,234.00"
+
+    def get_vehicle_info(self, plate, vin):
+        return {"codigo": "ok", "info": [{"periodo": 2025, "total": FakeScraper.amount}]}
+
+
+def test_etag_and_not_modified(client, install_scraper):
+    """The ETag ignores metadata and a matching If-None-Match gets an empty 304."""
+    install_scraper(FakeScraper)
+    first = client.get(URL)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert "Last-Modified" in first.headers
+
+    # A cache hit has different metadata but the same payload
+    second = client.get(URL)
+    assert second.get_json()["_metadata"]["cache"] == "hit"
+    assert second.headers["ETag"] == etag
+
+    unchanged = client.get(URL, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+    assert unchanged.headers["ETag"] == etag
+
+    # Proxies may weaken the tag; If-None-Match uses the weak comparison
+    assert client.get(URL, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # Without If-None-Match, If-Modified-Since decides
+    last_modified = first.headers["Last-Modified"]
+    assert client.get(URL, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(URL, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+    assert client.get(URL, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200
+
+    FakeScraper.amount = "2,000.00"
+    changed = client.get(URL, headers={"If-None-Match": etag, "Cache-Control": "no-cache"})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -11,6 +11,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scraper import PagaFacilScraper
+from logging_config import configure_logging
 
 # Test just one case to start
 TEST_CASE = {"plate": "FDH923C", "vin": "ML3AB56J7JH004905"}
@@ -116,4 +117,5 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the fake pagafacil upstream, and the scraper against it.
+"""
+import sys
+import os
+import io
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from PIL import Image
+
+from app.services.scraper_service import ScraperService
+from captcha_solver import CaptchaSolver
+from scraper import PagaFacilScraper
+from tests.fake_upstream import FakeUpstream, SESSION_COOKIE, DIFFICULTIES, render_captcha
+
+PLATE = "FDH923C"
+VIN = "ML3AB56J7JH004905"
+
+
+class AnswerKeySolver:
+    """
+    Captcha solver stand-in that downloads the image like the real solver
+    and reads the answer from the fake upstream instead of running OCR.
+    """
+
+    def __init__(self, upstream, wrong_answers=0):
+        self.upstream = upstream
+        self.wrong_answers = wrong_answers
+        self.solver = CaptchaSolver()
+
+    def get_multiple_attempts(self, session, base_url, captcha_image_path, max_attempts=3, on_solve=None):
+        url = self.solver.build_captcha_url(base_url, captcha_image_path)
+        assert self.solver.download_captcha_image(session, url) is not None
+        answer = self.upstream.captcha_answer(session.cookies.get(SESSION_COOKIE))
+        if self.wrong_answers:
+            self.wrong_answers -= 1
+            answer = "WRONG"
+        if on_solve is not None:
+            on_solve({"text": answer, "variant": "otsu", "config": "psm8-whitelist",
+                      "tesseract_calls": 0, "seconds": 0.0})
+        return answer
+
+
+def make_scraper(upstream, wrong_answers=0):
+    scraper = PagaFacilScraper(base_url=upstream.base_url)
+    scraper.captcha_solver = AnswerKeySolver(upstream, wrong_answers)
+    return scraper
+
+
+def test_lookup_through_fake_upstream():
+    """A lookup goes through form, captcha download and submit, and parses the result page."""
+    with FakeUpstream(difficulty="easy", seed=1) as upstream:
+        result = make_scraper(upstream).get_vehicle_info(PLATE, VIN)
+
+        assert result["codigo"] == "ok"
+        assert result["vehicle_info"]["vin"] == VIN
+        assert result["info"] and all(tax["total"] == tax["tenencia"] + tax["refrendo"] for tax in result["info"])
+        assert upstream.stats["form"] == upstream.stats["captcha"] == upstream.stats["accepted"] == 1
+
+
+def test_wrong_captcha_is_rejected_and_retried():
+    """A wrong answer gets the captcha-rejected page and the scraper tries a new form."""
+    vehicles = {(PLATE, VIN): {"make": "NISSAN", "description": "SEDAN", "year": "2018", "color": "GRIS",
+                               "taxes": [{"periodo": 2025, "tenencia": 1000.0, "refrendo": 650.0}]}}
+    with FakeUpstream(vehicles=vehicles) as upstream:
+        result = make_scraper(upstream, wrong_answers=1).get_vehicle_info(PLATE, VIN)
+        assert result["codigo"] == "ok"
+        assert result["info"] == [{"periodo": 2025, "tenencia": 1000.0, "refrendo": 650.0, "total": 1650.0}]
+        assert upstream.stats["rejected"] == 1
+        assert upstream.stats["submit"] == 2
+
+        not_found = make_scraper(upstream).get_vehicle_info("ABC1234", VIN)
+        assert not_found["codigo"] == "error"
+        assert upstream.stats["not_found"] == 1
+
+
+def test_captcha_is_bound_to_session_and_single_use():
+    """Each session has its own captcha; a submit consumes it."""
+    with FakeUpstream() as upstream:
+        first, second = requests.Session(), requests.Session()
+        form_url = upstream.base_url + "control_vehicular_25.php"
+        captcha_url = CaptchaSolver().build_captcha_url(upstream.base_url, "../../captcha/imagebuilder.php")
+        for session in (first, second):
+            session.get(form_url)
+            image = session.get(captcha_url)
+            assert image.headers["Content-Type"] == "image/png"
+            assert Image.open(io.BytesIO(image.content)).format == "PNG"
+
+        answer = upstream.captcha_answer(first.cookies[SESSION_COOKIE])
+        assert answer and answer != upstream.captcha_answer(second.cookies[SESSION_COOKIE])
+
+        first.post(form_url, data={"codigo_usr": answer, "placa": PLATE, "numserie": VIN})
+        assert upstream.captcha_answer(first.cookies[SESSION_COOKIE]) is None
+        # No token from the form page, so the answer alone is not enough
+        assert upstream.stats["rejected"] == 1
+
+
+def test_least_recently_used_sessions_are_evicted():
+    """Past sessions_max the oldest session is dropped instead of refusing new clients."""
+    with FakeUpstream(sessions_max=2) as upstream:
+        form_url = upstream.base_url + "control_vehicular_25.php"
+        captcha_url = CaptchaSolver().build_captcha_url(upstream.base_url, "../../captcha/imagebuilder.php")
+        sessions = [requests.Session() for _ in range(3)]
+        for session in sessions:
+            assert session.get(form_url).status_code == 200
+            assert session.get(captcha_url).status_code == 200
+            # Touch the first session so the second one is the oldest
+            sessions[0].get(form_url)
+
+        answers = [upstream.captcha_answer(session.cookies[SESSION_COOKIE]) for session in sessions]
+        assert answers[0] and answers[2]
+        assert answers[1] is None
+        # The evicted client just starts over
+        assert sessions[1].get(form_url).status_code == 200
+
+
+def test_latency_and_error_rate():
+    """Responses are delayed by the configured latency; errors come back as 503."""
+    with FakeUpstream(latency=0.05) as upstream:
+        started = time.monotonic()
+        assert requests.get(upstream.base_url + "control_vehicular_25.php").status_code == 200
+        assert time.monotonic() - started >= 0.05
+
+    with FakeUpstream(error_rate=1.0) as upstream:
+        result = make_scraper(upstream).get_vehicle_info(PLATE, VIN)
+        assert result["codigo"] == "error"
+        assert upstream.stats["errors"] == 3
+        assert upstream.stats["submit"] == 0
+
+
+def test_captcha_difficulty():
+    """Harder captchas have more characters and more noise."""
+    sizes = {}
+    for difficulty, (length, _, _, _) in DIFFICULTIES.items():
+        image = Image.open(io.BytesIO(render_captcha("A" * length, difficulty, seed=3))).convert("L")
+        sizes[difficulty] = image.size[0]
+        dark = sum(1 for pixel in image.getdata() if pixel < 200)
+        sizes[difficulty + "_dark"] = dark
+    assert sizes["easy"] < sizes["medium"] < sizes["hard"]
+    assert sizes["easy_dark"] < sizes["hard_dark"]
+
+
+def test_captcha_url_follows_base_url():
+    """The captcha URL is resolved against the configured base URL, not the live site."""
+    solver = CaptchaSolver()
+    assert solver.build_captcha_url("https://www.pagafacil.gob.mx/pagafacilv2/epago/cv/",
+                                    "../../captcha/imagebuilder.php") == \
+        "https://www.pagafacil.gob.mx/pagafacilv2/captcha/imagebuilder.php"
+    assert solver.build_captcha_url("http://127.0.0.1:8081/pagafacilv2/epago/cv",
+                                    "../../captcha/imagebuilder.php") == \
+        "http://127.0.0.1:8081/pagafacilv2/captcha/imagebuilder.php"
+
+
+def test_service_uses_configured_base_url():
+    """ScraperService builds its scrapers with the configured base and form URLs."""
+    with FakeUpstream() as upstream:
+        service = ScraperService(base_url=upstream.base_url, form_url="control_vehicular_25.php",
+                                 cache_ttl=0, pool_size=1)
+        with service.pool.acquire() as scraper:
+            assert scraper.base_url == upstream.base_url
+            scraper.captcha_solver = AnswerKeySolver(upstream)
+
+        result = service.get_vehicle_info(PLATE, VIN, use_cache=False)
+        assert result["codigo"] == "ok"
+        assert upstream.stats["accepted"] == 1
+
+
+if __name__ == "__main__":
+    test_lookup_through_fake_upstream()
+    test_wrong_captcha_is_rejected_and_retried()
+    test_captcha_is_bound_to_session_and_single_use()
+    test_least_recently_used_sessions_are_evicted()
+    test_latency_and_error_rate()
+    test_captcha_difficulty()
+    test_captcha_url_follows_base_url()
+    test_service_uses_configured_base_url()
+    print("All fake upstream tests passed")
@@ -12,6 +12,7 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.scraper_service import ScraperService
+from logging_config import configure_logging
 
 # Test first 10 cases provided by user
 TEST_CASES = [
@@ -183,4 +184,5 @@ def main():
     return 0 if success_count >= len(TEST_CASES) * 0.5 else 1
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the gunicorn worker profiles and thread-safe service setup.
+"""
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gunicorn.config import Config as GunicornConfig
+
+import gunicorn_config
+from app.routes import vehicular
+
+
+def test_profiles_are_valid_gunicorn_settings():
+    """Every profile is accepted by gunicorn's own setting validators."""
+    for name in gunicorn_config.PROFILES:
+        profile = gunicorn_config.build_profile(name, cores=4)
+        config = GunicornConfig()
+        for key, value in profile.items():
+            config.set(key, value)
+        assert config.worker_class_str == name
+        assert config.timeout >= 30
+
+
+def test_profile_sizing():
+    """Sizes follow the core count and the latency to CPU-time ratio."""
+    sync = gunicorn_config.build_profile("sync", cores=2)
+    assert sync["workers"] == 5 and sync["threads"] == 1
+
+    gthread = gunicorn_config.build_profile("gthread", cores=2, latency=11.0, cpu_seconds=0.5)
+    assert gthread["workers"] == 2
+    assert gthread["threads"] == 23
+    assert gunicorn_config.build_profile("gthread", cores=2, latency=60.0, cpu_seconds=0.1)["threads"] == 32
+
+    gevent = gunicorn_config.build_profile("gevent", cores=1, latency=11.0, cpu_seconds=0.5)
+    assert gevent["workers"] == 2
+    assert gevent["worker_connections"] == 184
+
+    try:
+        gunicorn_config.build_profile("eventlet", cores=2)
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+
+
+def test_init_scraper_service_is_built_once(app):
+    """Concurrent first requests share one ScraperService."""
+    built = []
+
+    class SlowService:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            built.append(self)
+
+    original = vehicular.ScraperService
+    vehicular.ScraperService = SlowService
+    services = []
+
+    def first_request():
+        with app.app_context():
+            services.append(vehicular.init_scraper_service())
+
+    try:
+        threads = [threading.Thread(target=first_request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        vehicular.ScraperService = original
+
+    assert len(built) == 1
+    assert all(service is built[0] for service in services)
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the durable job queue and the job API.
+"""
+import sys
+import os
+import time
+import tempfile
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.job_queue import JobQueue
+
+VEHICLES = [("FDH923C", "ML3AB56J7JH004905"), ("FKY171B", "3G1TA5AF1DL163526")]
+
+
+def test_items_are_claimed_once_and_complete_the_job():
+    """Each item goes to one worker and the job finishes with its last item."""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.sqlite3"))
+        job_id = queue.submit(VEHICLES)
+
+        first = queue.claim("worker-a")
+        second = queue.claim("worker-b")
+        assert queue.claim("worker-c") is None
+        assert {first[1], second[1]} == {0, 1}
+        assert queue.get(job_id)["status"] == "running"
+
+        queue.complete(job_id, first[1], {"codigo": "ok", "info": []})
+        job = queue.get(job_id)
+        assert job["completed"] == 1
+        assert job["progress"] == 0.5
+
+        queue.complete(job_id, second[1], {"codigo": "ok", "info": []})
+        job = queue.get(job_id)
+        assert job["status"] == "done"
+        assert [r["result"]["codigo"] for r in job["results"]] == ["ok", "ok"]
+
+
+def test_expired_lease_is_requeued():
+    """An item claimed by a worker that died is handed out again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.sqlite3"), lease_seconds=0)
+        queue.submit(VEHICLES[:1])
+        assert queue.claim("dead-worker") is not None
+        assert queue.claim("live-worker") is not None
+
+
+def test_failed_item_is_retried_until_attempts_run_out():
+    """A failed lookup is requeued after its delay and kept as the result on the last attempt."""
+    error = {"codigo": "error", "info": None, "error": {"mensaje": "Upstream unavailable"}}
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.sqlite3"))
+        job_id = queue.submit(VEHICLES[:1])
+
+        item = queue.claim("worker-a")
+        assert queue.retry(job_id, item[1], error, max_attempts=2, delay=0.2) is True
+        # Not handed out again before the retry delay
+        assert queue.claim("worker-b") is None
+        assert queue.get(job_id)["completed"] == 0
+
+        time.sleep(0.25)
+        item = queue.claim("worker-b")
+        assert item is not None
+        assert queue.retry(job_id, item[1], error, max_attempts=2) is False
+        job = queue.get(job_id)
+        assert job["status"] == "done"
+        assert job["results"][0]["result"] == error
+
+
+def test_job_api_round_trip(client):
+    """Jobs are accepted with 202 and can be polled by id."""
+    response = client.post("/api/jobs", json={"vehicles": [
+        {"plate": plate, "niv": vin} for plate, vin in VEHICLES
+    ]})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body["total"] == 2
+
+    job = client.get(body["status_url"]).get_json()
+    assert job["status"] == "queued"
+    assert job["completed"] == 0
+
+    assert client.get("/api/jobs/unknown").status_code == 404
+    assert client.post("/api/jobs", json={"vehicles": [{"plate": "X"}]}).status_code == 400
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Offline tests for lazy loading of the OCR stack and warm-up readiness.
+"""
+import sys
+import os
+import subprocess
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("cv2", "numpy", "pytesseract", "PIL")
+
+
+def run_python(code):
+    """Run code in a fresh interpreter from the project root and return its output."""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_importing_app_skips_ocr_stack():
+    """Importing the app, the scraper and the ASGI app loads none of the OCR libraries."""
+    output = run_python(
+        "import sys, app, app.asgi, scraper, worker\n"
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+    assert output == ""
+
+
+def test_health_does_not_load_ocr_stack(tmp_path):
+    """Health checks answer without the OCR libraries; /status reports their state."""
+    output = run_python(
+        "import sys\n"
+        "from app import create_app\n"
+        "from tests.support import make_config\n"
+        f"client = create_app(make_config({str(tmp_path)!r})).test_client()\n"
+        "assert client.get('/health').status_code == 200\n"
+        "startup = client.get('/status').get_json()['startup']\n"
+        "assert startup['import_seconds'] > 0\n"
+        "assert startup['ocr_stack'] == {'loaded': False, 'load_seconds': None}\n"
+        "print('cv2' in sys.modules)"
+    )
+    assert output == "False"
+
+
+def test_warm_up_loads_ocr_stack():
+    """Warm-up loads the OCR libraries and the process reports ready."""
+    output = run_python(
+        "import sys\n"
+        "from app import warmup\n"
+        "import captcha_solver\n"
+        "assert not warmup.is_ready()\n"
+        "warmup.start_warm_up({'OCR_WARMUP': True, 'GUNICORN_PRELOAD': True})\n"
+        "state = warmup.readiness()\n"
+        "print(state['ready'], state['mode'], 'cv2' in sys.modules, captcha_solver.cv2 is sys.modules['cv2'])"
+    )
+    assert output == "True preload True True"
+
+
+def test_health_not_ready_until_warm(tmp_path):
+    """/health answers 503 while the background warm-up is still running."""
+    output = run_python(
+        "import time\n"
+        "from app import create_app, warmup\n"
+        "from tests.support import make_config\n"
+        f"config = make_config({str(tmp_path)!r}, OCR_WARMUP=True, GUNICORN_PRELOAD=False)\n"
+        "warmup._lock.acquire()  # hold the warm-up thread back\n"
+        "client = create_app(config).test_client()\n"
+        "cold = client.get('/health')\n"
+        "warmup._lock.release()\n"
+        "deadline = time.time() + 30\n"
+        "while not warmup.is_ready() and time.time() < deadline:\n"
+        "    time.sleep(0.05)\n"
+        "warm = client.get('/health')\n"
+        "print(cold.status_code, cold.get_json()['status'], warm.status_code, warm.get_json()['status'])"
+    )
+    assert output == "503 starting 200 ok"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
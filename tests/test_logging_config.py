@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the verbose and production logging modes.
+
+Logging is configured once per process, so each case runs in a child
+interpreter and inspects what it wrote to stderr.
+"""
+import sys
+import os
+import subprocess
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the project root to Python path
+sys.path.insert(0, ROOT)
+
+LOOKUP_SCRIPT = """
+import logging
+import sys
+
+from logging_config import configure_logging
+
+configure_logging(sys.argv[1], 'INFO', ocr_sample_rate=float(sys.argv[2]))
+
+from captcha_solver import ocr_logger
+from scraper import PagaFacilScraper
+from tests.fake_upstream import NOT_FOUND_PAGE, REJECTED_PAGE, ScriptedSolver, ScriptedTransport, solve_details
+
+
+class LoggingSolver(ScriptedSolver):
+    def get_multiple_attempts(self, *args, **kwargs):
+        for call in range(40):
+            ocr_logger.info("OCR result (img %s, cfg %s): '%s' -> '%s'", 0, call, 'AB12', 'AB12')
+        return super().get_multiple_attempts(*args, **kwargs)
+
+
+scraper = PagaFacilScraper()
+scraper.session.mount('https://', ScriptedTransport([REJECTED_PAGE, NOT_FOUND_PAGE]))
+scraper.captcha_solver = LoggingSolver([[solve_details('AB12', seconds=0.1, calls=40)]] * 2)
+scraper.get_vehicle_info("FDH923C", "ML3AB56J7JH004905")
+print(type(logging.getLogger().handlers[0]).__name__)
+"""
+
+
+def run_lookup(mode, sample_rate):
+    """Run one scripted lookup in a child process; returns (stdout, stderr lines)."""
+    completed = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(LOOKUP_SCRIPT), mode, str(sample_rate)],
+        cwd=ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout.strip(), completed.stderr.splitlines()
+
+
+def test_production_mode_logs_one_summary_line():
+    """Production mode drops the step logs and describes the lookup in one line."""
+    handler, lines = run_lookup("production", 0)
+
+    assert handler == "LocalQueueHandler"
+    summaries = [line for line in lines if " - scraper.summary - " in line]
+    assert len(summaries) == 1
+    summary = summaries[0]
+    for field in ("plate=FDH923C", "outcome=not_found", "attempts=2", "captcha_solves=2",
+                  "captcha_rejections=1", "tesseract_calls=80", "errors=0"):
+        assert field in summary, field
+    # Step logs below WARNING are dropped
+    assert all(" - WARNING - " in line for line in lines if line not in summaries)
+    assert not any(" - scraper - INFO - " in line for line in lines)
+
+
+def test_production_mode_samples_ocr_lines():
+    """Per-OCR-call lines are kept at the configured sample rate."""
+    _, lines = run_lookup("production", 1)
+    assert sum(" - captcha_solver.ocr - " in line for line in lines) == 80
+
+
+def test_verbose_mode_keeps_step_logs():
+    """Verbose mode logs every step on the calling thread, plus the summary."""
+    handler, lines = run_lookup("verbose", 0.05)
+
+    assert handler == "StreamHandler"
+    assert any(" - scraper - INFO - Attempt 1/" in line for line in lines)
+    assert sum(" - captcha_solver.ocr - " in line for line in lines) == 80
+    assert sum(" - scraper.summary - " in line for line in lines) == 1
+
+
+if __name__ == "__main__":
+    test_production_mode_logs_one_summary_line()
+    test_production_mode_samples_ocr_lines()
+    test_verbose_mode_keeps_step_logs()
+    print("All logging tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the per-stage lookup metrics and the /metrics endpoint.
+"""
+import sys
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prometheus_client import REGISTRY
+
+import metrics
+from scraper import PagaFacilScraper
+from tests.fake_upstream import NOT_FOUND_PAGE, REJECTED_PAGE, ScriptedSolver, ScriptedTransport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample(name, **labels):
+    """Current value of a sample in the default registry."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_lookup_records_stages_and_counters():
+    """A lookup times every stage it runs and counts attempts, rejections and responses."""
+    stages = ('form_get', 'form_parse', 'submit', 'classify', 'result_parse')
+    before = {stage: sample('pagafacil_stage_seconds_count', stage=stage) for stage in stages}
+    attempts = sample('pagafacil_form_attempts_total')
+    rejections = sample('pagafacil_captcha_rejections_total')
+    posts = sample('pagafacil_upstream_responses_total', method='POST', status='200')
+    not_found = sample('pagafacil_lookup_seconds_count', outcome='not_found')
+
+    scraper = PagaFacilScraper()
+    scraper.session.mount('https://', ScriptedTransport([REJECTED_PAGE, NOT_FOUND_PAGE]))
+    scraper.captcha_solver = ScriptedSolver()
+    result = scraper.get_vehicle_info('fdh923c', 'ml3ab56j7jh004905')
+    assert result['codigo'] == 'error'
+
+    # Two form cycles, the first one rejected; the result is parsed once
+    expected = {'form_get': 2, 'form_parse': 2, 'submit': 2, 'classify': 2, 'result_parse': 1}
+    for stage, count in expected.items():
+        assert sample('pagafacil_stage_seconds_count', stage=stage) - before[stage] == count, stage
+    assert sample('pagafacil_form_attempts_total') - attempts == 2
+    assert sample('pagafacil_captcha_rejections_total') - rejections == 1
+    assert sample('pagafacil_upstream_responses_total', method='POST', status='200') - posts == 2
+    assert sample('pagafacil_lookup_seconds_count', outcome='not_found') - not_found == 1
+
+
+def test_metrics_endpoint(client):
+    """/metrics serves the Prometheus text format."""
+    metrics.STAGE_SECONDS.labels('ocr').observe(0.2)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'pagafacil_stage_seconds_bucket{le="0.25",stage="ocr"}' in body
+    assert 'pagafacil_form_attempts_total' in body
+
+
+def test_multiprocess_aggregation():
+    """With a shared PROMETHEUS_MULTIPROC_DIR, samples from every process are summed."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+
+        def run(code):
+            result = subprocess.run(
+                [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+            )
+            assert result.returncode == 0, result.stderr
+            return result.stdout
+
+        for _ in range(2):
+            run(
+                "import metrics\n"
+                "metrics.ATTEMPTS.inc(3)\n"
+                "metrics.STAGE_SECONDS.labels('submit').observe(1.5)"
+            )
+        body = run("import metrics\nprint(metrics.render()[0].decode())")
+
+        assert "pagafacil_form_attempts_total 6.0" in body
+        assert 'pagafacil_stage_seconds_count{stage="submit"} 2.0' in body
+
+        # Files of exited processes go, the files of this one stay
+        open(os.path.join(directory, f"counter_{os.getpid()}.db"), "wb").close()
+        metrics.clear_stale_files(directory)
+        assert os.listdir(directory) == [f"counter_{os.getpid()}.db"]
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
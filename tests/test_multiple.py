@@ -12,6 +12,7 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scraper import PagaFacilScraper
+from logging_config import configure_logging
 
 # Test a few cases to verify functionality
 TEST_CASES = [
@@ -149,4 +150,5 @@ def main():
     return 0 if success_count > 0 else 1
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
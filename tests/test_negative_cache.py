@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the negative-result cache and its Bloom filter.
+"""
+import sys
+import os
+import tempfile
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.negative_cache import BloomFilter, NegativeResultCache
+from scraper import NOT_FOUND_MESSAGE, is_not_found
+
+NOT_FOUND = {"codigo": "error", "info": None, "error": {"mensaje": NOT_FOUND_MESSAGE}}
+
+
+def test_bloom_filter_is_shared_through_its_file():
+    """Keys added through one mapping are visible through another."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bloom")
+        writer = BloomFilter(path, capacity=1000)
+        reader = BloomFilter(path, capacity=1000)
+
+        writer.add("HAW822H|LJ12FKT35P4023393")
+        assert "HAW822H|LJ12FKT35P4023393" in reader
+        assert "FDH923C|ML3AB56J7JH004905" not in reader
+
+
+def test_bloom_filter_false_positive_rate():
+    """The false-positive rate stays near the configured target."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bloom = BloomFilter(os.path.join(tmp, "bloom"), capacity=2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"bad-{i}")
+
+        false_positives = sum(f"good-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+def test_negative_cache_round_trip():
+    """Known-bad pairs are returned; unknown pairs never reach the database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NegativeResultCache(os.path.join(tmp, "cache.sqlite3"), ttl=60)
+        assert is_not_found(NOT_FOUND)
+
+        assert cache.get(("FDH923C", "ML3AB56J7JH004905")) is None
+        cache.set(("HAW822H", "LJ12FKT35P4023393"), NOT_FOUND)
+        assert cache.get(("HAW822H", "LJ12FKT35P4023393")) == NOT_FOUND
+
+        cache.invalidate(("HAW822H", "LJ12FKT35P4023393"))
+        assert cache.get(("HAW822H", "LJ12FKT35P4023393")) is None
+
+        stats = cache.stats()
+        assert stats["bloom_rejections"] == 1
+        assert stats["hits"] == 1
+
+
+if __name__ == "__main__":
+    test_bloom_filter_is_shared_through_its_file()
+    test_bloom_filter_false_positive_rate()
+    test_negative_cache_round_trip()
+    print("All negative cache tests passed")
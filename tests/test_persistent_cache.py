@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the SQLite result cache shared between workers.
+"""
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import multiprocessing
+import threading
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.persistent_cache import SQLiteResultCache
+
+
+def _store_in_child(db_path):
+    """Write an entry from a separate process, like another gunicorn worker."""
+    cache = SQLiteResultCache(db_path, ttl=60, prune_interval=0)
+    cache.set(("FDH923C", "ML3AB56J7JH004905"), {"codigo": "ok", "info": []})
+
+
+def test_entry_written_by_other_process_is_a_hit():
+    """A lookup cached by one worker is a hit for the others."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cache.sqlite3")
+
+        # The child creates the database; SQLite connections must not be open across fork()
+        process = multiprocessing.Process(target=_store_in_child, args=(db_path,))
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+        cache = SQLiteResultCache(db_path, ttl=60, prune_interval=0)
+        assert cache.get(("FDH923C", "ML3AB56J7JH004905")) == {"codigo": "ok", "info": []}
+        assert cache.stats()["hits"] == 1
+
+
+def test_wal_mode_and_prune():
+    """The database runs in WAL mode and pruning drops expired rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cache.sqlite3")
+        cache = SQLiteResultCache(db_path, ttl=60, prune_interval=0)
+        cache.set(("AAA111", "VIN1"), {"codigo": "ok"}, ttl=0.01)
+        cache.set(("BBB222", "VIN2"), {"codigo": "ok"})
+        time.sleep(0.02)
+
+        assert cache.get(("AAA111", "VIN1")) is None
+        assert cache.prune() == 1
+        assert cache.stats()["entries"] == 1
+
+        mode = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+
+def test_counters_from_many_threads():
+    """Hits and misses counted on several threads at once are all kept."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SQLiteResultCache(os.path.join(directory, "cache.sqlite3"))
+        cache.set(("FDH923C", "ML3AB56J7JH004905"), {"codigo": "ok"})
+
+        def look_up():
+            for _ in range(200):
+                cache.get_entry(("FDH923C", "ML3AB56J7JH004905"))
+                cache.get_entry(("ABC1234", "ML3AB56J7JH004905"))
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats["hits"] == stats["misses"] == 1600
+        assert stats["hit_rate"] == 0.5
+
+
+if __name__ == "__main__":
+    test_entry_written_by_other_process_is_a_hit()
+    test_wal_mode_and_prune()
+    test_counters_from_many_threads()
+    print("All persistent cache tests passed")
@@ -12,6 +12,7 @@ import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.scraper_service import ScraperService
+from logging_config import configure_logging
 
 # Test just 3 cases for quick validation
 TEST_CASES = [
@@ -101,4 +102,5 @@ def main():
     return status_code
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared upstream rate limiter.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+import multiprocessing
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rate_limiter import UpstreamRateLimiter
+
+
+def take_tokens(path, count):
+    """Take tokens from the bucket in a separate process."""
+    limiter = UpstreamRateLimiter(path, rate=20, burst=2)
+    for _ in range(count):
+        limiter.acquire()
+
+
+def test_burst_then_rate():
+    """The burst is served at once; further requests wait for refills."""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = UpstreamRateLimiter(os.path.join(tmp, "bucket"), rate=10, burst=3)
+        started = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        assert time.monotonic() - started < 0.05
+
+        for _ in range(2):
+            limiter.acquire()
+        assert time.monotonic() - started >= 0.15
+        assert limiter.stats()["acquired"] == 5
+
+
+def test_bucket_shared_across_processes():
+    """Processes using the same state file draw from one budget."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bucket")
+        UpstreamRateLimiter(path, rate=20, burst=2)
+
+        started = time.monotonic()
+        workers = [multiprocessing.Process(target=take_tokens, args=(path, 6)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # 12 tokens at 20/s with a burst of 2 need at least half a second
+        assert time.monotonic() - started >= 0.45
+
+
+def test_adaptive_backoff_and_recovery():
+    """High latency halves the rate once per cooldown; healthy responses raise it again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = UpstreamRateLimiter(
+            os.path.join(tmp, "bucket"), rate=4, adaptive=True, min_rate=1,
+            latency_target=1.0, increase_step=0.5, cooldown=60, smoothing=1.0
+        )
+        limiter.observe(5.0)
+        limiter.observe(5.0)
+        assert limiter.stats()["rate"] == 2.0
+
+        limiter.observe(0.2)
+        limiter.observe(0.2, throttled=True)
+        assert limiter.stats()["rate"] == 2.5
+
+        for _ in range(5):
+            limiter.observe(0.2)
+        assert limiter.stats()["rate"] == 4.0
+
+
+def test_async_limiter_uses_the_same_bucket():
+    """The async variants take tokens from and adapt the same shared bucket."""
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = UpstreamRateLimiter(
+            os.path.join(tmp, "bucket"), rate=4, burst=1, adaptive=True,
+            latency_target=1.0, cooldown=60, smoothing=1.0
+        )
+
+        async def run():
+            assert await limiter.acquire_async() == 0.0
+            assert await limiter.acquire_async() > 0.0
+            await limiter.observe_async(5.0)
+
+        asyncio.run(run())
+        stats = limiter.stats()
+        assert stats["acquired"] == 2
+        assert stats["rate"] == 2.0
+
+
+if __name__ == "__main__":
+    test_burst_then_rate()
+    test_bucket_shared_across_processes()
+    test_adaptive_backoff_and_recovery()
+    test_async_limiter_uses_the_same_bucket()
+    print("All rate limiter tests passed")
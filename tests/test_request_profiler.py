@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Offline tests for on-demand lookup profiling and its admin endpoints.
+"""
+import sys
+import os
+import pstats
+import tempfile
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import RequestProfiler
+
+LOOKUP = "/api/vehicular/tenencia/FDH923C?niv=ML3AB56J7JH004905"
+AUTH = {"Authorization": "Bearer admin-secret"}
+
+
+def parse_vehicle_page():
+    """Stand-in for the parsing work a profile should show."""
+    return sum(range(1000))
+
+
+class FakeScraper:
+    """Scraper stand-in returning a fixed result."""
+
+    def get_vehicle_info(self, plate, vin):
+        parse_vehicle_page()
+        return {"codigo": "ok", "info": []}
+
+
+@pytest.fixture
+def directory(tmp_path):
+    """Directory the app writes its profiles to."""
+    return str(tmp_path / "profiles")
+
+
+@pytest.fixture
+def make_client(make_app, install_scraper, directory):
+    """Factory for test clients of an app writing profiles to ``directory``."""
+    def build(**overrides):
+        client = make_app(ADMIN_TOKEN="admin-secret", PROFILE_DIR=directory, **overrides).test_client()
+        install_scraper(FakeScraper, cache_ttl=0)
+        return client
+    return build
+
+
+def test_admin_header_profiles_lookup(make_client, directory):
+    """An admin's X-Profile header saves a profile named after the request's trace."""
+    client = make_client()
+    plain = client.get(LOOKUP, headers={"X-Profile": "1"})
+    response = client.get(LOOKUP, headers={"X-Profile": "1", **AUTH})
+
+    # Without the admin token the header is ignored
+    assert "X-Profile-Id" not in plain.headers
+    assert response.status_code == 200
+    name = response.headers["X-Profile-Id"]
+    assert name.endswith(f"-{response.headers['X-Trace-Id']}.prof")
+
+    stats = pstats.Stats(os.path.join(directory, name))
+    assert any(function == "parse_vehicle_page" for _, _, function in stats.stats)
+
+
+def test_admin_endpoints_list_and_download(make_client, directory):
+    """Admins list profiles and download them as pstats dumps or text reports."""
+    client = make_client()
+    name = client.get(LOOKUP, headers={"X-Profile": "1", **AUTH}).headers["X-Profile-Id"]
+
+    assert client.get("/api/admin/profiles").status_code == 403
+    body = client.get("/api/admin/profiles", headers=AUTH).get_json()
+    assert body["profiling_enabled"] is True
+    assert [profile["name"] for profile in body["profiles"]] == [name]
+    assert len(body["profiles"][0]["trace_id"]) == 32
+
+    dump = client.get(f"/api/admin/profiles/{name}", headers=AUTH)
+    assert dump.status_code == 200
+    with open(os.path.join(directory, name), "rb") as f:
+        assert dump.data == f.read()
+
+    report = client.get(f"/api/admin/profiles/{name}?format=text&sort=tottime", headers=AUTH)
+    assert report.mimetype == "text/plain"
+    assert "parse_vehicle_page" in report.get_data(as_text=True)
+
+    assert client.get(f"/api/admin/profiles/{name}?format=text&sort=bogus", headers=AUTH).status_code == 400
+    assert client.get("/api/admin/profiles/../config.prof", headers=AUTH).status_code == 404
+    assert client.get("/api/admin/profiles/123-abc.prof", headers=AUTH).status_code == 404
+
+
+def test_sampling_and_pruning(make_client, directory):
+    """Sampled lookups are profiled without the header and only the newest are kept."""
+    client = make_client(PROFILE_SAMPLE_RATE=1.0, PROFILE_KEEP=2)
+    names = [client.get(LOOKUP).headers["X-Profile-Id"] for _ in range(3)]
+
+    assert sorted(os.listdir(directory)) == sorted(names[1:])
+
+
+def test_profile_call_outside_trace():
+    """Profiles taken outside a request trace are still listed."""
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = RequestProfiler(directory)
+        assert profiler.should_profile() is False
+
+        result, name = profiler.profile_call(None, parse_vehicle_page)
+        assert result == sum(range(1000))
+        assert name.endswith("-notrace.prof")
+        assert profiler.list()[0]["trace_id"] is None
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
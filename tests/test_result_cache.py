@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the in-process result cache.
+"""
+import sys
+import os
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.result_cache import ResultCache
+
+
+def test_hit_and_miss_counters():
+    """A stored value is returned as a copy and counted as a hit."""
+    cache = ResultCache(ttl=60)
+    assert cache.get(("ABC123", "VIN")) is None
+
+    cache.set(("ABC123", "VIN"), {"codigo": "ok", "info": []})
+    value = cache.get(("ABC123", "VIN"))
+    assert value == {"codigo": "ok", "info": []}
+
+    value["info"].append("mutated")
+    assert cache.get(("ABC123", "VIN")) == {"codigo": "ok", "info": []}
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_entries_expire():
+    """Entries past their TTL are treated as misses and dropped."""
+    cache = ResultCache(ttl=60)
+    cache.set("key", {"codigo": "ok"}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_by_entry_count():
+    """The least recently used entry is evicted first."""
+    cache = ResultCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_bytes():
+    """The byte budget is enforced independently of the entry count."""
+    cache = ResultCache(ttl=60, max_entries=100, max_bytes=50)
+    cache.set("a", "x" * 30)
+    cache.set("b", "y" * 30)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 30
+    assert cache.stats()["bytes"] <= 50
+
+
+if __name__ == "__main__":
+    test_hit_and_miss_counters()
+    test_entries_expire()
+    test_lru_eviction_by_entry_count()
+    test_lru_eviction_by_bytes()
+    print("All result cache tests passed")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Offline tests for priority scheduling of scraper slots.
+"""
+import sys
+import os
+import threading
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.scheduler import PriorityScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+
+
+def run_queued(scheduler, arrivals):
+    """
+    Occupy the only slot, queue callers in order, then release it.
+
+    Returns:
+        Names of the callers in the order they were granted the slot
+    """
+    order = []
+    lock = threading.Lock()
+
+    def caller(name, priority):
+        with scheduler.slot(priority):
+            with lock:
+                order.append(name)
+            time.sleep(0.01)
+
+    threads = []
+    with scheduler.slot(PRIORITY_BULK):
+        for name, priority in arrivals:
+            thread = threading.Thread(target=caller, args=(name, priority))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_interactive_jumps_ahead_of_queued_bulk():
+    """An interactive lookup arriving behind a bulk backlog is served first."""
+    scheduler = PriorityScheduler(1)
+    order = run_queued(scheduler, [
+        ("bulk-1", PRIORITY_BULK),
+        ("bulk-2", PRIORITY_BULK),
+        ("bulk-3", PRIORITY_BULK),
+        ("ui", PRIORITY_INTERACTIVE),
+    ])
+    assert order[0] == "ui"
+
+
+def test_bulk_is_not_starved():
+    """With weights 2:1 bulk still gets one slot in three while both classes wait."""
+    scheduler = PriorityScheduler(1, weights={PRIORITY_INTERACTIVE: 2, PRIORITY_BULK: 1})
+    arrivals = [(f"bulk-{i}", PRIORITY_BULK) for i in range(3)]
+    arrivals += [(f"ui-{i}", PRIORITY_INTERACTIVE) for i in range(6)]
+    order = run_queued(scheduler, arrivals)
+    assert any(name.startswith("bulk") for name in order[:3])
+
+
+def test_queue_time_metrics_and_timeout():
+    """Waits are recorded per class and a timed-out caller leaves the queue."""
+    scheduler = PriorityScheduler(1)
+    with scheduler.slot(PRIORITY_BULK):
+        try:
+            with scheduler.slot(PRIORITY_INTERACTIVE, timeout=0.05):
+                pass
+            raise AssertionError("expected TimeoutError")
+        except TimeoutError:
+            pass
+
+    stats = scheduler.stats()
+    assert stats["free"] == 1
+    assert stats["classes"][PRIORITY_INTERACTIVE]["timeouts"] == 1
+    assert stats["classes"][PRIORITY_INTERACTIVE]["queued"] == 0
+    assert stats["classes"][PRIORITY_BULK]["granted"] == 1
+
+
+if __name__ == "__main__":
+    test_interactive_jumps_ahead_of_queued_bulk()
+    test_bulk_is_not_starved()
+    test_queue_time_metrics_and_timeout()
+    print("All scheduler tests passed")
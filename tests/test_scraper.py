@@ -11,6 +11,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.scraper_service import ScraperService
+from logging_config import configure_logging
 
 # Test cases provided by user
 TEST_CASES = [
@@ -171,4 +172,5 @@ def main():
     return 0 if success_count > 0 else 1
 
 if __name__ == "__main__":
+    configure_logging()
     sys.exit(main())
\ No newline at end of file
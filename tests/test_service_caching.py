@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Offline tests for ScraperService caching behaviour, using a stubbed scraper.
+"""
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.scraper_service import ScraperService
+
+PLATE = "FDH923C"
+VIN = "ML3AB56J7JH004905"
+
+
+class FakeScraper:
+    """Scraper stand-in that records calls instead of going upstream."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def get_vehicle_info(self, plate, vin):
+        self.calls.append((plate, vin))
+        time.sleep(0.1)
+        return {"codigo": "ok", "info": [{"periodo": 2025, "call": len(self.calls)}]}
+
+
+def make_service(**kwargs):
+    """Create a service whose scrapers count calls instead of going upstream."""
+    calls = []
+    service = ScraperService(scraper_factory=lambda: FakeScraper(calls), **kwargs)
+    return service, calls
+
+
+def test_cache_hit_and_no_cache_bypass():
+    """Repeat lookups are served from cache unless the caller bypasses it."""
+    service, calls = make_service()
+
+    assert service.get_vehicle_info(PLATE.lower(), VIN)["_metadata"]["cache"] == "miss"
+    assert service.get_vehicle_info(PLATE, VIN)["_metadata"]["cache"] == "hit"
+    assert service.get_vehicle_info(PLATE, VIN, use_cache=False)["_metadata"]["cache"] == "bypass"
+    assert len(calls) == 2
+
+
+def test_stale_while_revalidate():
+    """Past the soft TTL the stale value is returned at once and refreshed behind it."""
+    service, calls = make_service(cache_soft_ttl=0.5)
+    service.get_vehicle_info(PLATE, VIN)
+    time.sleep(0.6)
+
+    started = time.time()
+    stale = service.get_vehicle_info(PLATE, VIN)
+    assert time.time() - started < 0.05
+    assert stale["_metadata"]["stale"] is True
+    assert stale["_metadata"]["age"] >= 0.5
+    assert stale["info"][0]["call"] == 1
+
+    time.sleep(0.2)
+    fresh = service.get_vehicle_info(PLATE, VIN)
+    assert fresh["info"][0]["call"] == 2
+    assert "stale" not in fresh["_metadata"]
+    assert len(calls) == 2
+
+
+def test_unreadable_disk_cache_falls_through_to_scrape():
+    """Locked disk and negative caches are skipped instead of failing the lookup."""
+    with tempfile.TemporaryDirectory() as directory:
+        service, calls = make_service(cache_db_path=os.path.join(directory, "cache.sqlite3"))
+
+        def locked(key):
+            raise sqlite3.OperationalError("database is locked")
+        service.persistent_cache.get_entry = locked
+        service.negative_cache.get = locked
+
+        result = service.get_vehicle_info(PLATE, VIN)
+        assert result["codigo"] == "ok"
+        assert result["_metadata"]["cache"] == "miss"
+        assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_no_cache_bypass()
+    test_stale_while_revalidate()
+    test_unreadable_disk_cache_falls_through_to_scrape()
+    print("All service caching tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Offline tests for coalescing identical concurrent lookups.
+"""
+import sys
+import os
+import threading
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    """Callers with the same key wait on a single call and get copies of its result."""
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def lookup():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"codigo": "ok", "info": []}
+
+    def caller():
+        results.append(flight.do(("FDH923C", "ML3AB56J7JH004905"), lookup))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(shared for _, shared in results)
+    assert all(result == {"codigo": "ok", "info": []} for result, _ in results)
+    assert len({id(result) for result, _ in results}) == 5
+    assert flight.stats() == {"in_flight": 0, "coalesced": 4}
+
+
+def test_errors_are_delivered_to_every_waiter():
+    """An exception in the shared call is raised in every caller."""
+    flight = SingleFlight()
+    errors = []
+
+    def lookup():
+        time.sleep(0.2)
+        raise RuntimeError("upstream down")
+
+    def caller():
+        try:
+            flight.do("key", lookup)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["upstream down"] * 3
+
+
+def test_different_keys_run_independently():
+    """Calls for different keys are not coalesced."""
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_call()
+    test_errors_are_delivered_to_every_waiter()
+    test_different_keys_run_independently()
+    print("All single-flight tests passed")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Offline tests for request tracing and the OpenTelemetry JSON trace file.
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+from app.asgi import create_asgi_app
+from app.services import AsyncScraperService
+from scraper import PagaFacilScraper
+from tests.fake_upstream import NOT_FOUND_PAGE, REJECTED_PAGE, ScriptedSolver, ScriptedTransport
+
+
+class TracedSolver(ScriptedSolver):
+    """Captcha solver stand-in answering inside a ``captcha_solve`` span."""
+
+    def get_multiple_attempts(self, *args, **kwargs):
+        with tracing.span('captcha_solve', solved=True):
+            return super().get_multiple_attempts(*args, **kwargs)
+
+
+class FakeScraper:
+    """Scraper stand-in returning a fixed result."""
+
+    def get_vehicle_info(self, plate, vin):
+        return {"codigo": "ok", "info": []}
+
+
+class FakeAsyncScraper:
+    """Async scraper stand-in returning a fixed result."""
+
+    async def get_vehicle_info(self, plate, vin):
+        return {"codigo": "ok", "info": []}
+
+
+def read_traces(path):
+    """Spans of every exported line, by trace id."""
+    traces = {}
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    for span in scope["spans"]:
+                        span["attributes"] = {
+                            item["key"]: next(iter(item["value"].values())) for item in span["attributes"]
+                        }
+                        traces.setdefault(span["traceId"], []).append(span)
+    return traces
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Trace file under the test's scratch directory; export is turned off again afterwards."""
+    yield str(tmp_path / "traces.jsonl")
+    tracing.configure(None)
+
+
+def test_scraper_spans_per_attempt_and_stage(path):
+    """Every attempt and stage of a lookup is a span under the request's root span."""
+    tracing.configure(path)
+    scraper = PagaFacilScraper()
+    scraper.session.mount('https://', ScriptedTransport([REJECTED_PAGE, NOT_FOUND_PAGE]))
+    scraper.captcha_solver = TracedSolver()
+    with tracing.start_trace("lookup") as root:
+        scraper.get_vehicle_info("FDH923C", "ML3AB56J7JH004905")
+
+    traces = read_traces(path)
+    assert list(traces) == [root.trace_id]
+    spans = traces[root.trace_id]
+    by_id = {span["spanId"]: span for span in spans}
+
+    attempts = [span for span in spans if span["name"] == "attempt"]
+    assert [span["attributes"]["outcome"] for span in attempts] == ["captcha_rejected", "submitted"]
+    assert [span["attributes"]["number"] for span in attempts] == ["1", "2"]
+
+    names = [span["name"] for span in spans]
+    for name, count in (("form_get", 2), ("form_parse", 2), ("captcha_solve", 2), ("submit", 2),
+                        ("classify", 2), ("result_parse", 1), ("scraper_lookup", 1)):
+        assert names.count(name) == count, name
+
+    # Stages hang off their attempt, attempts off the lookup, the lookup off the root
+    for span in spans:
+        if span["name"] in ("form_get", "submit", "captcha_solve"):
+            assert by_id[span["parentSpanId"]]["name"] == "attempt"
+    lookup = next(span for span in spans if span["name"] == "scraper_lookup")
+    assert lookup["attributes"]["outcome"] == "not_found"
+    assert lookup["parentSpanId"] == root.span_id
+    assert all(int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"]) for span in spans)
+
+
+def test_flask_request_returns_trace_id(make_app, install_scraper, path):
+    """API responses carry X-Trace-Id, matching the trace written for the request."""
+    client = make_app(TRACE_FILE=path).test_client()
+    install_scraper(FakeScraper, cache_ttl=0)
+    response = client.get("/api/vehicular/tenencia/FDH923C?niv=ML3AB56J7JH004905")
+    assert client.get("/health").headers.get("X-Trace-Id") is None
+
+    trace_id = response.headers["X-Trace-Id"]
+    assert len(trace_id) == 32
+    spans = read_traces(path)[trace_id]
+    root = next(span for span in spans if "parentSpanId" not in span)
+    assert root["name"] == "GET /api/vehicular/tenencia/<string:plate>"
+    assert root["kind"] == tracing.SPAN_KIND_SERVER
+    assert root["attributes"]["http.status_code"] == "200"
+    lookup = next(span for span in spans if span["name"] == "service_lookup")
+    assert lookup["attributes"]["cache"] == "miss"
+    assert any(span["name"] == "scrape" for span in spans)
+
+
+def test_asgi_request_returns_trace_id(app_config, path):
+    """The ASGI lookup route returns X-Trace-Id too."""
+    app = create_asgi_app(app_config(TRACE_FILE=path))
+    app.service = AsyncScraperService(async_scraper=FakeAsyncScraper(), max_concurrency=5, cache_ttl=0)
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/vehicular/tenencia/FDH923C",
+        "query_string": b"niv=ML3AB56J7JH004905",
+        "headers": []
+    }
+    asyncio.run(app(scope, receive, send))
+
+    headers = dict(messages[0]["headers"])
+    trace_id = headers[b"x-trace-id"].decode()
+    names = {span["name"] for span in read_traces(path)[trace_id]}
+    assert {"service_lookup", "scrape"} <= names
+
+
+def test_trace_file_rotation(path):
+    """The trace file is rotated by size, keeping the configured number of backups."""
+    trace_file = tracing.TraceFile(path, max_bytes=100, backups=2)
+    for index in range(10):
+        trace_file.write(json.dumps({"line": index, "padding": "x" * 40}))
+
+    directory = os.path.dirname(path)
+    assert sorted(name for name in os.listdir(directory) if not name.endswith(".lock")) == [
+        "traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"
+    ]
+    with open(path) as f:
+        assert json.loads(f.read().splitlines()[-1])["line"] == 9
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the background upstream prober and /status snapshot.
+"""
+import sys
+import os
+import tempfile
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routes import health
+from app.services import PeriodicSnapshot, UpstreamProber
+
+
+class FakeProbe:
+    """Probe stand-in returning scripted outcomes."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else True
+        if outcome is None:
+            raise ConnectionError("form page unreachable")
+        return {"form_seconds": 0.5, "captcha_seconds": 0.2, "captcha_solved": outcome}
+
+
+class FakeScraper:
+    """Scraper stand-in: the plate decides the outcome."""
+
+    def get_vehicle_info(self, plate, vin):
+        if plate.startswith("ERR"):
+            return {"codigo": "error", "info": None, "error": {"mensaje": "Error processing request: timeout"}}
+        return {"codigo": "ok", "info": []}
+
+
+def test_snapshot_states():
+    """The snapshot goes from unknown to ok, degraded and error with the probe history."""
+    probe = FakeProbe([True, True, False, None, None, None])
+    prober = UpstreamProber(probe, history=4)
+    assert prober.snapshot()["state"] == "unknown"
+
+    prober.probe_once()
+    snapshot = prober.snapshot()
+    assert snapshot["state"] == "ok"
+    assert snapshot["last"]["form_seconds"] == 0.5
+    assert snapshot["success_rate"] == 1.0
+
+    prober.probe_once()
+    prober.probe_once()
+    snapshot = prober.snapshot()
+    assert snapshot["state"] == "degraded"
+    assert snapshot["last"]["error"] == "Captcha could not be solved"
+
+    prober.probe_once()
+    prober.probe_once()
+    snapshot = prober.snapshot()
+    assert snapshot["state"] == "error"
+    assert snapshot["last"]["error"] == "form page unreachable"
+    assert snapshot["success_rate"] == 0.25
+    assert snapshot["probes"] == 5
+
+
+def test_background_thread_probes_periodically():
+    """The probe thread runs at once and then every interval until stopped."""
+    probe = FakeProbe([])
+    prober = UpstreamProber(probe, interval=0.05)
+    prober.start()
+    time.sleep(0.3)
+    prober.stop()
+    assert probe.calls >= 3
+    assert prober.snapshot()["state"] == "ok"
+
+
+def test_one_prober_per_host():
+    """Probers sharing a state file probe once per round; the others read the result."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "probe.json")
+        probes = [FakeProbe([True, False]), FakeProbe([])]
+        leader, follower = (UpstreamProber(probe, history=4, state_path=path) for probe in probes)
+
+        leader.run_once()
+        follower.run_once()
+        assert probes[0].calls == 1 and probes[1].calls == 0
+        assert follower.snapshot()["state"] == "ok"
+
+        # The leader exits; the follower takes over and keeps the history
+        leader._release()
+        follower.run_once()
+        assert probes[1].calls == 1
+        assert follower.snapshot()["probes"] == 2
+        assert follower.snapshot()["success_rate"] == 1.0
+
+
+def test_status_serves_cached_snapshot(app, client, install_scraper):
+    """/status reports the cached probe and lookup success rates without probing."""
+    probe = FakeProbe([False])
+    health.upstream_prober = UpstreamProber(probe)
+    health.upstream_prober.probe_once()
+    service = install_scraper(FakeScraper)
+    cache_reads = []
+    read_cache_stats = service.cache_stats
+    service.cache_stats = lambda: cache_reads.append(1) or read_cache_stats()
+    client.get("/api/vehicular/tenencia/FDH923C?niv=ML3AB56J7JH004905")
+    client.get("/api/vehicular/tenencia/ERR923C?niv=ML3AB56J7JH004905")
+
+    for _ in range(5):
+        status = client.get("/status").get_json()
+    assert probe.calls == 1
+    # Cache figures come from the service's snapshot, not from every request
+    assert len(cache_reads) == 1
+    assert status["cache"]["memory"]["entries"] == 1
+
+    assert status["status"] == "degraded"
+    assert status["components"] == {"scraper": "error", "captcha_solver": "error"}
+    assert status["upstream_probe"]["success_rate"] == 0.0
+    assert status["lookups"] == {"recent": 2, "ok": 1, "not_found": 0, "error": 1, "success_rate": 0.5}
+    assert status["pool"]["size"] == app.config["SCRAPER_POOL_SIZE"]
+
+
+def test_periodic_snapshot_refreshes_in_background():
+    """Reads return the cached value; the thread recomputes it and keeps the last good one on errors."""
+    values = [1, ValueError("locked"), 2]
+
+    def compute():
+        value = values.pop(0) if values else 3
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    snapshot = PeriodicSnapshot(compute, interval=0.05)
+    try:
+        assert snapshot.get() == 1
+        assert snapshot.get() == 1
+        deadline = time.time() + 5
+        while snapshot.get() != 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert snapshot.get() == 3
+    finally:
+        snapshot.stop()
+
+    # Without an interval every read computes
+    calls = []
+    uncached = PeriodicSnapshot(lambda: calls.append(1) or len(calls), interval=0)
+    assert (uncached.get(), uncached.get()) == (1, 2)
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Offline tests for plate and VIN validation.
+"""
+import sys
+import os
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.validators import validate_vin, validate_vehicle_entry, vin_check_digit
+
+
+def test_check_digit():
+    """The ISO 3779 / 49 CFR 565 check digit is computed for 17-character VINs."""
+    assert vin_check_digit("1M8GDM9AXKP042788") == "X"
+    assert vin_check_digit("11111111111111111") == "1"
+
+
+def test_wmi_decoding_and_strict_mode():
+    """North American VINs are checked; others are decoded but not rejected."""
+    good = validate_vin("1m8gdm9axkp042788")
+    assert good["valid"] and good["check_digit_valid"] is True
+    assert good["country"] == "United States"
+
+    typo = "1M8GDM9A1KP042788"
+    assert validate_vin(typo)["valid"] is True
+    assert validate_vin(typo)["check_digit_valid"] is False
+    assert validate_vin(typo, strict=True)["valid"] is False
+
+    mexican = validate_vin("3N1CN7AD5JL800000")
+    assert mexican["region"] == "North America" and mexican["country"] == "Mexico"
+
+    asian = validate_vin("ML3AB56J7JH004905", strict=True)
+    assert asian["valid"] and asian["check_digit_valid"] is None
+    assert asian["country"] == "Thailand"
+
+    assert validate_vin("ABC123DEF45", strict=True)["valid"] is True
+    assert validate_vin("1M8GDM9AXKP04278O")["valid"] is False
+
+
+def test_strict_mode_rejects_before_lookup(make_app):
+    """With VIN_STRICT_VALIDATION the endpoint answers 400 without scraping."""
+    client = make_app(VIN_STRICT_VALIDATION=True).test_client()
+
+    response = client.get("/api/vehicular/tenencia/FDH923C?niv=1M8GDM9A1KP042788")
+    assert response.status_code == 400
+    assert "check digit" in response.get_json()["error"]["mensaje"]
+
+    entry = validate_vehicle_entry({"plate": "FDH923C", "niv": "1M8GDM9A1KP042788"}, strict_vin=True)
+    assert entry["valid"] is False
+
+
+if __name__ == "__main__":
+    # Route tests take their app and client from the fixtures in conftest.py
+    sys.exit(pytest.main([__file__, "-q"]))
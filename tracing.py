@@ -0,0 +1,340 @@
+"""
+Request tracing with spans exported as OpenTelemetry JSON.
+
+An API request opens a trace with ``start_trace``; the trace and the
+current span travel in a context variable, so code further down
+(``ScraperService``, ``PagaFacilScraper``, ``CaptchaSolver``) opens child
+spans with ``span`` or ``traced`` without passing anything around. Code
+running outside a trace, such as job workers, records nothing.
+
+When a trace's root span ends, all its spans are written as one line of
+OTLP/JSON (an ``ExportTraceServiceRequest``) to a size-rotated file, the
+format the OpenTelemetry collector's file receiver and exporter use.
+"""
+import contextvars
+import fcntl
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'pagafacil-scraper'
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_exporter = None
+
+
+class TraceFile:
+    """
+    Append-only JSON lines file rotated by size, safe across processes.
+
+    Every write takes an ``flock`` on a side lock file, so gunicorn workers
+    sharing the file neither interleave lines nor rotate it twice.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3):
+        """
+        Initialize the file.
+
+        Args:
+            path: Path of the current trace file
+            max_bytes: Size after which the file is rotated
+            backups: Rotated files kept (``path.1`` is the newest)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, line):
+        """Append one line, rotating the file first if it would grow too large."""
+        data = (line + '\n').encode('utf-8')
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    size = os.path.getsize(self.path)
+                except FileNotFoundError:
+                    size = 0
+                if size and size + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class _Trace:
+    """Spans of one trace collected until its root span ends."""
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.lock = threading.Lock()
+        self.spans = []
+        self.exported = False
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace, name, parent=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self._trace = trace
+        self.name = name
+        self.trace_id = trace.trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status_code = 0
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        """Set an attribute, e.g. the outcome of the operation."""
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        """Mark the span failed with an exception or message."""
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = str(error)
+        if isinstance(error, BaseException):
+            self.attributes['exception.type'] = type(error).__name__
+
+    def end(self):
+        """End the span; ending the root span exports the trace."""
+        self.end_ns = time.time_ns()
+        if self.status_code == 0 and self.status_message is None:
+            self.status_code = STATUS_CODE_OK
+        trace = self._trace
+        with trace.lock:
+            if trace.exported:
+                # Ended after the request finished, e.g. by a background task
+                spans = [self]
+            else:
+                trace.spans.append(self)
+                if self.parent_span_id is not None:
+                    return
+                trace.exported = True
+                spans = trace.spans
+        _export(spans)
+
+    def to_otlp(self):
+        """Encode the span as an OTLP/JSON span object."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)}
+                for key, value in self.attributes.items() if value is not None
+            ],
+            'status': {'code': self.status_code}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Stand-in yielded outside a trace or when export is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _export(spans):
+    exporter = _exporter
+    if exporter is None:
+        return
+    payload = {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}}
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans]
+            }]
+        }]
+    }
+    try:
+        exporter.write(json.dumps(payload, separators=(',', ':')))
+    except OSError as e:
+        # A full disk must not fail the request
+        logger.warning("Could not export trace: %s", e)
+
+
+def configure(path, max_bytes=10 * 1024 * 1024, backups=3):
+    """
+    Set where finished traces are written.
+
+    Args:
+        path: Trace file (empty or None disables export; trace ids are
+            still generated)
+        max_bytes: Size after which the file is rotated
+        backups: Rotated files kept
+    """
+    global _exporter
+    _exporter = TraceFile(path, max_bytes=max_bytes, backups=backups) if path else None
+
+
+def begin_trace(name, **attributes):
+    """
+    Open a new trace with a server span as its root and make it current.
+
+    For frameworks that start and finish a request in separate hooks;
+    otherwise use ``start_trace``.
+
+    Args:
+        name: Root span name, e.g. ``GET /api/vehicular/tenencia/<plate>``
+        **attributes: Span attributes
+
+    Returns:
+        Tuple of (root span, token to pass to ``finish_trace``)
+    """
+    root = Span(_Trace(os.urandom(16).hex()), name, kind=SPAN_KIND_SERVER, attributes=attributes)
+    return root, _current_span.set(root)
+
+
+def finish_trace(root, token, error=None):
+    """
+    End a trace opened with ``begin_trace`` and export it.
+
+    Args:
+        root: Root span
+        token: Token returned by ``begin_trace``
+        error: Exception that ended the request, if any
+    """
+    if error is not None:
+        root.record_error(error)
+    _current_span.reset(token)
+    root.end()
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """
+    Open a new trace for the duration of a ``with`` block.
+
+    Args:
+        name: Root span name
+        **attributes: Span attributes
+
+    Yields:
+        The root span; its ``trace_id`` identifies the request
+    """
+    root, token = begin_trace(name, **attributes)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        finish_trace(root, token, error)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Record a child span of the current span.
+
+    Exceptions raised in the block mark the span failed and propagate.
+
+    Args:
+        name: Span name
+        **attributes: Span attributes
+
+    Yields:
+        The span, or a no-op stand-in outside a trace
+    """
+    parent = _current_span.get()
+    if parent is None or _exporter is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent._trace, name, parent=parent, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name):
+    """Decorator recording every call of a function as a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attributes):
+    """Set attributes on the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        for key, value in attributes.items():
+            current.set_attribute(key, value)
+
+
+def current_trace_id():
+    """Trace id of the current request, or None outside a trace."""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
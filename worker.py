@@ -0,0 +1,138 @@
+"""
+Background job worker for asynchronous vehicle lookups.
+
+Runs scraper worker processes, separate from the gunicorn web workers,
+that take vehicles from the job queue and store their results. Failed
+lookups are requeued until they have used up ``JOB_MAX_ATTEMPTS``. The
+queue is a local SQLite file, so the worker must run on the same host
+as the web processes.
+
+Usage:
+    python worker.py [--processes N]
+"""
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+import multiprocessing
+
+from app.config import Config
+from logging_config import configure_logging
+
+# Configure logging
+configure_logging(Config.LOG_MODE, Config.LOG_LEVEL, Config.LOG_OCR_SAMPLE_RATE)
+
+logger = logging.getLogger('worker')
+
+# Seconds to wait before polling an empty queue again
+POLL_INTERVAL = 1.0
+
+# Seconds between pruning runs for finished jobs
+PRUNE_INTERVAL = 3600
+
+
+def run_worker(worker_number):
+    """
+    Process queued items until asked to stop.
+
+    Args:
+        worker_number: Index of this worker process, used in its id
+    """
+    from app import create_app
+    from app.routes.vehicular import init_scraper_service
+    from app.routes.jobs import init_job_queue
+    from app.services import PRIORITY_BULK
+    from scraper import lookup_outcome
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    app = create_app()
+    with app.app_context():
+        service = init_scraper_service()
+        queue = init_job_queue()
+        retention = app.config['JOB_RETENTION_SECONDS']
+        max_attempts = app.config['JOB_MAX_ATTEMPTS']
+        retry_delay = app.config['JOB_RETRY_DELAY']
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_number}"
+    logger.info("Job worker %s started", worker_id)
+    last_prune = 0.0
+
+    while not stopping:
+        item = queue.claim(worker_id)
+        if item is None:
+            if time.time() - last_prune > PRUNE_INTERVAL:
+                removed = queue.prune(retention)
+                if removed:
+                    logger.info("Pruned %s finished jobs", removed)
+                last_prune = time.time()
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        job_id, idx, plate, vin = item
+        logger.info("Worker %s processing job %s item %s: %s", worker_id, job_id, idx, plate)
+        result = service.get_vehicle_info(plate, vin, priority=PRIORITY_BULK)
+        if lookup_outcome(result) != 'error':
+            queue.complete(job_id, idx, result)
+        elif queue.retry(job_id, idx, result, max_attempts, retry_delay):
+            logger.warning("Job %s item %s failed, requeued: %s",
+                           job_id, idx, (result.get('error') or {}).get('mensaje'))
+        else:
+            logger.warning("Job %s item %s failed after %s attempts", job_id, idx, max_attempts)
+
+    logger.info("Job worker %s stopped", worker_id)
+
+
+def main():
+    """Start worker processes and restart any that die."""
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument('--processes', type=int, default=Config.JOB_WORKER_PROCESSES,
+                        help="Number of worker processes")
+    args = parser.parse_args()
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    workers = {}
+
+    def start(number):
+        process = multiprocessing.Process(target=run_worker, args=(number,), name=f"job-worker-{number}")
+        process.start()
+        workers[number] = process
+
+    for number in range(args.processes):
+        start(number)
+    logger.info("Started %s job worker processes", args.processes)
+
+    while not stopping:
+        for number, process in list(workers.items()):
+            process.join(timeout=1.0 / max(1, len(workers)))
+            if not process.is_alive() and not stopping:
+                logger.warning("Job worker %s exited with code %s, restarting", number, process.exitcode)
+                start(number)
+
+    # Let each worker finish the item it is on
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        process.join()
+    logger.info("All job workers stopped")
+
+
+if __name__ == '__main__':
+    main()